@@ -1,20 +1,52 @@
-import os, re, requests, hashlib, time, threading, logging, sqlite3
+import os, re, requests, hashlib, time, threading, logging, sqlite3, uuid, math
 from datetime import timedelta
-from flask import Flask, request, render_template, jsonify, redirect, url_for, flash, session
+from flask import Flask, request, render_template, jsonify, redirect, url_for, flash, session, Response, stream_with_context
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
-from bs4 import BeautifulSoup
-from qbittorrentapi import Client
-from transmission_rpc import Client as transmissionrpc
-from deluge_web_client import DelugeWebClient as delugewebclient
 from dotenv import load_dotenv
 from urllib.parse import urlparse
 import json
+
+# Load environment variables before the local modules, which read their settings at import time
+load_dotenv()
+
 try:
     # Try importing as a package (when running from parent directory)
-    from app.auth_db import init_auth_db, authenticate_user, create_user, get_user_by_username, is_admin_user, get_all_users
+    from app.auth_db import init_auth_db, authenticate_user, create_user, get_user_by_username, is_admin_user, get_all_users, user_cache, USER_CACHE_TTL
 except ModuleNotFoundError:
     # Import as local module (when running from app directory)
-    from auth_db import init_auth_db, authenticate_user, create_user, get_user_by_username, is_admin_user, get_all_users
+    from auth_db import init_auth_db, authenticate_user, create_user, get_user_by_username, is_admin_user, get_all_users, user_cache, USER_CACHE_TTL
+try:
+    from app.metadata import (
+        clean_title, extract_author, extract_language, extract_format, extract_bitrate,
+        extract_upload_date, extract_uploader, extract_duration, extract_keywords, extract_publisher,
+        extract_isbn, extract_asin, check_explicit_content, check_abridged, extract_comments,
+        extract_torrent_files, extract_creation_date
+    )
+    from app.scraper import parse_book_list, make_soup, canonical_book_url
+    from app.fetcher import fetcher, MirrorResolver
+    from app.cache import TTLCache, RefreshingCache
+    from app.homepage import HomepageSnapshot
+    from app.download_client import create_backend, is_connection_error
+    from app.torrent_state import TorrentState
+    from app.auto_stop import AutoStop, AUTO_STOP_LEASE_TTL
+    from app.send_queue import SendQueue, RetryableError
+    from app.db import connection, pool_stats
+except ModuleNotFoundError:
+    from metadata import (
+        clean_title, extract_author, extract_language, extract_format, extract_bitrate,
+        extract_upload_date, extract_uploader, extract_duration, extract_keywords, extract_publisher,
+        extract_isbn, extract_asin, check_explicit_content, check_abridged, extract_comments,
+        extract_torrent_files, extract_creation_date
+    )
+    from scraper import parse_book_list, make_soup, canonical_book_url
+    from fetcher import fetcher, MirrorResolver
+    from cache import TTLCache, RefreshingCache
+    from homepage import HomepageSnapshot
+    from download_client import create_backend, is_connection_error
+    from torrent_state import TorrentState
+    from auto_stop import AutoStop, AUTO_STOP_LEASE_TTL
+    from send_queue import SendQueue, RetryableError
+    from db import connection, pool_stats
 
 app = Flask(__name__)
 
@@ -44,13 +76,27 @@ login_manager.init_app(app)
 login_manager.login_view = 'login'
 login_manager.session_protection = "strong"  # Protect against session hijacking
 
-#Load environment variables
-load_dotenv()
-
 ABB_HOSTNAME = os.getenv("ABB_HOSTNAME", "audiobookbay.lu")
 
+# Remembers which scheme/base URL the mirror answers on
+abb_mirror = MirrorResolver(ABB_HOSTNAME)
+
 PAGE_LIMIT = int(os.getenv("PAGE_LIMIT", 5))
 
+# Seconds between keep-alive comments on the torrent event stream
+TORRENT_STREAM_KEEPALIVE = int(os.getenv("TORRENT_STREAM_KEEPALIVE", 15))
+
+# Parsed book pages (metadata, info hash, trackers) keyed by canonical URL
+BOOK_CACHE_TTL = int(os.getenv("BOOK_CACHE_TTL", 1800))
+BOOK_CACHE_SIZE = int(os.getenv("BOOK_CACHE_SIZE", 256))
+book_cache = TTLCache(BOOK_CACHE_TTL, BOOK_CACHE_SIZE)
+
+# Search result pages keyed by (normalized query, page); stale pages are served while refreshing
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", 300))
+SEARCH_CACHE_STALE = int(os.getenv("SEARCH_CACHE_STALE", 1800))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", 512))
+search_cache = RefreshingCache(SEARCH_CACHE_TTL, SEARCH_CACHE_SIZE, SEARCH_CACHE_STALE)
+
 DOWNLOAD_CLIENT = os.getenv("DOWNLOAD_CLIENT")
 DL_URL = os.getenv("DL_URL")
 if DL_URL:
@@ -72,6 +118,22 @@ DL_PASSWORD = os.getenv("DL_PASSWORD")
 DL_CATEGORY = os.getenv("DL_CATEGORY", "Audiobookbay-Audiobooks")
 SAVE_PATH_BASE = os.getenv("SAVE_PATH_BASE")
 
+# Download client backend, sharing one authenticated session across routes and background jobs
+download_client = create_backend(DOWNLOAD_CLIENT, host=DL_HOST, port=DL_PORT, scheme=DL_SCHEME,
+                                 username=DL_USERNAME, password=DL_PASSWORD, url=DL_URL)
+
+# Torrents in DL_CATEGORY, polled once in the background for every status reader
+torrent_state = TorrentState(download_client, category=DL_CATEGORY) if download_client else None
+# Identifies this process when several share the app database
+PROCESS_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+# Auto-stop for torrents in DL_CATEGORY; the policy lives in the app database and one process holds the lease
+auto_stop = AutoStop(
+    torrent_state, download_client, category=DL_CATEGORY,
+    load_policy=lambda: get_app_setting('auto_stop'),
+    acquire_lease=lambda: acquire_service_lease('auto_stop', PROCESS_ID, AUTO_STOP_LEASE_TTL)
+) if torrent_state else None
+
 # Custom Nav Link Variables
 NAV_LINK_NAME = os.getenv("NAV_LINK_NAME")
 NAV_LINK_URL = os.getenv("NAV_LINK_URL")
@@ -90,12 +152,13 @@ class User(UserMixin):
     def is_admin(self):
         return self.user_type == 'root'
 
-# Global variable for app database path
+# Global variables for app database path and whether its tables have been checked this run
 app_db_path = None
+app_db_ready = False
 
 def get_app_database():
     """Get or create clean application database for favorites/downloads"""
-    global app_db_path
+    global app_db_path, app_db_ready
 
     import os
     import subprocess
@@ -104,9 +167,10 @@ def get_app_database():
         # Store app database in the app directory
         app_db_path = os.path.join(os.path.dirname(__file__), 'app_data.sqlite')
     
-    # Create app database with custom tables if it doesn't exist
-    if not os.path.exists(app_db_path):
-        logger.info("Creating application database for favorites and downloads...")
+    # Create missing tables once per run, so existing databases pick up new ones
+    if not app_db_ready:
+        if not os.path.exists(app_db_path):
+            logger.info("Creating application database for favorites and downloads...")
         
         create_app_tables = """
         CREATE TABLE IF NOT EXISTS user_favorites (
@@ -130,47 +194,113 @@ def get_app_database():
             UNIQUE(user_id, torrent_hash, book_url)
         );
         
+        CREATE TABLE IF NOT EXISTS app_settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        
+        CREATE TABLE IF NOT EXISTS service_leases (
+            name TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        );
+        
+        CREATE TABLE IF NOT EXISTS search_history (
+            user_id TEXT NOT NULL,
+            query TEXT NOT NULL,
+            query_key TEXT NOT NULL,
+            ts REAL NOT NULL,
+            PRIMARY KEY (user_id, query_key)
+        );
+        
         CREATE INDEX IF NOT EXISTS idx_user_favorites_user ON user_favorites(user_id);
         CREATE INDEX IF NOT EXISTS idx_user_downloads_user ON user_downloads(user_id);
+        CREATE INDEX IF NOT EXISTS idx_search_history_user_ts ON search_history(user_id, ts);
         """
         
         try:
-            # Use Python sqlite3 module instead of subprocess
-            conn = sqlite3.connect(app_db_path)
-            cursor = conn.cursor()
-            cursor.executescript(create_app_tables)
-            conn.commit()
-            conn.close()
+            with connection(app_db_path) as conn:
+                cursor = conn.cursor()
+                cursor.executescript(create_app_tables)
 
-            logger.info("Application database created successfully")
+            app_db_ready = True
+            logger.info("Application database ready")
+            migrate_search_history_files(app_db_path)
         except Exception as e:
             logger.error(f"Failed to create application database: {e}")
             return None
     
     return app_db_path
 
-# User-specific data management
+# Searches kept per user
+SEARCH_HISTORY_LIMIT = 50
+
+# Where search history used to be kept as JSON, per user and (older still) in one global file
 USER_DATA_DIR = 'user_data'
+LEGACY_SEARCH_HISTORY_FILE = 'search_history.json'
 
-def get_user_data_path(username, data_type):
-    """Get user-specific data file path"""
-    if not os.path.exists(USER_DATA_DIR):
-        os.makedirs(USER_DATA_DIR)
-    return os.path.join(USER_DATA_DIR, f'{username}_{data_type}.json')
-
-def load_user_search_history(username):
-    """Load search history for specific user"""
-    file_path = get_user_data_path(username, 'search_history')
-    if os.path.exists(file_path):
-        with open(file_path, 'r') as f:
-            return json.load(f)
-    return []
+# Insert a search, or move an existing one (matched case-insensitively) to the top
+UPSERT_SEARCH_SQL = (
+    "INSERT INTO search_history (user_id, query, query_key, ts) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(user_id, query_key) DO UPDATE SET query = excluded.query, ts = excluded.ts "
+    "WHERE excluded.ts >= search_history.ts"
+)
+
+# Drop a user's searches past the newest SEARCH_HISTORY_LIMIT
+TRIM_SEARCH_SQL = (
+    "DELETE FROM search_history WHERE user_id = ? AND query_key NOT IN ("
+    "SELECT query_key FROM search_history WHERE user_id = ? ORDER BY ts DESC LIMIT ?)"
+)
+
+def migrate_search_history_files(app_db):
+    """Move search history from the legacy JSON files into the search_history table, once"""
+    sources = []
+    if os.path.isdir(USER_DATA_DIR):
+        for name in os.listdir(USER_DATA_DIR):
+            if name.endswith('_search_history.json'):
+                sources.append((os.path.join(USER_DATA_DIR, name), name[:-len('_search_history.json')]))
+    if os.path.exists(LEGACY_SEARCH_HISTORY_FILE):
+        sources.append((LEGACY_SEARCH_HISTORY_FILE, None))
+
+    for path, username in sources:
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            # Per-user files hold a list; the global file maps usernames to lists
+            histories = {username: data} if username else data
+            with connection(app_db) as conn:
+                cursor = conn.cursor()
+                for user_id, history in histories.items():
+                    cursor.executemany(UPSERT_SEARCH_SQL, [
+                        (user_id, item['query'], item['query'].lower(), item.get('timestamp', 0))
+                        for item in history if item.get('query')
+                    ])
+                    cursor.execute(TRIM_SEARCH_SQL, (user_id, user_id, SEARCH_HISTORY_LIMIT))
+            os.replace(path, path + '.migrated')
+            logger.info(f"Migrated search history from {path}")
+        except Exception as e:
+            logger.error(f"Failed to migrate search history from {path}: {e}")
 
-def save_user_search_history(username, history):
-    """Save search history for specific user"""
-    file_path = get_user_data_path(username, 'search_history')
-    with open(file_path, 'w') as f:
-        json.dump(history, f)
+def load_user_search_history(username, limit=SEARCH_HISTORY_LIMIT):
+    """Load a user's most recent searches, newest first"""
+    try:
+        app_db = get_app_database()
+        if not app_db:
+            logger.error("Could not access application database")
+            return []
+
+        with connection(app_db) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT query, ts FROM search_history WHERE user_id = ? ORDER BY ts DESC LIMIT ?",
+                (username, limit)
+            )
+            rows = cursor.fetchall()
+        return [{'query': query, 'timestamp': int(ts)} for query, ts in rows]
+    except Exception as e:
+        logger.error(f"Failed to load search history: {e}")
+        return []
 
 def load_user_favorites(username):
     """Load favorites for specific user from clean app database"""
@@ -180,16 +310,14 @@ def load_user_favorites(username):
             logger.error("Could not access application database")
             return []
             
-        # Use Python sqlite3 module instead of subprocess
-        conn = sqlite3.connect(app_db)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT book_title, book_url, book_cover, book_author FROM user_favorites WHERE user_id = ? ORDER BY created_at DESC",
-            (username,)
-        )
-        rows = cursor.fetchall()
-        conn.close()
+        with connection(app_db) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT book_title, book_url, book_cover, book_author FROM user_favorites WHERE user_id = ? ORDER BY created_at DESC",
+                (username,)
+            )
+            rows = cursor.fetchall()
 
         if rows:
             db_favorites = [dict(row) for row in rows]
@@ -216,6 +344,50 @@ def load_user_favorites(username):
         logger.error(f"Failed to load user favorites: {e}")
         return []
 
+def is_user_favorite(username, book_url):
+    """Check one book against a user's favorites using the (user_id, book_url) unique index"""
+    try:
+        app_db = get_app_database()
+        if not app_db:
+            logger.error("Could not access application database")
+            return False
+
+        with connection(app_db) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT 1 FROM user_favorites WHERE user_id = ? AND book_url = ? LIMIT 1",
+                (username, book_url)
+            )
+            return cursor.fetchone() is not None
+    except Exception as e:
+        logger.error(f"Failed to check favorite: {e}")
+        return False
+
+def get_favorited_urls(username, book_urls):
+    """Get which of the given book URLs a user has favorited"""
+    try:
+        app_db = get_app_database()
+        if not app_db:
+            logger.error("Could not access application database")
+            return set()
+
+        book_urls = list(dict.fromkeys(book_urls))
+        favorited = set()
+        with connection(app_db) as conn:
+            cursor = conn.cursor()
+            # Stay under SQLite's bound parameter limit
+            for start in range(0, len(book_urls), 500):
+                chunk = book_urls[start:start + 500]
+                cursor.execute(
+                    f"SELECT book_url FROM user_favorites WHERE user_id = ? AND book_url IN ({', '.join('?' * len(chunk))})",
+                    (username, *chunk)
+                )
+                favorited.update(row[0] for row in cursor.fetchall())
+        return favorited
+    except Exception as e:
+        logger.error(f"Failed to check favorites: {e}")
+        return set()
+
 def save_user_favorites(username, favorites):
     """Deprecated - use add_user_favorite and remove_user_favorite instead"""
     pass
@@ -228,15 +400,12 @@ def add_user_favorite(username, book_title, book_url, book_cover="", book_author
             logger.error("Could not access application database")
             return False
             
-        # Use Python sqlite3 module instead of subprocess
-        conn = sqlite3.connect(app_db)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT OR IGNORE INTO user_favorites (user_id, book_title, book_url, book_cover, book_author) VALUES (?, ?, ?, ?, ?)",
-            (username, book_title, book_url, book_cover, book_author)
-        )
-        conn.commit()
-        conn.close()
+        with connection(app_db) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT OR IGNORE INTO user_favorites (user_id, book_title, book_url, book_cover, book_author) VALUES (?, ?, ?, ?, ?)",
+                (username, book_title, book_url, book_cover, book_author)
+            )
         return True
     except Exception as e:
         logger.error(f"Failed to add favorite: {e}")
@@ -250,43 +419,74 @@ def remove_user_favorite(username, book_url):
             logger.error("Could not access application database")
             return False
             
-        # Use Python sqlite3 module instead of subprocess
-        conn = sqlite3.connect(app_db)
-        cursor = conn.cursor()
-        cursor.execute(
-            "DELETE FROM user_favorites WHERE user_id = ? AND book_url = ?",
-            (username, book_url)
-        )
-        conn.commit()
-        conn.close()
+        with connection(app_db) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM user_favorites WHERE user_id = ? AND book_url = ?",
+                (username, book_url)
+            )
         return True
     except Exception as e:
         logger.error(f"Failed to remove favorite: {e}")
         return False
 
-def get_all_user_downloads():
-    """Get download summary for all users from clean app database"""
+# Favorites, downloads and latest activity per user, from one grouped query over the app tables
+USER_ACTIVITY_SQL = """
+    SELECT user_id, SUM(favorites), SUM(downloads), MAX(last_at) FROM (
+        SELECT user_id, COUNT(*) AS favorites, 0 AS downloads, MAX(created_at) AS last_at
+        FROM user_favorites GROUP BY user_id
+        UNION ALL
+        SELECT user_id, 0, COUNT(*), MAX(created_at) FROM user_downloads GROUP BY user_id
+        UNION ALL
+        SELECT user_id, 0, 0, datetime(MAX(ts), 'unixepoch') FROM search_history GROUP BY user_id
+    ) GROUP BY user_id
+"""
+
+def get_user_activity_counts():
+    """Get favorite and download counts and the last activity time for every user, or None on error"""
     try:
         app_db = get_app_database()
         if not app_db:
             logger.error("Could not access application database")
-            return {}
-            
-        # Use Python sqlite3 module instead of subprocess
-        conn = sqlite3.connect(app_db)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT user_id, COUNT(*) as download_count FROM user_downloads GROUP BY user_id")
-        rows = cursor.fetchall()
-        conn.close()
+            return None
 
-        if rows:
-            data = [dict(row) for row in rows]
-            return {item['user_id']: item['download_count'] for item in data}
-        return {}
+        with connection(app_db) as conn:
+            cursor = conn.cursor()
+            cursor.execute(USER_ACTIVITY_SQL)
+            rows = cursor.fetchall()
+        return {
+            user_id: {'favorites_count': favorites, 'download_count': downloads, 'last_activity': last_at}
+            for user_id, favorites, downloads, last_at in rows
+        }
     except Exception as e:
-        logger.error(f"Failed to get all user downloads: {e}")
-        return {}
+        logger.error(f"Failed to get user activity counts: {e}")
+        return None
+
+# Seconds the admin dashboard's per-user statistics are reused
+ADMIN_STATS_TTL = int(os.getenv("ADMIN_STATS_TTL", 30))
+admin_stats_cache = TTLCache(ttl=ADMIN_STATS_TTL, maxsize=1)
+
+def get_admin_user_stats():
+    """
+    Get every user with their favorite and download counts and last activity
+
+    Two queries in total (users.db and the app database) however many users
+    there are, cached for ADMIN_STATS_TTL seconds unless the activity query fails.
+    """
+    users = admin_stats_cache.get('users')
+    if users is None:
+        activity = get_user_activity_counts()
+        users = get_all_users()
+        for user in users:
+            counts = (activity or {}).get(user['username'], {})
+            user['download_count'] = counts.get('download_count', 0)
+            user['favorites_count'] = counts.get('favorites_count', 0)
+            # Timestamps share SQLite's 'YYYY-MM-DD HH:MM:SS' format, so they compare as strings
+            user['last_activity'] = max(filter(None, [counts.get('last_activity'), user.get('lastSeen')]), default=None)
+        # Show zero counts for this request if the query failed, but do not cache them
+        if activity is not None:
+            admin_stats_cache.set('users', users)
+    return [dict(user) for user in users]
 
 def get_detailed_user_downloads():
     """Get detailed download history for all users from clean app database (admin only)"""
@@ -296,13 +496,11 @@ def get_detailed_user_downloads():
             logger.error("Could not access application database")
             return []
             
-        # Use Python sqlite3 module instead of subprocess
-        conn = sqlite3.connect(app_db)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT user_id, torrent_hash, book_title, book_url, created_at FROM user_downloads ORDER BY created_at DESC")
-        rows = cursor.fetchall()
-        conn.close()
+        with connection(app_db) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute("SELECT user_id, torrent_hash, book_title, book_url, created_at FROM user_downloads ORDER BY created_at DESC")
+            rows = cursor.fetchall()
 
         if rows:
             return [dict(row) for row in rows]
@@ -319,16 +517,14 @@ def load_user_downloads(username):
             logger.error("Could not access application database")
             return []
             
-        # Use Python sqlite3 module instead of subprocess
-        conn = sqlite3.connect(app_db)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT torrent_hash, book_title, book_url, created_at FROM user_downloads WHERE user_id = ? ORDER BY created_at DESC",
-            (username,)
-        )
-        rows = cursor.fetchall()
-        conn.close()
+        with connection(app_db) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT torrent_hash, book_title, book_url, created_at FROM user_downloads WHERE user_id = ? ORDER BY created_at DESC",
+                (username,)
+            )
+            rows = cursor.fetchall()
 
         if rows:
             downloads = [dict(row) for row in rows]
@@ -339,6 +535,20 @@ def load_user_downloads(username):
         logger.error(f"Failed to load user downloads: {e}")
         return []
 
+# Per-user torrent hash sets, loaded once and extended by add_user_download
+user_torrent_hashes = {}
+user_torrent_hashes_lock = threading.Lock()
+
+def get_user_torrent_hashes(username):
+    """Get the set of torrent hashes a user has downloaded"""
+    with user_torrent_hashes_lock:
+        hashes = user_torrent_hashes.get(username)
+    if hashes is None:
+        hashes = frozenset(download['hash'].lower() for download in load_user_downloads(username))
+        with user_torrent_hashes_lock:
+            hashes = user_torrent_hashes.setdefault(username, hashes)
+    return hashes
+
 def save_user_downloads(username, downloads):
     """Deprecated - use add_user_download instead"""
     pass
@@ -351,32 +561,92 @@ def add_user_download(username, torrent_hash, book_title, download_url):
             logger.error("Could not access application database")
             return False
 
-        # Use Python sqlite3 module instead of subprocess
-        conn = sqlite3.connect(app_db)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT OR IGNORE INTO user_downloads (user_id, torrent_hash, book_title, book_url) VALUES (?, ?, ?, ?)",
-            (username, torrent_hash, book_title, download_url)
-        )
-        conn.commit()
-        conn.close()
+        with connection(app_db) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT OR IGNORE INTO user_downloads (user_id, torrent_hash, book_title, book_url) VALUES (?, ?, ?, ?)",
+                (username, torrent_hash, book_title, download_url)
+            )
+
+        # Swap in a new set so readers iterating the old one are unaffected
+        with user_torrent_hashes_lock:
+            hashes = user_torrent_hashes.get(username)
+            if hashes is not None:
+                user_torrent_hashes[username] = hashes | {torrent_hash.lower()}
         return True
     except Exception as e:
         logger.error(f"Failed to add download: {e}")
         return False
 
-# Legacy functions for backward compatibility (will migrate existing data)
-def load_search_history():
-    """Legacy function - migrate to user-specific storage"""
-    if os.path.exists('search_history.json'):
-        with open('search_history.json', 'r') as f:
-            return json.load(f)
-    return {}
+def get_app_setting(key, default=None):
+    """Get a JSON setting shared by every app process from the app database"""
+    try:
+        app_db = get_app_database()
+        if not app_db:
+            logger.error("Could not access application database")
+            return default
 
-def save_search_history(history):
-    """Legacy function - will be removed after migration"""
-    pass  # No longer save to global file
+        with connection(app_db) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT value FROM app_settings WHERE key = ?", (key,))
+            row = cursor.fetchone()
+        return json.loads(row[0]) if row else default
+    except Exception as e:
+        logger.error(f"Failed to load setting {key}: {e}")
+        return default
+
+def set_app_setting(key, value):
+    """Store a JSON setting in the app database"""
+    try:
+        app_db = get_app_database()
+        if not app_db:
+            logger.error("Could not access application database")
+            return False
 
+        with connection(app_db) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO app_settings (key, value, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                (key, json.dumps(value))
+            )
+        return True
+    except Exception as e:
+        logger.error(f"Failed to save setting {key}: {e}")
+        return False
+
+def acquire_service_lease(name, owner, ttl):
+    """
+    Take or renew a named lease in the app database
+
+    Only one owner holds a lease at a time; it passes to another owner once
+    the holder stops renewing it for ttl seconds.
+
+    Returns:
+        bool: True if owner holds the lease
+    """
+    try:
+        app_db = get_app_database()
+        if not app_db:
+            logger.error("Could not access application database")
+            return False
+
+        now = time.time()
+        with connection(app_db) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO service_leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE service_leases.owner = excluded.owner OR service_leases.expires_at < ?",
+                (name, owner, now + ttl, now)
+            )
+            acquired = cursor.rowcount == 1
+        return acquired
+    except Exception as e:
+        logger.error(f"Failed to acquire lease {name}: {e}")
+        return False
+
+# Legacy functions for backward compatibility (will migrate existing data)
 def load_favorites():
     """Legacy function - migrate to user-specific storage"""
     if os.path.exists('favorites.json'):
@@ -391,29 +661,52 @@ def save_favorites(favorites):
 def add_to_search_history(username, query):
     if not query or len(query.strip()) == 0:
         return
-    
-    history = load_user_search_history(username)
-    
-    # Remove query if it already exists
-    history = [h for h in history if h.get('query', '').lower() != query.lower()]
-    
-    # Add to beginning of list
-    history.insert(0, {
-        'query': query,
-        'timestamp': int(time.time())
-    })
-    
-    # Keep only last 50 searches
-    history = history[:50]
-    save_user_search_history(username, history)
+
+    try:
+        app_db = get_app_database()
+        if not app_db:
+            logger.error("Could not access application database")
+            return
+
+        # Upsert and trim in one transaction, so concurrent searches cannot lose entries
+        with connection(app_db) as conn:
+            cursor = conn.cursor()
+            cursor.execute(UPSERT_SEARCH_SQL, (username, query, query.lower(), time.time()))
+            cursor.execute(TRIM_SEARCH_SQL, (username, username, SEARCH_HISTORY_LIMIT))
+    except Exception as e:
+        logger.error(f"Failed to add search history: {e}")
+
+# Requests whose user came from the session without a users.db lookup
+session_user_hits = 0
 
 @login_manager.user_loader
 def load_user(user_id):
+    global session_user_hits
+
+    # The session carries the user type; confirm the user still exists once per USER_CACHE_TTL
+    if session.get('user_type') and time.time() - session.get('user_checked_at', 0) < USER_CACHE_TTL:
+        session_user_hits += 1
+        return User(user_id, session['user_type'])
+
     user_data = get_user_by_username(user_id)
     if user_data:
+        remember_user_type(user_data['type'])
         return User(user_data['username'], user_data['type'])
     return None
 
+def remember_user_type(user_type):
+    """Store the user type in the session so the user loader can skip users.db"""
+    session['user_type'] = user_type
+    session['user_checked_at'] = time.time()
+
+def user_cache_stats():
+    """Hit counts for the session and in-process user lookups"""
+    stats = user_cache.stats()
+    stats['session_hits'] = session_user_hits
+    loads = session_user_hits + stats['hits'] + stats['misses']
+    stats['hit_rate'] = round((session_user_hits + stats['hits']) / loads, 3) if loads else None
+    return stats
+
 # Log configuration
 logger.info(f"ABB_HOSTNAME: {ABB_HOSTNAME}")
 logger.info(f"DOWNLOAD_CLIENT: {DOWNLOAD_CLIENT}")
@@ -437,131 +730,27 @@ def inject_nav_link():
 
 
 
-# Helper function to search AudiobookBay with pagination support
+# Helper function to search AudiobookBay with pagination support, served from the result cache
 def search_audiobookbay(query, page_num=1):
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36'
-    }
+    query = normalize_search_query(query)
+    return search_cache.get_or_load((query, page_num), lambda: fetch_search_page(query, page_num))
+
+# Helper function to normalise a search query for cache keys and upstream URLs
+def normalize_search_query(query):
+    return ' '.join(query.lower().split())
+
+# Helper function to fetch one search result page from the mirror
+def fetch_search_page(query, page_num=1):
     results = []
-    url = f"https://{ABB_HOSTNAME}/page/{page_num}/?s={query.replace(' ', '+')}&cat=undefined%2Cundefined"
+    path = f"/page/{page_num}/?s={query.replace(' ', '+')}&cat=undefined%2Cundefined"
     
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code != 200:
-            logger.error(f"Failed to fetch page {page_num}. Status Code: {response.status_code}")
+        response = abb_mirror.get([path])
+        if not response or response.status_code != 200:
+            logger.error(f"Failed to fetch page {page_num}. Status Code: {response.status_code if response else 'None'}")
             return results
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-        results = []
-        
-        # Extract posts from search results - use same approach as homepage
-        post_selectors = ['.post', 'article.post', '.entry', '.postContent']
-        posts = []
-        
-        for selector in post_selectors:
-            all_posts = soup.select(selector)[:18]  # Limit to first 18 posts
-            if all_posts:
-                # Filter out hidden posts with display:none (SAME AS HOMEPAGE)
-                posts = [p for p in all_posts if 'display:none' not in str(p)]
-                logger.info(f"Found {len(all_posts)} posts, {len(posts)} visible using selector '{selector}' on page {page_num}")
-                break
-        
-        if not posts:
-            logger.warning(f"No posts found with any selector on search page {page_num}")
-            return []
-
-        for post in posts:
-            try:
-                # Try multiple title selectors (EXACT SAME AS HOMEPAGE)
-                title_selectors = [
-                    '.postTitle > h2 > a',
-                    '.postTitle a', 
-                    'h2 a',
-                    'h3 a',
-                    '.entry-title a',
-                    'a[rel="bookmark"]'
-                ]
-                
-                title_element = None
-                for title_sel in title_selectors:
-                    title_element = post.select_one(title_sel)
-                    if title_element:
-                        break
-                
-                if not title_element:
-                    continue
-                    
-                title = title_element.text.strip()
-                href = title_element.get('href', '')
-                
-                # Handle relative and absolute URLs (EXACT SAME AS HOMEPAGE)
-                if href.startswith('http'):
-                    link = href
-                elif href.startswith('/'):
-                    link = f"http://{ABB_HOSTNAME}{href}"
-                else:
-                    link = f"http://{ABB_HOSTNAME}/{href}"
-                
-                # Extract cover image with better selectors (EXACT SAME AS HOMEPAGE)
-                cover_selectors = [
-                    'img[src*="cover"]',
-                    'img[alt*="cover"]', 
-                    '.postContent img',
-                    'img'
-                ]
-                
-                cover = "/static/images/default_cover.jpg"
-                for cover_sel in cover_selectors:
-                    cover_element = post.select_one(cover_sel)
-                    if cover_element and cover_element.get('src'):
-                        cover_src = cover_element['src']
-                        if cover_src.startswith('//'):
-                            cover = 'http:' + cover_src
-                        elif cover_src.startswith('/'):
-                            cover = f"http://{ABB_HOSTNAME}{cover_src}"
-                        elif cover_src.startswith('http'):
-                            cover = cover_src
-                        else:
-                            cover = f"http://{ABB_HOSTNAME}/{cover_src}"
-                        break
-                
-                # Extract comprehensive metadata using new helper functions (EXACT SAME AS HOMEPAGE)
-                meta_info = post.select_one('.postContent, .entry-content, .post-content')
-                meta_text = meta_info.get_text() if meta_info else ""
-                
-                # Extract file size (keep existing pattern for compatibility)
-                file_size = ""
-                size_match = re.search(r'(\d+(?:\.\d+)?)\s*(MB|GB)', meta_text, re.IGNORECASE)
-                if size_match:
-                    file_size = f"{size_match.group(1)} {size_match.group(2).upper()}"
-                
-                # Use new extraction functions for comprehensive metadata (EXACT SAME AS HOMEPAGE)
-                book_data = {
-                    'title': clean_title(title),
-                    'link': link,
-                    'cover': cover,
-                    'author': extract_author(meta_text, title),
-                    'category': extract_category(post, meta_text),
-                    'keywords': extract_keywords(meta_text),
-                    'language': extract_language(meta_text),
-                    'file_format': extract_format(meta_text),
-                    'bitrate': extract_bitrate(meta_text),
-                    'file_size': file_size,
-                    'upload_date': extract_upload_date(post),
-                    'duration': extract_duration(meta_text),
-                    'publisher': extract_publisher(meta_text),
-                    'isbn': extract_isbn(meta_text),
-                    'asin': extract_asin(meta_text),
-                    'explicit': check_explicit_content(meta_text),
-                    'abridged': check_abridged(meta_text),
-                    'posted_date': extract_upload_date(post)
-                }
-
-                results.append(book_data)
-            except Exception as e:
-                logger.error(f"Skipping post due to error: {e}")
-                continue
-                
+        results = parse_book_list(response.text, ABB_HOSTNAME, context=f"on search page {page_num}")
         logger.info(f"Found {len(results)} results on page {page_num}")
         return results
         
@@ -571,343 +760,85 @@ def search_audiobookbay(query, page_num=1):
 
 # Helper function to scrape AudiobookBay homepage
 def scrape_homepage():
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36'
-    }
     try:
-        # Try different URL schemes - audiobookbay.lu might redirect
-        urls_to_try = [
-            f"http://{ABB_HOSTNAME}",
-            f"https://{ABB_HOSTNAME}",
-        ]
-        
-        response = None
-        for url in urls_to_try:
-            try:
-                response = requests.get(url, headers=headers, timeout=10, allow_redirects=True)
-                if response.status_code == 200:
-                    logger.info(f"Successfully connected to {url}")
-                    break
-            except Exception as e:
-                logger.info(f"Failed to connect to {url}: {e}")
-                continue
+        # The mirror may redirect between schemes - reuse the base URL it last answered on
+        response = abb_mirror.get()
         
         if not response or response.status_code != 200:
             logger.error(f"Failed to fetch homepage from any URL. Last status: {response.status_code if response else 'None'}")
             return []
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-        results = []
-        
-        # Extract posts from homepage - try multiple selectors
-        post_selectors = ['.post', 'article.post', '.entry', '.postContent']
-        posts = []
-        
-        for selector in post_selectors:
-            all_posts = soup.select(selector)[:18]  # Limit to first 18 posts
-            if all_posts:
-                # Filter out hidden posts with display:none
-                posts = [p for p in all_posts if 'display:none' not in str(p)]
-                logger.info(f"Found {len(all_posts)} posts, {len(posts)} visible using selector '{selector}'")
-                break
-        
-        if not posts:
-            logger.warning("No posts found with any selector")
-            return []
-        
-        for post in posts:
-            try:
-                # Try multiple title selectors
-                title_selectors = [
-                    '.postTitle > h2 > a',
-                    '.postTitle a', 
-                    'h2 a',
-                    'h3 a',
-                    '.entry-title a',
-                    'a[rel="bookmark"]'
-                ]
-                
-                title_element = None
-                for title_sel in title_selectors:
-                    title_element = post.select_one(title_sel)
-                    if title_element:
-                        break
-                
-                if not title_element:
-                    continue
-                    
-                title = title_element.text.strip()
-                href = title_element.get('href', '')
-                
-                # Handle relative and absolute URLs
-                if href.startswith('http'):
-                    link = href
-                elif href.startswith('/'):
-                    link = f"http://{ABB_HOSTNAME}{href}"
-                else:
-                    link = f"http://{ABB_HOSTNAME}/{href}"
-                
-                # Extract cover image with better selectors
-                cover_selectors = [
-                    'img[src*="cover"]',
-                    'img[alt*="cover"]', 
-                    '.postContent img',
-                    'img'
-                ]
-                
-                cover = "/static/images/default_cover.jpg"
-                for cover_sel in cover_selectors:
-                    cover_element = post.select_one(cover_sel)
-                    if cover_element and cover_element.get('src'):
-                        cover_src = cover_element['src']
-                        if cover_src.startswith('//'):
-                            cover = 'http:' + cover_src
-                        elif cover_src.startswith('/'):
-                            cover = f"http://{ABB_HOSTNAME}{cover_src}"
-                        elif cover_src.startswith('http'):
-                            cover = cover_src
-                        else:
-                            cover = f"http://{ABB_HOSTNAME}/{cover_src}"
-                        break
-                
-                # Extract comprehensive metadata using new helper functions
-                meta_info = post.select_one('.postContent, .entry-content, .post-content')
-                meta_text = meta_info.get_text() if meta_info else ""
-                
-                # Extract file size (keep existing pattern for compatibility)
-                file_size = ""
-                size_match = re.search(r'(\d+(?:\.\d+)?)\s*(MB|GB)', meta_text, re.IGNORECASE)
-                if size_match:
-                    file_size = f"{size_match.group(1)} {size_match.group(2).upper()}"
-                
-                # Use new extraction functions for comprehensive metadata
-                book_data = {
-                    'title': clean_title(title),
-                    'link': link,
-                    'cover': cover,
-                    'author': extract_author(meta_text, title),
-                    'category': extract_category(post, meta_text),
-                    'keywords': extract_keywords(meta_text),
-                    'language': extract_language(meta_text),
-                    'file_format': extract_format(meta_text),
-                    'bitrate': extract_bitrate(meta_text),
-                    'file_size': file_size,
-                    'upload_date': extract_upload_date(post),
-                    'duration': extract_duration(meta_text),
-                    'publisher': extract_publisher(meta_text),
-                    'isbn': extract_isbn(meta_text),
-                    'asin': extract_asin(meta_text),
-                    'explicit': check_explicit_content(meta_text),
-                    'abridged': check_abridged(meta_text),
-                    'posted_date': extract_upload_date(post)
-                }
-
-                results.append(book_data)
-            except Exception as e:
-                logger.error(f"Skipping post due to error: {e}")
-                continue
-                
-        return results
+        return parse_book_list(response.text, ABB_HOSTNAME)
     except Exception as e:
         logger.error(f"Failed to scrape homepage: {e}")
         return []
 
 # Helper function to scrape AudiobookBay homepage with pagination
 def scrape_homepage_with_pagination(page_num=1):
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36'
-    }
     try:
-        # Try different URL schemes - audiobookbay.lu might redirect
+        # The mirror may redirect between schemes - reuse the base URL it last answered on
         if page_num == 1:
-            urls_to_try = [
-                f"http://{ABB_HOSTNAME}",
-                f"https://{ABB_HOSTNAME}",
-            ]
+            paths = [""]
         else:
-            urls_to_try = [
-                f"http://{ABB_HOSTNAME}/page/{page_num}/",
-                f"https://{ABB_HOSTNAME}/page/{page_num}/",
-                f"http://{ABB_HOSTNAME}/page/{page_num}",
-                f"https://{ABB_HOSTNAME}/page/{page_num}",
-            ]
+            paths = [f"/page/{page_num}/", f"/page/{page_num}"]
         
-        response = None
-        for url in urls_to_try:
-            try:
-                response = requests.get(url, headers=headers, timeout=10, allow_redirects=True)
-                if response.status_code == 200:
-                    logger.info(f"Successfully connected to {url}")
-                    break
-            except Exception as e:
-                logger.info(f"Failed to connect to {url}: {e}")
-                continue
+        response = abb_mirror.get(paths)
         
         if not response or response.status_code != 200:
             logger.error(f"Failed to fetch homepage page {page_num} from any URL. Last status: {response.status_code if response else 'None'}")
             return []
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-        results = []
-        
-        # Extract posts from homepage - try multiple selectors
-        post_selectors = ['.post', 'article.post', '.entry', '.postContent']
-        posts = []
-        
-        for selector in post_selectors:
-            all_posts = soup.select(selector)[:18]  # Limit to first 18 posts
-            if all_posts:
-                # Filter out hidden posts with display:none (SAME AS HOMEPAGE)
-                posts = [p for p in all_posts if 'display:none' not in str(p)]
-                logger.info(f"Found {len(all_posts)} posts, {len(posts)} visible using selector '{selector}' on page {page_num}")
-                break
-        
-        if not posts:
-            logger.warning(f"No posts found with any selector on page {page_num}")
-            return []
-        
-        for post in posts:
-            try:
-                # Try multiple title selectors (EXACT SAME AS HOMEPAGE)
-                title_selectors = [
-                    '.postTitle > h2 > a',
-                    '.postTitle a', 
-                    'h2 a',
-                    'h3 a',
-                    '.entry-title a',
-                    'a[rel="bookmark"]'
-                ]
-                
-                title_element = None
-                for title_sel in title_selectors:
-                    title_element = post.select_one(title_sel)
-                    if title_element:
-                        break
-                
-                if not title_element:
-                    continue
-                    
-                title = title_element.text.strip()
-                href = title_element.get('href', '')
-                
-                # Handle relative and absolute URLs (EXACT SAME AS HOMEPAGE)
-                if href.startswith('http'):
-                    link = href
-                elif href.startswith('/'):
-                    link = f"http://{ABB_HOSTNAME}{href}"
-                else:
-                    link = f"http://{ABB_HOSTNAME}/{href}"
-                
-                # Extract cover image with better selectors (EXACT SAME AS HOMEPAGE)
-                cover_selectors = [
-                    'img[src*="cover"]',
-                    'img[alt*="cover"]', 
-                    '.postContent img',
-                    'img'
-                ]
-                
-                cover = "/static/images/default_cover.jpg"
-                for cover_sel in cover_selectors:
-                    cover_element = post.select_one(cover_sel)
-                    if cover_element and cover_element.get('src'):
-                        cover_src = cover_element['src']
-                        if cover_src.startswith('//'):
-                            cover = 'http:' + cover_src
-                        elif cover_src.startswith('/'):
-                            cover = f"http://{ABB_HOSTNAME}{cover_src}"
-                        elif cover_src.startswith('http'):
-                            cover = cover_src
-                        else:
-                            cover = f"http://{ABB_HOSTNAME}/{cover_src}"
-                        break
-                
-                # Extract comprehensive metadata using new helper functions (EXACT SAME AS HOMEPAGE)
-                meta_info = post.select_one('.postContent, .entry-content, .post-content')
-                meta_text = meta_info.get_text() if meta_info else ""
-                
-                # Extract file size (keep existing pattern for compatibility)
-                file_size = ""
-                size_match = re.search(r'(\d+(?:\.\d+)?)\s*(MB|GB)', meta_text, re.IGNORECASE)
-                if size_match:
-                    file_size = f"{size_match.group(1)} {size_match.group(2).upper()}"
-                
-                # Use new extraction functions for comprehensive metadata (EXACT SAME AS HOMEPAGE)
-                book_data = {
-                    'title': clean_title(title),
-                    'link': link,
-                    'cover': cover,
-                    'author': extract_author(meta_text, title),
-                    'category': extract_category(post, meta_text),
-                    'keywords': extract_keywords(meta_text),
-                    'language': extract_language(meta_text),
-                    'file_format': extract_format(meta_text),
-                    'bitrate': extract_bitrate(meta_text),
-                    'file_size': file_size,
-                    'upload_date': extract_upload_date(post),
-                    'duration': extract_duration(meta_text),
-                    'publisher': extract_publisher(meta_text),
-                    'isbn': extract_isbn(meta_text),
-                    'asin': extract_asin(meta_text),
-                    'explicit': check_explicit_content(meta_text),
-                    'abridged': check_abridged(meta_text),
-                    'posted_date': extract_upload_date(post)
-                }
-
-                results.append(book_data)
-            except Exception as e:
-                logger.error(f"Skipping post due to error on page {page_num}: {e}")
-                continue
-                
-        return results
+        return parse_book_list(response.text, ABB_HOSTNAME, context=f"on page {page_num}")
     except Exception as e:
         logger.error(f"Failed to scrape homepage page {page_num}: {e}")
         return []
 
+# Trackers used when a details page does not list any
+DEFAULT_TRACKERS = [
+    "udp://tracker.openbittorrent.com:80",
+    "udp://opentor.org:2710",
+    "udp://tracker.ccc.de:80",
+    "udp://tracker.blackunicorn.xyz:6969",
+    "udp://tracker.coppersurfer.tk:6969",
+    "udp://tracker.leechers-paradise.org:6969"
+]
+
+# Helper function to extract the info hash and trackers from a parsed details page
+def parse_magnet_info(soup):
+    """Return (info_hash, trackers), with info_hash None if the page has no Info Hash row"""
+    info_hash_row = soup.find('td', string=re.compile(r'Info Hash', re.IGNORECASE))
+    if not info_hash_row:
+        return None, []
+    info_hash = info_hash_row.find_next_sibling('td').text.strip()
+
+    tracker_rows = soup.find_all('td', string=re.compile(r'udp://|http://', re.IGNORECASE))
+    trackers = [row.text.strip() for row in tracker_rows]
+    return info_hash, trackers
+
+# Helper function to build a magnet link from an info hash and trackers
+def build_magnet_link(info_hash, trackers):
+    if not trackers:
+        logger.warning("No trackers found on the page. Using default trackers.")
+        trackers = DEFAULT_TRACKERS
+
+    trackers_query = "&".join(f"tr={requests.utils.quote(tracker)}" for tracker in trackers)
+    magnet_link = f"magnet:?xt=urn:btih:{info_hash}&{trackers_query}"
+
+    logger.debug(f"Generated Magnet Link: {magnet_link}")
+    return magnet_link
+
+# First homepage pages kept in memory and refreshed in the background
+homepage_snapshot = HomepageSnapshot(scrape_homepage_with_pagination)
+
 # Helper function to extract magnet link from details page
 def extract_magnet_link(details_url):
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36'
-    }
-    try:
-        response = requests.get(details_url, headers=headers)
-        if response.status_code != 200:
-            logger.error(f"Failed to fetch details page. Status Code: {response.status_code}")
-            return None
-
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Extract Info Hash
-        info_hash_row = soup.find('td', string=re.compile(r'Info Hash', re.IGNORECASE))
-        if not info_hash_row:
-            logger.error("Info Hash not found on the page.")
-            return None
-        info_hash = info_hash_row.find_next_sibling('td').text.strip()
-
-        # Extract Trackers
-        tracker_rows = soup.find_all('td', string=re.compile(r'udp://|http://', re.IGNORECASE))
-        trackers = [row.text.strip() for row in tracker_rows]
-
-        if not trackers:
-            logger.warning("No trackers found on the page. Using default trackers.")
-            trackers = [
-                "udp://tracker.openbittorrent.com:80",
-                "udp://opentor.org:2710",
-                "udp://tracker.ccc.de:80",
-                "udp://tracker.blackunicorn.xyz:6969",
-                "udp://tracker.coppersurfer.tk:6969",
-                "udp://tracker.leechers-paradise.org:6969"
-            ]
-
-        # Construct the magnet link
-        trackers_query = "&".join(f"tr={requests.utils.quote(tracker)}" for tracker in trackers)
-        magnet_link = f"magnet:?xt=urn:btih:{info_hash}&{trackers_query}"
-
-        logger.debug(f"Generated Magnet Link: {magnet_link}")
-        return magnet_link
-
-    except Exception as e:
-        logger.error(f"Failed to extract magnet link: {e}")
-        return None
+    """Build a book's magnet link; raises RetryableError if the page could not be loaded, ValueError if it has no info hash"""
+    record = get_book_record(details_url)
+    if not record:
+        raise RetryableError('Failed to fetch details page')
+    if not record['info_hash']:
+        raise ValueError('Info Hash not found on the page')
+    return build_magnet_link(record['info_hash'], record['trackers'])
 
 # Helper function to extract related books from AudiobookBay page
 def get_related_books_from_page(soup, book_url):
@@ -1012,19 +943,81 @@ def get_related_books_from_page(soup, book_url):
         logger.error(f"Failed to extract related books: {e}")
         return []
 
-# Helper function to extract book details from AudiobookBay page
-def get_book_details(book_url):
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36'
-    }
+# Helper function to fetch a book page once and extract everything the details view needs
+def get_book_page(book_url):
+    """
+    Fetch and parse a book page a single time
+
+    Args:
+        book_url: URL of the AudiobookBay details page
+
+    Returns:
+        dict: details, related_books, comments, torrent_files, info_hash and trackers,
+              or None if the page could not be loaded. details is None if the
+              page loaded but its content could not be parsed.
+    """
     try:
-        response = requests.get(book_url, headers=headers, timeout=15)
+        response = fetcher.get(book_url)
         if response.status_code != 200:
             logger.error(f"Failed to fetch book details. Status Code: {response.status_code}")
             return None
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
+        soup = make_soup(response.text)
+    except Exception as e:
+        logger.error(f"Failed to fetch book details: {e}")
+        return None
+
+    details = parse_book_details(soup, book_url)
+
+    try:
+        info_hash, trackers = parse_magnet_info(soup)
+    except Exception as e:
+        logger.error(f"Failed to extract info hash: {e}")
+        info_hash, trackers = None, []
+
+    return {
+        'details': details,
+        'related_books': get_related_books_from_page(soup, book_url),
+        'comments': details['comments'] if details else [],
+        'torrent_files': details['torrent_files'] if details else [],
+        'info_hash': info_hash,
+        'trackers': trackers
+    }
+
+# Helper function to get a book page record, fetching it only on a cache miss
+def get_book_record(book_url):
+    key = canonical_book_url(book_url)
+    record = book_cache.get(key)
+    if record is None:
+        record = get_book_page(book_url)
+        # A page without an info hash may be fixed upstream, so fetch it again next time
+        if record and record['info_hash']:
+            book_cache.set(key, record)
+    return record
+
+# Helper function to extract book details from AudiobookBay page
+def get_book_details(book_url):
+    record = get_book_record(book_url)
+    return record['details'] if record else None
+
+# Fields a favorites listing can fill in from an already cached book page
+CACHED_FAVORITE_FIELDS = ['author', 'category', 'language', 'file_format', 'bitrate', 'file_size', 'duration']
+
+# Helper function to fill favorite metadata from cached book pages without fetching
+def fill_favorites_from_cache(favorites):
+    for fav in favorites:
+        record = book_cache.get(canonical_book_url(fav['link'])) if fav.get('link') else None
+        details = record['details'] if record else None
+        if not details:
+            continue
+        for field in CACHED_FAVORITE_FIELDS:
+            if not fav.get(field) and details.get(field):
+                fav[field] = details[field]
+    return favorites
+
+# Helper function to extract book details from a parsed AudiobookBay page
+def parse_book_details(soup, book_url):
+    try:
         # Extract basic information - AudiobookBay uses h1.postTitle
         title_element = soup.select_one('h1.postTitle, .postTitle h1, .postTitle a, .post h1')
         title = title_element.get_text().strip() if title_element else "Unknown Title"
@@ -1161,579 +1154,72 @@ def get_book_details(book_url):
                 cat_text = link.get_text().strip()
                 if cat_text and cat_text not in categories:
                     categories.append(cat_text)
-            
-                
-            # Extract a meaningful description
-            # Look for paragraph breaks or description sections
-            description_patterns = [
-                r'Description[:\s]*\n([^\n]*(?:\n[^\n]*){0,5})',
-                r'Synopsis[:\s]*\n([^\n]*(?:\n[^\n]*){0,5})',
-                r'About[:\s]*\n([^\n]*(?:\n[^\n]*){0,5})'
-            ]
-            
-            for pattern in description_patterns:
-                desc_match = re.search(pattern, content_text, re.IGNORECASE)
-                if desc_match:
-                    description = desc_match.group(1).strip()
-                    break
-            
-            # If no description found, take first meaningful paragraph
-            if not description:
-                # Split by double newlines to get paragraphs
-                paragraphs = re.split(r'\n\s*\n', content_text)
-                for para in paragraphs:
-                    cleaned = para.strip()
-                    # Skip short lines, metadata lines, or lines with mostly special chars
-                    if (len(cleaned) > 50 and 
-                        not re.match(r'^(format|size|bitrate|duration|author|narrator)', cleaned, re.IGNORECASE) and
-                        len(re.sub(r'[^a-zA-Z\s]', '', cleaned)) > 30):
-                        description = cleaned  # Show full description without truncation
-                        break
-        
-        # Use enhanced extraction functions for additional metadata
-        enhanced_data = {
-            'title': clean_title(title),
-            'author': author or extract_author(content_text, title),
-            'narrator': narrator,
-            'cover': cover,
-            'description': description,
-            'duration': duration or extract_duration(content_text),
-            'file_format': file_format or extract_format(content_text),
-            'file_size': file_size,
-            'bitrate': bitrate or extract_bitrate(content_text),
-            'language': extract_language(content_text),
-            'upload_date': extract_upload_date(soup),
-            'creation_date': extract_creation_date(soup, content_text),
-            'categories': categories,
-            'category': ', '.join(categories) if categories else '',
-            'keywords': extract_keywords(content_text),
-            'publisher': extract_publisher(content_text),
-            'isbn': extract_isbn(content_text),
-            'asin': extract_asin(content_text),
-            'explicit': check_explicit_content(content_text),
-            'abridged': check_abridged(content_text),
-            'uploader': extract_uploader(soup),
-            'torrent_files': extract_torrent_files(soup, content_text),
-            'comments': extract_comments(soup),
-            'original_url': book_url
-        }
-        
-        return enhanced_data
-        
-    except Exception as e:
-        logger.error(f"Failed to extract book details: {e}")
-        return None
-
-# Helper function to sanitize titles
-def sanitize_title(title):
-    return re.sub(r'[<>:"/\\|?*]', '', title).strip()
-
-def clean_title(title):
-    """Extract just the title part from 'Title - Author' format"""
-    if " - " in title:
-        parts = title.split(" - ", 1)
-        if len(parts) == 2 and not re.search(r'\d', parts[1]) and len(parts[1]) < 50:
-            return parts[0].strip()  # Return the first part (title)
-    return title
-
-# Enhanced metadata extraction helper functions
-def extract_author(meta_text, title):
-    """Extract author with multiple patterns"""
-    # Check title first (Title - Author format)
-    if " - " in title:
-        parts = title.split(" - ", 1)
-        if len(parts) == 2 and not re.search(r'\d', parts[1]) and len(parts[1]) < 50:
-            return parts[1].strip()  # Return the second part (author)
-    
-    # Extract from content using various patterns
-    patterns = [
-        r'Author[:\s]+([^\n\r]+)',
-        r'by\s+([^\n\r,]+)',
-        r'Written by[:\s]+([^\n\r]+)',
-        r'Book by[:\s]+([^\n\r]+)',
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, meta_text, re.IGNORECASE)
-        if match:
-            author = match.group(1).strip()
-            # Clean up common suffixes
-            author = re.sub(r'\s*(,.*|\..*|\(.*)', '', author)
-            if len(author) > 2 and len(author) < 100:
-                return author
-    
-    return ""
-
-def extract_category(post, meta_text):
-    """Extract category from post or content"""
-    # Look for category links or tags in the post HTML
-    category_selectors = ['a[href*="/category/"]', '.category', '.tag', '.genre']
-    for selector in category_selectors:
-        category_elements = post.select(selector)
-        if category_elements:
-            return category_elements[0].get_text().strip()
-    
-    # Extract from meta text
-    category_patterns = [
-        r'Category[:\s]+([^\n\r]+)',
-        r'Genre[:\s]+([^\n\r]+)',
-        r'Section[:\s]+([^\n\r]+)'
-    ]
-    for pattern in category_patterns:
-        match = re.search(pattern, meta_text, re.IGNORECASE)
-        if match:
-            return match.group(1).strip()
-    return ""
-
-def extract_keywords(meta_text):
-    """Extract keywords/tags"""
-    keyword_patterns = [
-        r'Tags[:\s]+([^\n\r]+)',
-        r'Keywords[:\s]+([^\n\r]+)',
-        r'Genres?[:\s]+([^\n\r,]+)',
-        r'Subject[:\s]+([^\n\r]+)'
-    ]
-    for pattern in keyword_patterns:
-        match = re.search(pattern, meta_text, re.IGNORECASE)
-        if match:
-            keywords = match.group(1).strip()
-            # Clean up and limit length
-            keywords = re.sub(r'[,;]+', ', ', keywords)
-            return keywords[:200] if len(keywords) > 200 else keywords
-    return ""
-
-def extract_language(meta_text):
-    """Extract language information"""
-    languages = {
-        'english': 'English', 'spanish': 'Spanish', 'french': 'French', 
-        'german': 'German', 'italian': 'Italian', 'portuguese': 'Portuguese',
-        'russian': 'Russian', 'chinese': 'Chinese', 'japanese': 'Japanese',
-        'dutch': 'Dutch', 'swedish': 'Swedish', 'norwegian': 'Norwegian'
-    }
-    
-    # Look for explicit language mentions
-    language_pattern = r'Language[:\s]+([^\n\r]+)'
-    match = re.search(language_pattern, meta_text, re.IGNORECASE)
-    if match:
-        lang_text = match.group(1).strip().lower()
-        for key, value in languages.items():
-            if key in lang_text:
-                return value
-    
-    # Check for language keywords in text
-    for key, value in languages.items():
-        if key in meta_text.lower():
-            return value
-    
-    return "English"  # Default
-
-def extract_format(meta_text):
-    """Extract file format"""
-    format_patterns = [
-        r'Format[:\s]+([^\n\r\s,]+)',
-        r'File Format[:\s]+([^\n\r\s,]+)',
-        r'Audio Format[:\s]+([^\n\r\s,]+)',
-        r'\b(M4B|MP3|M4A|AAC|FLAC|WAV|OGG)\b'
-    ]
-    
-    for pattern in format_patterns:
-        match = re.search(pattern, meta_text, re.IGNORECASE)
-        if match:
-            format_str = match.group(1).upper().strip()
-            # Clean up common format variations
-            if format_str in ['M4B', 'MP3', 'M4A', 'AAC', 'FLAC', 'WAV', 'OGG']:
-                return format_str
-    
-    return "M4B"  # Default for audiobooks
-
-def extract_bitrate(meta_text):
-    """Extract bitrate information"""
-    bitrate_patterns = [
-        r'Bitrate[:\s]+(\d+)\s*kbps',
-        r'(\d+)\s*kbps',
-        r'(\d+)\s*Kbps',
-        r'Quality[:\s]+(\d+)\s*k'
-    ]
-    
-    for pattern in bitrate_patterns:
-        match = re.search(pattern, meta_text, re.IGNORECASE)
-        if match:
-            bitrate = match.group(1)
-            return f"{bitrate} kbps"
-    return ""
-
-def extract_upload_date(post):
-    """Extract upload date from post"""
-    date_selectors = [
-        '.date', '.posted', '.upload-date', 'time', '.post-date',
-        '.entry-date', '.published', '.created'
-    ]
-    
-    for selector in date_selectors:
-        date_element = post.select_one(selector)
-        if date_element:
-            date_text = date_element.get_text().strip()
-            if date_text and len(date_text) < 50:
-                return date_text
-    
-    # Try to extract from post attributes
-    time_element = post.select_one('[datetime]')
-    if time_element:
-        return time_element.get('datetime', '')[:10]  # Get date part only
-    
-    return ""
-
-def extract_uploader(post):
-    """Extract uploader username"""
-    # Look for actual uploader information, not book author
-    uploader_selectors = [
-        '.uploader', '.posted-by', '.user', '.username', '.sharer',
-        '.entry-uploader', '.post-uploader'
-    ]
-    
-    for selector in uploader_selectors:
-        uploader_element = post.select_one(selector)
-        if uploader_element:
-            uploader = uploader_element.get_text().strip()
-            # Clean up common prefixes
-            uploader = re.sub(r'^(by|posted by|uploaded by|shared by)[:\s]*', '', uploader, flags=re.IGNORECASE)
-            if uploader and len(uploader) < 50:
-                return uploader
-    
-    # Look for "Shared by" or "Posted by" patterns in text
-    full_text = post.get_text()
-    uploader_patterns = [
-        r'Shared by[:\s]*([^\n\r]+)',
-        r'Posted by[:\s]*([^\n\r]+)',
-        r'Uploaded by[:\s]*([^\n\r]+)'
-    ]
-    
-    for pattern in uploader_patterns:
-        match = re.search(pattern, full_text, re.IGNORECASE)
-        if match:
-            uploader = match.group(1).strip()
-            if uploader and len(uploader) < 50 and not re.search(r'\d{4}', uploader):  # Avoid dates
-                return uploader
-    
-    return ""
-
-def extract_duration(meta_text):
-    """Extract duration/length information"""
-    # Only look for explicit duration labels first
-    duration_patterns = [
-        r'Duration[:\s]+([^\n\r]+?)(?:\s|$)',
-        r'Length[:\s]+([^\n\r]+?)(?:\s|$)',  
-        r'Runtime[:\s]+([^\n\r]+?)(?:\s|$)',
-        r'Playing time[:\s]+([^\n\r]+?)(?:\s|$)'
-    ]
-    
-    for pattern in duration_patterns:
-        match = re.search(pattern, meta_text, re.IGNORECASE)
-        if match:
-            duration = match.group(1).strip()
-            # Clean up any trailing punctuation or text
-            duration = re.sub(r'[^\d:hm\s]+.*$', '', duration)
-            if len(duration) > 2 and len(duration) < 20:
-                return duration
-    
-    # Only look for time formats if explicitly labeled
-    time_patterns = [
-        r'(?:Duration|Length|Runtime)[:\s]+(\d+:\d+:\d+)',  # Must be labeled
-        r'(?:Duration|Length|Runtime)[:\s]+(\d+)h?\s*(\d+)?m?'  # Must be labeled
-    ]
-    
-    for pattern in time_patterns:
-        match = re.search(pattern, meta_text, re.IGNORECASE)
-        if match:
-            if match.group(1) and ':' in match.group(1):
-                return match.group(1)
-            elif match.group(1) and match.group(2):
-                return f"{match.group(1)}h {match.group(2)}m"
-            elif match.group(1):
-                return f"{match.group(1)}h"
-    
-    return ""
-
-def extract_publisher(meta_text):
-    """Extract publisher information"""
-    publisher_patterns = [
-        r'Publisher[:\s]+([^\n\r]+)',
-        r'Published by[:\s]+([^\n\r]+)',
-        r'Imprint[:\s]+([^\n\r]+)',
-        r'Label[:\s]+([^\n\r]+)'
-    ]
-    
-    for pattern in publisher_patterns:
-        match = re.search(pattern, meta_text, re.IGNORECASE)
-        if match:
-            publisher = match.group(1).strip()
-            # Clean up common suffixes
-            publisher = re.sub(r'\s*(,.*|\(.*)', '', publisher)
-            if len(publisher) < 100:
-                return publisher
-    
-    return ""
-
-def extract_isbn(meta_text):
-    """Extract ISBN information"""
-    isbn_patterns = [
-        r'ISBN[:\s]+([0-9\-X]{10,17})',
-        r'ISBN-?1[03][:\s]+([0-9\-]{10,17})',
-        r'\b(97[89][0-9\-]{10,13})\b'
-    ]
-    
-    for pattern in isbn_patterns:
-        match = re.search(pattern, meta_text, re.IGNORECASE)
-        if match:
-            isbn = match.group(1).replace('-', '').replace(' ', '')
-            if len(isbn) in [10, 13]:
-                return isbn
-    
-    return ""
-
-def extract_asin(meta_text):
-    """Extract ASIN information"""
-    asin_patterns = [
-        r'ASIN[:\s]+([A-Z0-9]{10})',
-        r'Amazon ASIN[:\s]+([A-Z0-9]{10})',
-        r'Amazon[:\s]+([A-Z0-9]{10})'
-    ]
-    
-    for pattern in asin_patterns:
-        match = re.search(pattern, meta_text, re.IGNORECASE)
-        if match:
-            asin = match.group(1)
-            if len(asin) == 10 and asin.isalnum() and not asin.isalpha():
-                return asin
-    
-    return ""
-
-def check_explicit_content(meta_text):
-    """Check for explicit content warnings"""
-    explicit_keywords = [
-        'explicit', 'adult content', 'mature', '18+', 'adult only',
-        'strong language', 'sexual content', 'graphic content'
-    ]
-    
-    text_lower = meta_text.lower()
-    for keyword in explicit_keywords:
-        if keyword in text_lower:
-            return True
-    
-    return False
-
-def check_abridged(meta_text):
-    """Check if content is abridged"""
-    abridged_keywords = ['abridged', 'condensed', 'shortened', 'edited']
-    unabridged_keywords = ['unabridged', 'complete', 'full version', 'uncut']
-    
-    text_lower = meta_text.lower()
-    
-    # Check for unabridged first (more definitive)
-    for keyword in unabridged_keywords:
-        if keyword in text_lower:
-            return False
-    
-    # Check for abridged
-    for keyword in abridged_keywords:
-        if keyword in text_lower:
-            return True
-    
-    return False  # Default to not abridged
-
-def extract_narrator(meta_text):
-    """Extract narrator information"""
-    narrator_patterns = [
-        r'(?:narrated by|narrator|read by|voice)[:\s]+([^\n\r,]+)',
-        r'(?:reader|performer)[:\s]+([^\n\r,]+)',
-        r'(?:voiced by)[:\s]+([^\n\r,]+)'
-    ]
-    
-    for pattern in narrator_patterns:
-        match = re.search(pattern, meta_text, re.IGNORECASE)
-        if match:
-            narrator = match.group(1).strip()
-            # Clean up common artifacts
-            narrator = re.sub(r'\s+', ' ', narrator)
-            narrator = narrator.replace('|', '').strip()
-            if len(narrator) > 3 and len(narrator) < 100:  # Reasonable length
-                return narrator
-    
-    return ""
-
-def extract_file_size(meta_text):
-    """Extract file size with multiple patterns"""
-    size_patterns = [
-        r'size[:\s]*(\d+(?:\.\d+)?)\s*(MB|GB|KB)',
-        r'(\d+(?:\.\d+)?)\s*(MB|GB|KB)(?:\s|$)',
-        r'filesize[:\s]*(\d+(?:\.\d+)?)\s*(MB|GB|KB)'
-    ]
-    
-    for pattern in size_patterns:
-        match = re.search(pattern, meta_text, re.IGNORECASE)
-        if match:
-            size_value = match.group(1)
-            size_unit = match.group(2).upper()
-            return f"{size_value} {size_unit}"
-    
-    return ""
-
-def extract_comments(soup):
-    """Extract comments from AudiobookBay page"""
-    comments = []
-    try:
-        # Common selectors for comments on AudiobookBay
-        comment_selectors = [
-            '#comments .comment',
-            '.comments .comment',
-            '.comment-item',
-            '#respond .comment',
-            '.comment-list .comment',
-            'ol.commentlist li',
-            '.wp-block-comments .wp-block-comment',
-            'article.comment'
-        ]
-        
-        comment_elements = []
-        for selector in comment_selectors:
-            found_comments = soup.select(selector)
-            if found_comments:
-                comment_elements = found_comments
-                break
-        
-        for comment in comment_elements:
-            try:
-                # Extract comment author
-                author_selectors = [
-                    '.comment-author .fn',
-                    '.comment-author cite',
-                    '.comment-author',
-                    '.comment-meta .author',
-                    'cite.fn',
-                    'b.fn',
-                    '.author'
-                ]
-                
-                author = ""
-                for author_selector in author_selectors:
-                    author_elem = comment.select_one(author_selector)
-                    if author_elem:
-                        author = author_elem.get_text().strip()
-                        break
-                
-                # Extract comment date
-                date_selectors = [
-                    '.comment-date',
-                    '.comment-meta .date',
-                    '.comment-time',
-                    'time',
-                    '.published',
-                    '.comment-meta time'
-                ]
-                
-                date = ""
-                for date_selector in date_selectors:
-                    date_elem = comment.select_one(date_selector)
-                    if date_elem:
-                        date = date_elem.get_text().strip()
-                        break
-                
-                # Extract comment text
-                text_selectors = [
-                    '.comment-content p',
-                    '.comment-text p',
-                    '.comment-body p',
-                    '.comment p',
-                    '.comment-content',
-                    '.comment-text',
-                    '.comment-body'
-                ]
+            
                 
-                text_content = ""
-                for text_selector in text_selectors:
-                    text_elem = comment.select_one(text_selector)
-                    if text_elem:
-                        text_content = text_elem.get_text().strip()
+            # Extract a meaningful description
+            # Look for paragraph breaks or description sections
+            description_patterns = [
+                r'Description[:\s]*\n([^\n]*(?:\n[^\n]*){0,5})',
+                r'Synopsis[:\s]*\n([^\n]*(?:\n[^\n]*){0,5})',
+                r'About[:\s]*\n([^\n]*(?:\n[^\n]*){0,5})'
+            ]
+            
+            for pattern in description_patterns:
+                desc_match = re.search(pattern, content_text, re.IGNORECASE)
+                if desc_match:
+                    description = desc_match.group(1).strip()
+                    break
+            
+            # If no description found, take first meaningful paragraph
+            if not description:
+                # Split by double newlines to get paragraphs
+                paragraphs = re.split(r'\n\s*\n', content_text)
+                for para in paragraphs:
+                    cleaned = para.strip()
+                    # Skip short lines, metadata lines, or lines with mostly special chars
+                    if (len(cleaned) > 50 and 
+                        not re.match(r'^(format|size|bitrate|duration|author|narrator)', cleaned, re.IGNORECASE) and
+                        len(re.sub(r'[^a-zA-Z\s]', '', cleaned)) > 30):
+                        description = cleaned  # Show full description without truncation
                         break
-                
-                # Only add comment if we have both author and content
-                if author and text_content and len(text_content) > 10:
-                    comments.append({
-                        'author': author[:50],  # Limit author name length
-                        'date': date[:20] if date else "",  # Limit date length
-                        'content': text_content[:500]  # Limit comment length
-                    })
-                    
-            except Exception as e:
-                logger.debug(f"Error extracting individual comment: {e}")
-                continue
         
-        # Limit to maximum 20 comments
-        comments = comments[:20]
-        logger.debug(f"Extracted {len(comments)} comments")
-        return comments
+        # Use enhanced extraction functions for additional metadata
+        enhanced_data = {
+            'title': clean_title(title),
+            'author': author or extract_author(content_text, title),
+            'narrator': narrator,
+            'cover': cover,
+            'description': description,
+            'duration': duration or extract_duration(content_text),
+            'file_format': file_format or extract_format(content_text),
+            'file_size': file_size,
+            'bitrate': bitrate or extract_bitrate(content_text),
+            'language': extract_language(content_text),
+            'upload_date': extract_upload_date(soup),
+            'creation_date': extract_creation_date(soup, content_text),
+            'categories': categories,
+            'category': ', '.join(categories) if categories else '',
+            'keywords': extract_keywords(content_text),
+            'publisher': extract_publisher(content_text),
+            'isbn': extract_isbn(content_text),
+            'asin': extract_asin(content_text),
+            'explicit': check_explicit_content(content_text),
+            'abridged': check_abridged(content_text),
+            'uploader': extract_uploader(soup),
+            'torrent_files': extract_torrent_files(soup, content_text),
+            'comments': extract_comments(soup),
+            'original_url': book_url
+        }
+        
+        return enhanced_data
         
     except Exception as e:
-        logger.debug(f"Error extracting comments: {e}")
-        return []
+        logger.error(f"Failed to extract book details: {e}")
+        return None
 
-def extract_torrent_files(soup, content_text):
-    """Extract list of files in the torrent"""
-    files = []
-    
-    # Look for file listings
-    file_patterns = [
-        r'Files?[:\s]*\n((?:.*\.(?:mp3|m4b|m4a|aac|flac|wav|ogg)[^\n]*\n?)+)',
-        r'Contents?[:\s]*\n((?:.*\.(?:mp3|m4b|m4a|aac|flac|wav|ogg)[^\n]*\n?)+)',
-        r'Track(?:s|list)?[:\s]*\n((?:.*\.(?:mp3|m4b|m4a|aac|flac|wav|ogg)[^\n]*\n?)+)'
-    ]
-    
-    for pattern in file_patterns:
-        match = re.search(pattern, content_text, re.IGNORECASE | re.MULTILINE)
-        if match:
-            file_list = match.group(1).strip()
-            # Split into individual files
-            potential_files = file_list.split('\n')
-            for file_line in potential_files:
-                file_line = file_line.strip()
-                if file_line and any(ext in file_line.lower() for ext in ['.mp3', '.m4b', '.m4a', '.aac', '.flac', '.wav', '.ogg']):
-                    files.append(file_line)
-            break
-    
-    # Also look for file tables in HTML
-    file_tables = soup.select('table')
-    for table in file_tables:
-        rows = table.select('tr')
-        for row in rows:
-            cells = row.select('td')
-            for cell in cells:
-                cell_text = cell.get_text().strip()
-                if any(ext in cell_text.lower() for ext in ['.mp3', '.m4b', '.m4a', '.aac', '.flac', '.wav', '.ogg']):
-                    files.append(cell_text)
-    
-    return files[:20]  # Limit to first 20 files
-
-def extract_creation_date(soup, content_text):
-    """Extract creation/publication date"""
-    date_patterns = [
-        r'Published[:\s]+([^\n\r]+)',
-        r'Created[:\s]+([^\n\r]+)',
-        r'Release[:\s]+([^\n\r]+)',
-        r'Date[:\s]+([^\n\r]+)',
-        r'(\d{4}(?:\-\d{2}\-\d{2})?)',  # Year or full date
-        r'©\s*(\d{4})',  # Copyright year
-        r'\((\d{4})\)'   # Year in parentheses
-    ]
-    
-    for pattern in date_patterns:
-        match = re.search(pattern, content_text, re.IGNORECASE)
-        if match:
-            date_str = match.group(1).strip()
-            # Clean up common suffixes
-            date_str = re.sub(r'\s+(by|from|in).*$', '', date_str, flags=re.IGNORECASE)
-            if len(date_str) >= 4 and len(date_str) <= 20:
-                return date_str
-    
-    return ""
+# Helper function to sanitize titles
+def sanitize_title(title):
+    return re.sub(r'[<>:"/\\|?*]', '', title).strip()
 
 
 def scrape_available_categories():
@@ -1743,7 +1229,7 @@ def scrape_available_categories():
         with open('elements', 'r', encoding='utf-8') as f:
             html_content = f.read()
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = make_soup(html_content)
         categories = []
         
         # Find Category section (not Category Modifiers)
@@ -1798,7 +1284,7 @@ def scrape_available_languages():
         with open('elements', 'r', encoding='utf-8') as f:
             html_content = f.read()
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = make_soup(html_content)
         languages = []
         
         # Find Popular Language section
@@ -1905,18 +1391,14 @@ def get_hot_searches():
 
 def scrape_hot_searches():
     """Scrape real-time hot searches from AudiobookBay website"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36'
-    }
-    
     try:
         # Always scrape from live website for real-time data
-        response = requests.get(f"http://{ABB_HOSTNAME}", headers=headers, timeout=10)
-        if response.status_code != 200:
-            logger.error(f"Failed to fetch AudiobookBay homepage for hot searches. Status: {response.status_code}")
+        response = abb_mirror.get()
+        if not response or response.status_code != 200:
+            logger.error(f"Failed to fetch AudiobookBay homepage for hot searches. Status: {response.status_code if response else 'None'}")
             return []  # Return empty list instead of fallback
 
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = make_soup(response.text)
         searches = []
         
         # Look for Hot Search section in the sidebar or navigation
@@ -1999,7 +1481,7 @@ def scrape_available_ages():
         with open('elements', 'r', encoding='utf-8') as f:
             html_content = f.read()
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = make_soup(html_content)
         ages = []
         
         # Find Age section
@@ -2052,7 +1534,7 @@ def scrape_available_modifiers():
         with open('elements', 'r', encoding='utf-8') as f:
             html_content = f.read()
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = make_soup(html_content)
         modifiers = []
         
         # Find Category Modifiers section
@@ -2119,6 +1601,7 @@ def login():
             # Make session permanent and login with remember=True
             session.permanent = True
             login_result = login_user(user, remember=True)
+            remember_user_type(user_data['type'])
 
             logger.info(f"login_user() result: {login_result}, current_user.is_authenticated: {current_user.is_authenticated}")
             logger.info(f"Session permanent: {session.permanent}, User ID in session: {session.get('_user_id')}")
@@ -2156,6 +1639,8 @@ def signup():
 @login_required
 def logout():
     logout_user()
+    session.pop('user_type', None)
+    session.pop('user_checked_at', None)
     return redirect(url_for('login'))
 
 # Home page endpoint
@@ -2163,7 +1648,7 @@ def logout():
 @login_required
 def home():
     try:
-        featured_books = scrape_homepage()
+        featured_books = homepage_snapshot.get(1)
         return render_template('home.html', books=featured_books)
     except Exception as e:
         logger.error(f"Failed to load homepage: {e}")
@@ -2226,7 +1711,7 @@ def api_home():
     page = int(request.args.get('page', 1))
     
     try:
-        books = scrape_homepage_with_pagination(page)
+        books = homepage_snapshot.get(page)
         has_more = len(books) > 0  # If we got results, there might be more
         
         return jsonify({
@@ -2247,24 +1732,10 @@ def book_details(book_url):
         import urllib.parse
         decoded_url = urllib.parse.unquote(book_url)
         
-        book_info = get_book_details(decoded_url)
-        related_books = []
-        if book_info:
-            # Get related books from the actual page content
-            try:
-                # We need to fetch the page again to get the soup for related books
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36'
-                }
-                response = requests.get(decoded_url, headers=headers, timeout=15)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    related_books = get_related_books_from_page(soup, decoded_url)
-            except Exception as e:
-                logger.error(f"Failed to get related books: {e}")
-                related_books = []
-            
-            return render_template('book_details.html', book=book_info, related_books=related_books)
+        # One fetch and parse covers the details, related books, comments and torrent info
+        page = get_book_record(decoded_url)
+        if page and page['details']:
+            return render_template('book_details.html', book=page['details'], related_books=page['related_books'])
         else:
             return render_template('book_details.html', book=None, error="Failed to load book details")
     except Exception as e:
@@ -2275,116 +1746,104 @@ def book_details(book_url):
 
 
 # Endpoint to send magnet link to qBittorrent
+def process_send(job):
+    """Fetch a book's magnet link and add it to the download client; raises so the send queue retries or fails the job"""
+    magnet_link = extract_magnet_link(job['link'])
+    save_path = f"{SAVE_PATH_BASE}/{sanitize_title(job['title'])}"
+    torrent_hash = download_client.add(magnet_link, save_path, category=DL_CATEGORY)
+    torrent_state.refresh_soon()
+
+    # Track the download for the user who sent it
+    if torrent_hash:
+        add_user_download(job['username'], torrent_hash, job['title'], job['link'])
+        logger.debug(f"Tracked download for user {job['username']}: {job['title']}")
+
+    return 'Download added successfully! This may take some time, the download will show in Audiobookshelf when completed.'
+
+def is_retryable_send_error(error):
+    """Retry a send only when the page or the download client could not be reached"""
+    return isinstance(error, RetryableError) or is_connection_error(error)
+
+# Download requests run on a worker pool; /send only queues them
+send_queue = SendQueue(process_send, is_retryable=is_retryable_send_error)
+
+# Helper function to shape a send job for the API
+def send_job_response(job):
+    return {
+        'job_id': job['id'],
+        'status': job['status'],
+        'message': job['message'],
+        'attempts': job['attempts']
+    }
+
 @app.route('/send', methods=['POST'])
 @login_required
 def send():
+    """Queue a download and return its job, which /api/send/<job_id> reports on"""
     data = request.json
     details_url = data.get('link')
     title = data.get('title')
     if not details_url or not title:
         return jsonify({'message': 'Invalid request'}), 400
 
+    if not download_client:
+        return jsonify({'message': 'Unsupported download client'}), 400
+
     try:
-        magnet_link = extract_magnet_link(details_url)
-        if not magnet_link:
-            return jsonify({'message': 'Failed to extract magnet link'}), 500
+        # Sending the same book again while it is still queued joins the existing job
+        username = current_user.username
+        job = send_queue.submit(
+            (username, canonical_book_url(details_url)),
+            {'username': username, 'link': details_url, 'title': title},
+            owner=username
+        )
+        return jsonify(send_job_response(job)), 202
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
 
-        save_path = f"{SAVE_PATH_BASE}/{sanitize_title(title)}"
-        
-        torrent_hash = None
-        
-        if DOWNLOAD_CLIENT == 'qbittorrent':
-            qb = Client(host=DL_HOST, port=DL_PORT, username=DL_USERNAME, password=DL_PASSWORD)
-            qb.auth_log_in()
-            result = qb.torrents_add(urls=magnet_link, save_path=save_path, category=DL_CATEGORY)
-            # Extract hash from magnet link for tracking
-            if 'btih:' in magnet_link:
-                torrent_hash = magnet_link.split('btih:')[1].split('&')[0].lower()
-        elif DOWNLOAD_CLIENT == 'transmission':
-            transmission = transmissionrpc(host=DL_HOST, port=DL_PORT, protocol=DL_SCHEME, username=DL_USERNAME, password=DL_PASSWORD)
-            result = transmission.add_torrent(magnet_link, download_dir=save_path)
-            torrent_hash = result.hashString if hasattr(result, 'hashString') else None
-        elif DOWNLOAD_CLIENT == "delugeweb":
-            delugeweb = delugewebclient(url=DL_URL, password=DL_PASSWORD)
-            delugeweb.login()
-            result = delugeweb.add_torrent_magnet(magnet_link, save_directory=save_path, label=DL_CATEGORY)
-            torrent_hash = result if isinstance(result, str) else None
-        else:
-            return jsonify({'message': 'Unsupported download client'}), 400
+@app.route('/api/send/<job_id>')
+@login_required
+def send_job_status(job_id):
+    """Get a send job's status; wait=N holds the request up to N seconds (max 30) for it to finish"""
+    try:
+        wait = min(max(float(request.args.get('wait', 0)), 0), 30)
+    except ValueError:
+        wait = 0
 
-        # Track the download for the current user
-        if torrent_hash:
-            add_user_download(current_user.username, torrent_hash, title, details_url)
-            logger.debug(f"Tracked download for user {current_user.username}: {title}")
+    job = send_queue.get(job_id, wait=wait)
+    if not job or job['owner'] != current_user.username:
+        return jsonify({'message': 'Unknown download job'}), 404
+    return jsonify(send_job_response(job))
+
+# Helper function to shape a normalised torrent record for the status pages and API
+def torrent_row(torrent):
+    return {
+        'hash': torrent['hash'],
+        'name': torrent['name'],
+        'progress': round(torrent['progress'], 1),
+        'state': torrent['state'],
+        'state_label': torrent['state'].title(),
+        'size': format_bytes(torrent['size']) if torrent['size'] > 0 else 'Unknown',
+        'upload_speed': torrent['upload_speed'],
+        'download_speed': torrent['download_speed']
+    }
 
-        return jsonify({'message': f'Download added successfully! This may take some time, the download will show in Audiobookshelf when completed.'})
-    except Exception as e:
-        return jsonify({'message': str(e)}), 500
 @app.route('/status')
 @login_required
 def status():
     try:
-        # Get user's download history to filter torrents
-        user_downloads = load_user_downloads(current_user.username)
-        user_torrent_hashes = {download['hash'] for download in user_downloads}
-        
-        if DOWNLOAD_CLIENT == 'transmission':
-            transmission = transmissionrpc(host=DL_HOST, port=DL_PORT, username=DL_USERNAME, password=DL_PASSWORD)
-            torrents = transmission.get_torrents()
-            torrent_list = [
-                {
-                    'hash': torrent.hashString,
-                    'name': torrent.name,
-                    'progress': round(torrent.progress, 2),
-                    'state': torrent.status,
-                    'size': f"{torrent.total_size / (1024 * 1024):.2f} MB"
-                }
-                for torrent in torrents if torrent.hashString in user_torrent_hashes
-            ]
-            return render_template('status.html', torrents=torrent_list)
-        elif DOWNLOAD_CLIENT == 'qbittorrent':
-            qb = Client(host=DL_HOST, port=DL_PORT, username=DL_USERNAME, password=DL_PASSWORD)
-            qb.auth_log_in()
-            torrents = qb.torrents_info(category=DL_CATEGORY)
-            torrent_list = [
-                {
-                    'hash': torrent.hash,
-                    'name': torrent.name,
-                    'progress': round(torrent.progress * 100, 2),
-                    'state': torrent.state,
-                    'size': f"{torrent.total_size / (1024 * 1024):.2f} MB"
-                }
-                for torrent in torrents if torrent.hash in user_torrent_hashes
-            ]
-            return render_template('status.html', torrents=torrent_list)
-        elif DOWNLOAD_CLIENT == "delugeweb":
-            delugeweb = delugewebclient(url=DL_URL, password=DL_PASSWORD)
-            delugeweb.login()
-            torrents = delugeweb.get_torrents_status(
-                filter_dict={"label": DL_CATEGORY},
-                keys=["name", "state", "progress", "total_size"],
-            )
-            torrent_list = [
-                {
-                    "hash": k,
-                    "name": torrent["name"],
-                    "progress": round(torrent["progress"], 2),
-                    "state": torrent["state"],
-                    "size": f"{torrent['total_size'] / (1024 * 1024):.2f} MB",
-                }
-                for k, torrent in torrents.result.items() if k in user_torrent_hashes
-            ]
-            return render_template('status.html', torrents=torrent_list)
-        else:
+        if not download_client:
             return jsonify({'message': 'Unsupported download client'}), 400
+
+        # Filter torrents to the user's download history
+        user_hashes = get_user_torrent_hashes(current_user.username)
+        torrent_list = [torrent_row(torrent) for torrent in torrent_state.torrents() if torrent['hash'] in user_hashes]
+        return render_template('status.html', torrents=torrent_list)
     except Exception as e:
         return jsonify({'message': f"Failed to fetch torrent status: {e}"}), 500
 
 # Helper function to browse by category
 def browse_category(category, page_num=1):
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36'
-    }
     results = []
     
     # Category mapping for AudiobookBay search URLs
@@ -2404,125 +1863,15 @@ def browse_category(category, page_num=1):
     }
     
     search_term = category_searches.get(category.lower(), 'fantasy')
-    url = f"http://{ABB_HOSTNAME}/page/{page_num}/?s={search_term.replace(' ', '+')}&cat=undefined%2Cundefined"
+    path = f"/page/{page_num}/?s={search_term.replace(' ', '+')}&cat=undefined%2Cundefined"
     
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code != 200:
-            logger.error(f"Failed to fetch category {category} page {page_num}. Status Code: {response.status_code}")
+        response = abb_mirror.get([path])
+        if not response or response.status_code != 200:
+            logger.error(f"Failed to fetch category {category} page {page_num}. Status Code: {response.status_code if response else 'None'}")
             return results
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-        results = []
-        
-        # Extract posts from category results - use same approach as homepage
-        post_selectors = ['.post', 'article.post', '.entry', '.postContent']
-        posts = []
-        
-        for selector in post_selectors:
-            all_posts = soup.select(selector)[:18]  # Limit to first 18 posts
-            if all_posts:
-                # Filter out hidden posts with display:none (SAME AS HOMEPAGE)
-                posts = [p for p in all_posts if 'display:none' not in str(p)]
-                logger.info(f"Found {len(all_posts)} posts, {len(posts)} visible using selector '{selector}' for category {category} on page {page_num}")
-                break
-        
-        if not posts:
-            logger.warning(f"No posts found with any selector for category {category} on page {page_num}")
-            return []
-
-        for post in posts:
-            try:
-                # Try multiple title selectors (EXACT SAME AS HOMEPAGE)
-                title_selectors = [
-                    '.postTitle > h2 > a',
-                    '.postTitle a', 
-                    'h2 a',
-                    'h3 a',
-                    '.entry-title a',
-                    'a[rel="bookmark"]'
-                ]
-                
-                title_element = None
-                for title_sel in title_selectors:
-                    title_element = post.select_one(title_sel)
-                    if title_element:
-                        break
-                
-                if not title_element:
-                    continue
-                    
-                title = title_element.text.strip()
-                href = title_element.get('href', '')
-                
-                # Handle relative and absolute URLs (EXACT SAME AS HOMEPAGE)
-                if href.startswith('http'):
-                    link = href
-                elif href.startswith('/'):
-                    link = f"http://{ABB_HOSTNAME}{href}"
-                else:
-                    link = f"http://{ABB_HOSTNAME}/{href}"
-                
-                # Extract cover image with better selectors (EXACT SAME AS HOMEPAGE)
-                cover_selectors = [
-                    'img[src*="cover"]',
-                    'img[alt*="cover"]', 
-                    '.postContent img',
-                    'img'
-                ]
-                
-                cover = "/static/images/default_cover.jpg"
-                for cover_sel in cover_selectors:
-                    cover_element = post.select_one(cover_sel)
-                    if cover_element and cover_element.get('src'):
-                        cover_src = cover_element['src']
-                        if cover_src.startswith('//'):
-                            cover = 'http:' + cover_src
-                        elif cover_src.startswith('/'):
-                            cover = f"http://{ABB_HOSTNAME}{cover_src}"
-                        elif cover_src.startswith('http'):
-                            cover = cover_src
-                        else:
-                            cover = f"http://{ABB_HOSTNAME}/{cover_src}"
-                        break
-                
-                # Extract comprehensive metadata using new helper functions (EXACT SAME AS HOMEPAGE)
-                meta_info = post.select_one('.postContent, .entry-content, .post-content')
-                meta_text = meta_info.get_text() if meta_info else ""
-                
-                # Extract file size (keep existing pattern for compatibility)
-                file_size = ""
-                size_match = re.search(r'(\d+(?:\.\d+)?)\s*(MB|GB)', meta_text, re.IGNORECASE)
-                if size_match:
-                    file_size = f"{size_match.group(1)} {size_match.group(2).upper()}"
-                
-                # Use new extraction functions for comprehensive metadata (EXACT SAME AS HOMEPAGE)
-                book_data = {
-                    'title': clean_title(title),
-                    'link': link,
-                    'cover': cover,
-                    'author': extract_author(meta_text, title),
-                    'category': extract_category(post, meta_text),
-                    'keywords': extract_keywords(meta_text),
-                    'language': extract_language(meta_text),
-                    'file_format': extract_format(meta_text),
-                    'bitrate': extract_bitrate(meta_text),
-                    'file_size': file_size,
-                    'upload_date': extract_upload_date(post),
-                    'duration': extract_duration(meta_text),
-                    'publisher': extract_publisher(meta_text),
-                    'isbn': extract_isbn(meta_text),
-                    'asin': extract_asin(meta_text),
-                    'explicit': check_explicit_content(meta_text),
-                    'abridged': check_abridged(meta_text),
-                    'posted_date': extract_upload_date(post)
-                }
-
-                results.append(book_data)
-            except Exception as e:
-                logger.error(f"Skipping post due to error: {e}")
-                continue
-                
+        results = parse_book_list(response.text, ABB_HOSTNAME, context=f"for category {category} on page {page_num}")
         logger.info(f"Found {len(results)} results for category {category} on page {page_num}")
         return results
         
@@ -2707,7 +2056,7 @@ def remove_favorite():
 @login_required
 def favorites_page():
     try:
-        user_favorites = load_user_favorites(current_user.username)
+        user_favorites = fill_favorites_from_cache(load_user_favorites(current_user.username))
         return render_template('favorites.html', books=user_favorites)
     except Exception as e:
         logger.error(f"Failed to load favorites: {e}")
@@ -2717,9 +2066,7 @@ def favorites_page():
 @login_required
 def get_search_history():
     try:
-        history = load_search_history()
-        user_history = history.get(current_user.id, [])
-        return jsonify({'history': user_history[:10]})  # Return last 10 searches
+        return jsonify({'history': load_user_search_history(current_user.id, limit=10)})  # Return last 10 searches
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -2730,13 +2077,32 @@ def check_favorite():
         data = request.get_json()
         link = data.get('link')
         
-        user_favorites = load_user_favorites(current_user.username)
-        is_favorite = any(f.get('link') == link for f in user_favorites)
+        is_favorite = bool(link) and is_user_favorite(current_user.username, link)
         
         return jsonify({'is_favorite': is_favorite})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Most book URLs accepted by one batch favorite check
+FAVORITE_CHECK_BATCH_LIMIT = 200
+
+@app.route('/api/favorites/check-batch', methods=['POST'])
+@login_required
+def check_favorites_batch():
+    """Return which of a list of book URLs the user has favorited"""
+    try:
+        data = request.get_json() or {}
+        links = data.get('links')
+        if not isinstance(links, list) or not all(isinstance(link, str) for link in links):
+            return jsonify({'error': 'links must be a list of strings'}), 400
+        if len(links) > FAVORITE_CHECK_BATCH_LIMIT:
+            return jsonify({'error': f'At most {FAVORITE_CHECK_BATCH_LIMIT} links per request'}), 400
+
+        favorited = get_favorited_urls(current_user.username, links)
+        return jsonify({'favorites': [link for link in dict.fromkeys(links) if link in favorited]})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Enhanced torrent management endpoints
 @app.route('/api/torrent/pause', methods=['POST'])
 @login_required
@@ -2747,19 +2113,12 @@ def pause_torrent():
         if not torrent_hash:
             return jsonify({'error': 'Torrent hash required'}), 400
 
-        if DOWNLOAD_CLIENT == 'qbittorrent':
-            qb = Client(host=DL_HOST, port=DL_PORT, username=DL_USERNAME, password=DL_PASSWORD)
-            qb.auth_log_in()
-            qb.torrents_pause(torrent_hashes=torrent_hash)
-            return jsonify({'message': 'Torrent paused successfully', 'status': 'paused'})
-        
-        elif DOWNLOAD_CLIENT == 'transmission':
-            transmission = transmissionrpc(host=DL_HOST, port=DL_PORT, username=DL_USERNAME, password=DL_PASSWORD)
-            transmission.stop_torrent(torrent_hash)
-            return jsonify({'message': 'Torrent paused successfully', 'status': 'paused'})
-        
-        else:
+        if not download_client:
             return jsonify({'error': 'Unsupported download client'}), 400
+
+        download_client.pause(torrent_hash)
+        torrent_state.refresh_soon()
+        return jsonify({'message': 'Torrent paused successfully', 'status': 'paused'})
             
     except Exception as e:
         return jsonify({'error': f'Failed to pause torrent: {str(e)}'}), 500
@@ -2773,19 +2132,12 @@ def resume_torrent():
         if not torrent_hash:
             return jsonify({'error': 'Torrent hash required'}), 400
 
-        if DOWNLOAD_CLIENT == 'qbittorrent':
-            qb = Client(host=DL_HOST, port=DL_PORT, username=DL_USERNAME, password=DL_PASSWORD)
-            qb.auth_log_in()
-            qb.torrents_resume(torrent_hashes=torrent_hash)
-            return jsonify({'message': 'Torrent resumed successfully', 'status': 'downloading'})
-        
-        elif DOWNLOAD_CLIENT == 'transmission':
-            transmission = transmissionrpc(host=DL_HOST, port=DL_PORT, username=DL_USERNAME, password=DL_PASSWORD)
-            transmission.start_torrent(torrent_hash)
-            return jsonify({'message': 'Torrent resumed successfully', 'status': 'downloading'})
-        
-        else:
+        if not download_client:
             return jsonify({'error': 'Unsupported download client'}), 400
+
+        download_client.resume(torrent_hash)
+        torrent_state.refresh_soon()
+        return jsonify({'message': 'Torrent resumed successfully', 'status': 'downloading'})
             
     except Exception as e:
         return jsonify({'error': f'Failed to resume torrent: {str(e)}'}), 500
@@ -2801,23 +2153,101 @@ def delete_torrent():
         if not torrent_hash:
             return jsonify({'error': 'Torrent hash required'}), 400
 
-        if DOWNLOAD_CLIENT == 'qbittorrent':
-            qb = Client(host=DL_HOST, port=DL_PORT, username=DL_USERNAME, password=DL_PASSWORD)
-            qb.auth_log_in()
-            qb.torrents_delete(torrent_hashes=torrent_hash, delete_files=delete_files)
-            return jsonify({'message': 'Torrent deleted successfully', 'status': 'deleted'})
-        
-        elif DOWNLOAD_CLIENT == 'transmission':
-            transmission = transmissionrpc(host=DL_HOST, port=DL_PORT, username=DL_USERNAME, password=DL_PASSWORD)
-            transmission.remove_torrent(torrent_hash, delete_data=delete_files)
-            return jsonify({'message': 'Torrent deleted successfully', 'status': 'deleted'})
-        
-        else:
+        if not download_client:
             return jsonify({'error': 'Unsupported download client'}), 400
+
+        download_client.delete(torrent_hash, delete_files=delete_files)
+        torrent_state.refresh_soon()
+        return jsonify({'message': 'Torrent deleted successfully', 'status': 'deleted'})
             
     except Exception as e:
         return jsonify({'error': f'Failed to delete torrent: {str(e)}'}), 500
 
+# Bulk torrent actions: the backend method taking a list of hashes, and the past tense for messages
+BULK_TORRENT_ACTIONS = {
+    'pause': ('pause_many', 'paused'),
+    'resume': ('resume_many', 'resumed'),
+    'delete': ('delete_many', 'deleted')
+}
+
+# Filters accepted in place of a hash list, matched against the cached torrent records
+BULK_TORRENT_FILTERS = {
+    'all': lambda torrent: True,
+    'completed': lambda torrent: torrent['completed'],
+    'downloading': lambda torrent: torrent['state'] == 'downloading',
+    'seeding': lambda torrent: torrent['state'] == 'seeding',
+    'paused': lambda torrent: torrent['state'] in ('paused', 'completed'),
+    'error': lambda torrent: torrent['state'] == 'error'
+}
+
+@app.route('/api/torrent/bulk/<action>', methods=['POST'])
+@login_required
+def bulk_torrent_action(action):
+    """
+    Pause, resume or delete many torrents with one download client call
+
+    Accepts either {"hashes": [...]} or {"filter": "completed"}, where a filter
+    selects from the caller's torrents (every torrent for admins passing
+    scope=all). Users may only act on their own downloads. Returns a result
+    for every requested hash.
+    """
+    try:
+        if action not in BULK_TORRENT_ACTIONS:
+            return jsonify({'error': f'Unknown action: {action}'}), 404
+
+        if not download_client:
+            return jsonify({'error': 'Unsupported download client'}), 400
+
+        data = request.get_json() or {}
+        username = current_user.username
+        is_admin = is_admin_user(username)
+        user_hashes = get_user_torrent_hashes(username)
+        torrents = {torrent['hash']: torrent for torrent in torrent_state.torrents()}
+
+        results = {}
+        if data.get('filter'):
+            matches = BULK_TORRENT_FILTERS.get(data['filter'])
+            if not matches:
+                return jsonify({'error': f"Unknown filter: {data['filter']}"}), 400
+            show_all = data.get('scope') == 'all' and is_admin
+            targets = [torrent_hash for torrent_hash, torrent in torrents.items()
+                       if (show_all or torrent_hash in user_hashes) and matches(torrent)]
+        else:
+            hashes = data.get('hashes')
+            if not hashes or not isinstance(hashes, list):
+                return jsonify({'error': 'A list of torrent hashes or a filter is required'}), 400
+            targets = []
+            for torrent_hash in dict.fromkeys(str(torrent_hash).lower() for torrent_hash in hashes):
+                if torrent_hash not in torrents:
+                    results[torrent_hash] = 'not_found'
+                elif not is_admin and torrent_hash not in user_hashes:
+                    results[torrent_hash] = 'forbidden'
+                else:
+                    targets.append(torrent_hash)
+
+        method, done = BULK_TORRENT_ACTIONS[action]
+        if targets:
+            try:
+                if action == 'delete':
+                    download_client.delete_many(targets, delete_files=bool(data.get('delete_files', False)))
+                else:
+                    getattr(download_client, method)(targets)
+                results.update({torrent_hash: 'ok' for torrent_hash in targets})
+            except Exception as e:
+                logger.error(f"Bulk {action} of {len(targets)} torrents failed: {e}")
+                results.update({torrent_hash: f'error: {e}' for torrent_hash in targets})
+            torrent_state.refresh_soon()
+
+        succeeded = sum(1 for result in results.values() if result == 'ok')
+        return jsonify({
+            'message': f'{succeeded} of {len(results)} torrents {done}',
+            'action': action,
+            'results': results
+        })
+
+    except Exception as e:
+        return jsonify({'error': f'Failed to {action} torrents: {str(e)}'}), 500
+
 @app.route('/api/torrent/info', methods=['POST'])
 @login_required
 def get_torrent_info():
@@ -2827,43 +2257,24 @@ def get_torrent_info():
         if not torrent_hash:
             return jsonify({'error': 'Torrent hash required'}), 400
 
-        if DOWNLOAD_CLIENT == 'qbittorrent':
-            qb = Client(host=DL_HOST, port=DL_PORT, username=DL_USERNAME, password=DL_PASSWORD)
-            qb.auth_log_in()
-            torrent_info = qb.torrents_info(torrent_hashes=torrent_hash)
-            if torrent_info:
-                torrent = torrent_info[0]
-                return jsonify({
-                    'name': torrent.name,
-                    'progress': round(torrent.progress * 100, 2),
-                    'state': torrent.state,
-                    'size': torrent.total_size,
-                    'downloaded': torrent.downloaded,
-                    'upload_speed': torrent.upspeed,
-                    'download_speed': torrent.dlspeed,
-                    'eta': torrent.eta,
-                    'ratio': torrent.ratio
-                })
-            else:
-                return jsonify({'error': 'Torrent not found'}), 404
-        
-        elif DOWNLOAD_CLIENT == 'transmission':
-            transmission = transmissionrpc(host=DL_HOST, port=DL_PORT, username=DL_USERNAME, password=DL_PASSWORD)
-            torrent = transmission.get_torrent(torrent_hash)
-            return jsonify({
-                'name': torrent.name,
-                'progress': round(torrent.progress, 2),
-                'state': torrent.status,
-                'size': torrent.total_size,
-                'downloaded': torrent.downloaded_ever,
-                'upload_speed': torrent.rate_upload,
-                'download_speed': torrent.rate_download,
-                'eta': torrent.eta,
-                'ratio': torrent.ratio
-            })
-        
-        else:
+        if not download_client:
             return jsonify({'error': 'Unsupported download client'}), 400
+
+        torrent = download_client.info(torrent_hash)
+        if not torrent:
+            return jsonify({'error': 'Torrent not found'}), 404
+
+        return jsonify({
+            'name': torrent['name'],
+            'progress': round(torrent['progress'], 2),
+            'state': torrent['state'].title(),
+            'size': torrent['size'],
+            'downloaded': torrent['downloaded'],
+            'upload_speed': torrent['upload_speed'],
+            'download_speed': torrent['download_speed'],
+            'eta': torrent['eta'],
+            'ratio': torrent['ratio']
+        })
             
     except Exception as e:
         return jsonify({'error': f'Failed to get torrent info: {str(e)}'}), 500
@@ -2872,59 +2283,67 @@ def get_torrent_info():
 @app.route('/api/torrent/status', methods=['GET'])
 @login_required
 def get_torrent_status():
-    """Get status of all active torrents for real-time updates"""
+    """Get status of the user's torrents for real-time updates; admins may ask for scope=all"""
     try:
-        torrents_data = []
-        
-        if DOWNLOAD_CLIENT == 'qbittorrent':
-            qb = Client(host=DL_HOST, port=DL_PORT, username=DL_USERNAME, password=DL_PASSWORD)
-            torrents = qb.torrents_info()
-            
-            for torrent in torrents:
-                # Format size properly
-                size_bytes = torrent.get('size', 0)
-                if size_bytes > 0:
-                    size_formatted = format_bytes(size_bytes)
-                else:
-                    size_formatted = 'Unknown'
-                
-                torrents_data.append({
-                    'hash': torrent['hash'],
-                    'name': torrent['name'],
-                    'progress': round(torrent['progress'] * 100, 1),
-                    'state': torrent['state'].replace('_', ' ').title(),
-                    'size': size_formatted
-                })
-        
-        elif DOWNLOAD_CLIENT == 'transmission':
-            transmission = transmissionrpc(host=DL_HOST, port=DL_PORT, username=DL_USERNAME, password=DL_PASSWORD)
-            torrents = transmission.get_torrents()
-            
-            for torrent in torrents:
-                # Format size properly  
-                size_bytes = torrent.total_size if hasattr(torrent, 'total_size') else 0
-                if size_bytes > 0:
-                    size_formatted = format_bytes(size_bytes)
-                else:
-                    size_formatted = 'Unknown'
-                
-                torrents_data.append({
-                    'hash': torrent.hashString,
-                    'name': torrent.name,
-                    'progress': round(torrent.progress * 100, 1),
-                    'state': torrent.status.replace('_', ' ').title(),
-                    'size': size_formatted
-                })
-        
-        else:
+        if not download_client:
             return jsonify({'error': 'Unsupported download client'}), 400
-            
+
+        username = current_user.username
+        if request.args.get('scope') == 'all' and is_admin_user(username):
+            torrents_data = [torrent_row(torrent) for torrent in torrent_state.torrents()]
+        else:
+            user_hashes = get_user_torrent_hashes(username)
+            torrents_data = [torrent_row(torrent) for torrent in torrent_state.torrents() if torrent['hash'] in user_hashes]
         return jsonify({'torrents': torrents_data})
         
     except Exception as e:
         return jsonify({'error': f'Failed to get torrent status: {str(e)}'}), 500
 
 
+# Helper function to format a server-sent event
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/torrent/stream')
+@login_required
+def torrent_stream():
+    """
+    Stream torrent changes as server-sent events
+
+    Sends a 'snapshot' event with every visible torrent, then an 'update' event
+    with only the changed and removed torrents each time the shared state
+    changes. Users see their own downloads; admins see every torrent unless
+    they ask for scope=mine.
+    """
+    if not torrent_state:
+        return jsonify({'error': 'Unsupported download client'}), 400
+
+    username = current_user.username
+    show_all = request.args.get('scope') != 'mine' and is_admin_user(username)
+
+    def events():
+        version, torrents = torrent_state.snapshot()
+        user_hashes = None if show_all else get_user_torrent_hashes(username)
+        rows = [torrent_row(torrent) for torrent in torrents if user_hashes is None or torrent['hash'] in user_hashes]
+        yield sse_event('snapshot', {'torrents': rows, 'version': version})
+
+        while True:
+            version_seen = version
+            version, changed, removed = torrent_state.wait_for_changes(version_seen, timeout=TORRENT_STREAM_KEEPALIVE)
+            if version == version_seen:
+                yield ": keep-alive\n\n"
+                continue
+
+            user_hashes = None if show_all else get_user_torrent_hashes(username)
+            changed = [torrent_row(torrent) for torrent in changed if user_hashes is None or torrent['hash'] in user_hashes]
+            removed = [torrent_hash for torrent_hash in removed if user_hashes is None or torrent_hash in user_hashes]
+            if changed or removed:
+                yield sse_event('update', {'torrents': changed, 'removed': removed, 'version': version})
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 def format_bytes(bytes_value):
     """Convert bytes to human readable format"""
     if bytes_value == 0:
@@ -2940,56 +2359,10 @@ def format_bytes(bytes_value):
 
 
 # Auto-stop seeding functionality
-def auto_stop_completed_torrents():
-    """Background service to automatically pause torrents when they complete"""
-    while True:
-        try:
-            # Check if auto-stop is enabled
-            if not AUTO_STOP_ENABLED:
-                time.sleep(60)
-                continue
-                
-            if DOWNLOAD_CLIENT == 'qbittorrent':
-                qb = Client(host=DL_HOST, port=DL_PORT, username=DL_USERNAME, password=DL_PASSWORD)
-                torrents = qb.torrents_info()
-                
-                for torrent in torrents:
-                    # Check if torrent is completed (100% progress) and currently seeding
-                    if torrent['progress'] >= 1.0 and torrent['state'].lower() in ['uploading', 'seeding', 'stalledup']:
-                        try:
-                            qb.torrents_pause(hashes=torrent['hash'])
-                            logger.info(f"AUTO-STOP: Paused completed torrent: {torrent['name']}")
-                        except Exception as e:
-                            logger.error(f"Failed to auto-pause torrent {torrent['name']}: {e}")
-            
-            elif DOWNLOAD_CLIENT == 'transmission':
-                transmission = transmissionrpc(host=DL_HOST, port=DL_PORT, username=DL_USERNAME, password=DL_PASSWORD)
-                torrents = transmission.get_torrents()
-                
-                for torrent in torrents:
-                    # Check if torrent is completed and currently seeding
-                    if torrent.progress >= 1.0 and torrent.status.lower() in ['seed', 'seed_wait']:
-                        try:
-                            transmission.stop_torrent(torrent.hashString)
-                            logger.info(f"AUTO-STOP: Stopped completed torrent: {torrent.name}")
-                        except Exception as e:
-                            logger.error(f"Failed to auto-stop torrent {torrent.name}: {e}")
-            
-        except Exception as e:
-            logger.error(f"Auto-stop service error: {e}")
-        
-        # Check every 60 seconds
-        time.sleep(60)
-
-# Global flag to control auto-stop service
-AUTO_STOP_ENABLED = True
-
 def start_auto_stop_service():
     """Start the auto-stop seeding service in a background thread"""
-    if DOWNLOAD_CLIENT and DOWNLOAD_CLIENT != 'none':
-        auto_stop_thread = threading.Thread(target=auto_stop_completed_torrents, daemon=True)
-        auto_stop_thread.start()
-        logger.info("Auto-stop seeding service started")
+    if auto_stop:
+        auto_stop.start()
     else:
         logger.info("Auto-stop service disabled - no download client configured")
 
@@ -2997,22 +2370,43 @@ def start_auto_stop_service():
 @login_required
 def auto_stop_settings():
     """Get or update auto-stop seeding settings"""
-    global AUTO_STOP_ENABLED
-    
+    if not auto_stop:
+        return jsonify({'error': 'Unsupported download client'}), 400
+
+    # Stored policy, shared by every process, over the environment defaults
+    policy = auto_stop.policy()
+    policy.update(get_app_setting('auto_stop') or {})
+
     if request.method == 'POST':
-        data = request.get_json()
-        if 'enabled' in data:
-            AUTO_STOP_ENABLED = data['enabled']
-            status = "enabled" if AUTO_STOP_ENABLED else "disabled" 
-            return jsonify({
-                'success': True,
-                'message': f'Auto-stop seeding {status}',
-                'enabled': AUTO_STOP_ENABLED
-            })
-        else:
+        if not is_admin_user(current_user.username):
+            return jsonify({'error': 'Admin access required'}), 403
+
+        data = request.get_json() or {}
+        if not any(field in data for field in policy):
             return jsonify({'error': 'Missing enabled parameter'}), 400
+
+        if 'enabled' in data:
+            policy['enabled'] = bool(data['enabled'])
+        for field in ('min_ratio', 'min_seeding_time'):
+            if field in data:
+                try:
+                    policy[field] = None if data[field] in (None, '') else float(data[field])
+                except (TypeError, ValueError):
+                    return jsonify({'error': f'{field} must be a number'}), 400
+                if policy[field] is not None and not (math.isfinite(policy[field]) and policy[field] >= 0):
+                    return jsonify({'error': f'{field} must be a non-negative number'}), 400
+
+        if not set_app_setting('auto_stop', policy):
+            return jsonify({'error': 'Failed to save auto-stop settings'}), 500
+        auto_stop.set_policy(policy)
+        status = "enabled" if policy['enabled'] else "disabled"
+        return jsonify({
+            'success': True,
+            'message': f'Auto-stop seeding {status}',
+            **policy
+        })
     
-    return jsonify({'enabled': AUTO_STOP_ENABLED})
+    return jsonify(policy)
 
 
 # Context processor temporarily disabled to avoid performance issues
@@ -3039,7 +2433,7 @@ def browse_by_language(language):
 @login_required
 def popular_books():
     try:
-        books = scrape_homepage()  # Use homepage as popular books proxy
+        books = homepage_snapshot.get(1)  # Use homepage as popular books proxy
         return render_template('category.html', books=books, category='popular', category_name="Popular Books")
     except Exception as e:
         logger.error(f"Failed to load popular books: {e}")
@@ -3050,7 +2444,7 @@ def popular_books():
 @login_required
 def recent_books():
     try:
-        books = scrape_homepage_with_pagination(1)  # Get most recent from homepage
+        books = homepage_snapshot.get(1)  # Get most recent from homepage
         return render_template('category.html', books=books, category='recent', category_name="Recent Books")
     except Exception as e:
         logger.error(f"Failed to load recent books: {e}")
@@ -3065,20 +2459,7 @@ def admin_dashboard():
             return render_template('403.html'), 403
         
         # Get all users and their stats
-        all_users = get_all_users()
-        download_counts = get_all_user_downloads()
-        
-        # Get favorites count for each user
-        favorites_counts = {}
-        for user in all_users:
-            user_favorites = load_user_favorites(user['username'])
-            favorites_counts[user['username']] = len(user_favorites)
-        
-        # Merge data
-        for user in all_users:
-            username = user['username']
-            user['download_count'] = download_counts.get(username, 0)
-            user['favorites_count'] = favorites_counts.get(username, 0)
+        all_users = get_admin_user_stats()
         
         return render_template('admin.html', users=all_users)
     except Exception as e:
@@ -3113,53 +2494,11 @@ def admin_status():
         if not is_admin_user(current_user.username):
             return render_template('403.html'), 403
         
-        # Get ALL torrents for admin view (no user filtering)
-        if DOWNLOAD_CLIENT == 'transmission':
-            transmission = transmissionrpc(host=DL_HOST, port=DL_PORT, username=DL_USERNAME, password=DL_PASSWORD)
-            torrents = transmission.get_torrents()
-            torrent_list = [
-                {
-                    'hash': torrent.hashString,
-                    'name': torrent.name,
-                    'progress': round(torrent.progress, 2),
-                    'state': torrent.status,
-                    'size': f"{torrent.total_size / (1024 * 1024):.2f} MB"
-                }
-                for torrent in torrents
-            ]
-        elif DOWNLOAD_CLIENT == 'qbittorrent':
-            qb = Client(host=DL_HOST, port=DL_PORT, username=DL_USERNAME, password=DL_PASSWORD)
-            qb.auth_log_in()
-            torrents = qb.torrents_info(category=DL_CATEGORY)
-            torrent_list = [
-                {
-                    'hash': torrent.hash,
-                    'name': torrent.name,
-                    'progress': round(torrent.progress * 100, 2),
-                    'state': torrent.state,
-                    'size': f"{torrent.total_size / (1024 * 1024):.2f} MB"
-                }
-                for torrent in torrents
-            ]
-        elif DOWNLOAD_CLIENT == "delugeweb":
-            delugeweb = delugewebclient(url=DL_URL, password=DL_PASSWORD)
-            delugeweb.login()
-            torrents = delugeweb.get_torrents_status(
-                filter_dict={"label": DL_CATEGORY},
-                keys=["name", "state", "progress", "total_size"],
-            )
-            torrent_list = [
-                {
-                    "hash": k,
-                    "name": torrent["name"],
-                    "progress": round(torrent["progress"], 2),
-                    "state": torrent["state"],
-                    "size": f"{torrent['total_size'] / (1024 * 1024):.2f} MB",
-                }
-                for k, torrent in torrents.result.items()
-            ]
-        else:
+        if not download_client:
             return jsonify({'message': 'Unsupported download client'}), 400
+
+        # Get ALL torrents for admin view (no user filtering)
+        torrent_list = [torrent_row(torrent) for torrent in torrent_state.torrents()]
             
         # Add user ownership info to torrents
         detailed_downloads = get_detailed_user_downloads()
@@ -3173,6 +2512,32 @@ def admin_status():
         logger.error(f"Failed to load admin status: {e}")
         return render_template('admin_status.html', torrents=[], error="Failed to load torrent status")
 
+@app.route('/api/admin/stats')
+@login_required
+def admin_stats():
+    """Get internal performance counters (admin only)"""
+    try:
+        if not is_admin_user(current_user.username):
+            return jsonify({'error': 'Admin access required'}), 403
+
+        return jsonify({
+            'http': fetcher.stats(),
+            'mirror': abb_mirror.stats(),
+            'book_cache': book_cache.stats(),
+            'search_cache': search_cache.stats(),
+            'homepage': homepage_snapshot.stats(),
+            'download_client': download_client.stats() if download_client else None,
+            'torrent_state': torrent_state.stats() if torrent_state else None,
+            'auto_stop': auto_stop.stats() if auto_stop else None,
+            'send_queue': send_queue.stats(),
+            'sqlite': pool_stats(),
+            'users': user_cache_stats(),
+            'admin_user_stats': admin_stats_cache.stats()
+        })
+    except Exception as e:
+        logger.error(f"Failed to get admin stats: {e}")
+        return jsonify({'error': str(e)}), 500
+
 if __name__ == '__main__':
     # Initialize authentication database
     logger.info("Initializing authentication database...")
@@ -3181,4 +2546,11 @@ if __name__ == '__main__':
     # Start auto-stop seeding service
     start_auto_stop_service()
 
+    # Start refreshing the homepage snapshot
+    homepage_snapshot.start()
+
+    # Start polling the download client for torrent state
+    if torrent_state:
+        torrent_state.start()
+
     app.run(host='0.0.0.0', port=5078)
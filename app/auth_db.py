@@ -8,36 +8,47 @@ import logging
 from pathlib import Path
 from werkzeug.security import generate_password_hash, check_password_hash
 
+try:
+    from app.db import connection
+    from app.cache import TTLCache
+except ModuleNotFoundError:
+    from db import connection
+    from cache import TTLCache
+
 logger = logging.getLogger(__name__)
 
 # Database path
 AUTH_DB_PATH = os.path.join(os.path.dirname(__file__), 'users.db')
 
+# Seconds a looked-up user is reused before users.db is asked again
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 60))
+
+# Users by username; dropped when a user is created
+user_cache = TTLCache(ttl=USER_CACHE_TTL, maxsize=1024)
+
 def init_auth_db():
     """Initialize the authentication database with users table"""
     try:
-        conn = sqlite3.connect(AUTH_DB_PATH)
-        cursor = conn.cursor()
-
-        # Create users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                user_type TEXT DEFAULT 'user',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_login TIMESTAMP
-            )
-        ''')
-
-        # Create index on username for faster lookups
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_username ON users(username)
-        ''')
+        with connection(AUTH_DB_PATH) as conn:
+            cursor = conn.cursor()
+
+            # Create users table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT UNIQUE NOT NULL,
+                    password_hash TEXT NOT NULL,
+                    user_type TEXT DEFAULT 'user',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_login TIMESTAMP
+                )
+            ''')
+
+            # Create index on username for faster lookups
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_username ON users(username)
+            ''')
 
-        conn.commit()
-        conn.close()
         logger.info(f"Authentication database initialized at {AUTH_DB_PATH}")
         return True
     except Exception as e:
@@ -89,24 +100,22 @@ def create_user(username, password, user_type='user'):
         return False, "Username must be at least 3 characters"
 
     try:
-        conn = sqlite3.connect(AUTH_DB_PATH)
-        cursor = conn.cursor()
-
-        # Check if username already exists
-        cursor.execute('SELECT id FROM users WHERE username = ?', (username,))
-        if cursor.fetchone():
-            conn.close()
-            return False, "Username already exists"
-
-        # Hash password and insert user
-        password_hash = hash_password(password)
-        cursor.execute(
-            'INSERT INTO users (username, password_hash, user_type) VALUES (?, ?, ?)',
-            (username, password_hash, user_type)
-        )
-
-        conn.commit()
-        conn.close()
+        with connection(AUTH_DB_PATH) as conn:
+            cursor = conn.cursor()
+
+            # Check if username already exists
+            cursor.execute('SELECT id FROM users WHERE username = ?', (username,))
+            if cursor.fetchone():
+                return False, "Username already exists"
+
+            # Hash password and insert user
+            password_hash = hash_password(password)
+            cursor.execute(
+                'INSERT INTO users (username, password_hash, user_type) VALUES (?, ?, ?)',
+                (username, password_hash, user_type)
+            )
+
+        user_cache.pop(username)
         logger.info(f"User created successfully: {username}")
         return True, "User created successfully"
     except sqlite3.IntegrityError:
@@ -132,41 +141,39 @@ def authenticate_user(username, password):
         return None
 
     try:
-        conn = sqlite3.connect(AUTH_DB_PATH)
-        cursor = conn.cursor()
-
-        # Fetch user
-        cursor.execute(
-            'SELECT id, username, password_hash, user_type FROM users WHERE username = ?',
-            (username,)
-        )
-        user = cursor.fetchone()
-
-        if not user:
-            conn.close()
-            logger.debug(f"User not found: {username}")
-            return None
-
-        user_id, db_username, password_hash, user_type = user
-
-        # Verify password
-        if verify_password(password, password_hash):
-            # Update last login
+        with connection(AUTH_DB_PATH) as conn:
+            cursor = conn.cursor()
+
+            # Fetch user
             cursor.execute(
-                'UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?',
-                (user_id,)
+                'SELECT id, username, password_hash, user_type FROM users WHERE username = ?',
+                (username,)
             )
-            conn.commit()
-            conn.close()
+            user = cursor.fetchone()
+
+            if not user:
+                logger.debug(f"User not found: {username}")
+                return None
+
+            user_id, db_username, password_hash, user_type = user
+
+            # Verify password
+            if verify_password(password, password_hash):
+                # Update last login
+                cursor.execute(
+                    'UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?',
+                    (user_id,)
+                )
+
+                logger.info(f"User authenticated successfully: {username}")
+                user_data = {
+                    'id': user_id,
+                    'username': db_username,
+                    'type': user_type
+                }
+                user_cache.set(db_username, user_data)
+                return dict(user_data)
 
-            logger.info(f"User authenticated successfully: {username}")
-            return {
-                'id': user_id,
-                'username': db_username,
-                'type': user_type
-            }
-
-        conn.close()
         logger.debug(f"Invalid password for user: {username}")
         return None
     except Exception as e:
@@ -177,11 +184,10 @@ def authenticate_user(username, password):
 def get_user_count():
     """Get total number of registered users"""
     try:
-        conn = sqlite3.connect(AUTH_DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM users')
-        count = cursor.fetchone()[0]
-        conn.close()
+        with connection(AUTH_DB_PATH) as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM users')
+            count = cursor.fetchone()[0]
         return count
     except Exception as e:
         logger.error(f"Error getting user count: {e}")
@@ -191,11 +197,10 @@ def get_user_count():
 def user_exists(username):
     """Check if a username already exists"""
     try:
-        conn = sqlite3.connect(AUTH_DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('SELECT id FROM users WHERE username = ?', (username,))
-        exists = cursor.fetchone() is not None
-        conn.close()
+        with connection(AUTH_DB_PATH) as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT id FROM users WHERE username = ?', (username,))
+            exists = cursor.fetchone() is not None
         return exists
     except Exception as e:
         logger.error(f"Error checking user existence: {e}")
@@ -206,6 +211,8 @@ def get_user_by_username(username):
     """
     Get user data by username for Flask-Login user_loader
 
+    Found users are cached for USER_CACHE_TTL seconds.
+
     Args:
         username: Username to look up
 
@@ -216,24 +223,29 @@ def get_user_by_username(username):
     if not username:
         return None
 
+    cached = user_cache.get(username)
+    if cached:
+        return dict(cached)
+
     try:
-        conn = sqlite3.connect(AUTH_DB_PATH)
-        cursor = conn.cursor()
+        with connection(AUTH_DB_PATH) as conn:
+            cursor = conn.cursor()
 
-        cursor.execute(
-            'SELECT id, username, user_type FROM users WHERE username = ?',
-            (username,)
-        )
-        user = cursor.fetchone()
-        conn.close()
+            cursor.execute(
+                'SELECT id, username, user_type FROM users WHERE username = ?',
+                (username,)
+            )
+            user = cursor.fetchone()
 
         if user:
             user_id, db_username, user_type = user
-            return {
+            user_data = {
                 'id': user_id,
                 'username': db_username,
                 'type': user_type
             }
+            user_cache.set(username, user_data)
+            return dict(user_data)
 
         return None
     except Exception as e:
@@ -269,14 +281,13 @@ def get_all_users():
         list: List of user dictionaries with username, type, and timestamps
     """
     try:
-        conn = sqlite3.connect(AUTH_DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute(
-            'SELECT username, user_type, created_at, last_login FROM users ORDER BY username'
-        )
-        users = cursor.fetchall()
-        conn.close()
+        with connection(AUTH_DB_PATH) as conn:
+            cursor = conn.cursor()
+
+            cursor.execute(
+                'SELECT username, user_type, created_at, last_login FROM users ORDER BY username'
+            )
+            users = cursor.fetchall()
 
         return [
             {
@@ -0,0 +1,212 @@
+"""
+Auto-stop seeding for AudiobookBay
+Pauses torrents once they finish downloading, driven by changes in the shared torrent state
+"""
+import os
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _optional_float(name):
+    value = os.getenv(name, '').strip()
+    return float(value) if value else None
+
+
+# Seeding policy: keep seeding until the ratio or the seeding time (seconds) is reached,
+# whichever comes first. With neither set, torrents are paused as soon as they complete.
+AUTO_STOP_MIN_RATIO = _optional_float("AUTO_STOP_MIN_RATIO")
+AUTO_STOP_MIN_SEEDING_TIME = _optional_float("AUTO_STOP_MIN_SEEDING_TIME")
+
+# Seconds between re-checks of completed torrents still seeding towards the policy
+AUTO_STOP_RECHECK_INTERVAL = 30
+
+# Seconds a process keeps the auto-stop lease without renewing it
+AUTO_STOP_LEASE_TTL = 3 * AUTO_STOP_RECHECK_INTERVAL
+
+POLICY_FIELDS = ('enabled', 'min_ratio', 'min_seeding_time')
+
+
+class AutoStop:
+    """
+    Pauses completed torrents according to a seeding policy
+
+    A daemon thread waits on TorrentState.wait_for_changes and only looks at
+    torrents that changed since the last version it saw, so the cost per
+    wake-up is the size of the delta rather than the whole library. Torrents
+    that finished but have not met the policy yet are kept in a small pending
+    set and re-checked every AUTO_STOP_RECHECK_INTERVAL seconds. Everything
+    due in one wake-up is paused with a single batched client call.
+
+    Only torrents in category are touched. When several processes run, pass
+    acquire_lease so that only the one holding the lease pauses anything, and
+    load_policy so every process follows the policy stored in the database.
+    """
+
+    def __init__(self, state, backend, category=None, min_ratio=AUTO_STOP_MIN_RATIO,
+                 min_seeding_time=AUTO_STOP_MIN_SEEDING_TIME, enabled=True,
+                 load_policy=None, acquire_lease=None):
+        self.state = state
+        self.backend = backend
+        self.category = category
+        self.min_ratio = min_ratio
+        self.min_seeding_time = min_seeding_time
+        self.enabled = enabled
+        self.load_policy = load_policy
+        self.acquire_lease = acquire_lease
+        self.leader = acquire_lease is None
+        self._pending = set()
+        self._pausing = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.handled = 0
+        self.batches = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_latency_ms = None
+        self._latency_total_ms = 0
+
+    def start(self):
+        """Start the auto-stop worker if it is not already running"""
+        with self._lock:
+            if self._thread:
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        logger.info(f"Auto-stop service started (ratio {self.min_ratio}, seeding time {self.min_seeding_time})")
+
+    def _run(self):
+        version = None
+        while True:
+            try:
+                if self.acquire_lease:
+                    leader = self.acquire_lease()
+                    if leader != self.leader:
+                        logger.info(f"Auto-stop {'took over as' if leader else 'is no longer'} the leader")
+                        self.leader = leader
+                        version = None
+                    if not leader:
+                        time.sleep(AUTO_STOP_RECHECK_INTERVAL)
+                        continue
+                if self.load_policy:
+                    self.apply_policy(self.load_policy())
+                if version is None:
+                    # Start with one pass over everything, then follow the changes
+                    version, torrents = self.state.snapshot()
+                    self.check(torrents)
+                    continue
+                version, changed, removed = self.state.wait_for_changes(version, timeout=AUTO_STOP_RECHECK_INTERVAL)
+                self.forget(removed)
+                self.check(changed, recheck_pending=True)
+            except Exception as e:
+                logger.error(f"Auto-stop service error: {e}")
+                time.sleep(AUTO_STOP_RECHECK_INTERVAL)
+
+    def policy(self):
+        return {field: getattr(self, field) for field in POLICY_FIELDS}
+
+    def apply_policy(self, policy):
+        """Update the fields present in a policy dict"""
+        for field in POLICY_FIELDS:
+            if policy and field in policy:
+                setattr(self, field, policy[field])
+
+    def set_policy(self, policy):
+        """Change the policy; the leader checks every cached torrent against it straight away"""
+        self.apply_policy(policy)
+        if self.enabled and self.leader:
+            self.check(self.state.torrents())
+
+    def policy_met(self, torrent):
+        """Whether a completed torrent has seeded enough to be paused"""
+        if self.min_ratio is None and self.min_seeding_time is None:
+            return True
+        if self.min_ratio is not None and (torrent.get('ratio') or 0) >= self.min_ratio:
+            return True
+        if self.min_seeding_time is not None and (torrent.get('seeding_time') or 0) >= self.min_seeding_time:
+            return True
+        return False
+
+    def forget(self, hashes):
+        with self._lock:
+            for torrent_hash in hashes:
+                self._pending.discard(torrent_hash)
+                self._pausing.discard(torrent_hash)
+
+    def check(self, torrents, recheck_pending=False):
+        """Pause the given torrents that are seeding and have met the policy"""
+        started = time.perf_counter()
+        with self._lock:
+            candidates = {torrent['hash']: torrent for torrent in torrents}
+            if recheck_pending:
+                for torrent_hash in self._pending - candidates.keys():
+                    torrent = self.state.get(torrent_hash)
+                    if torrent:
+                        candidates[torrent_hash] = torrent
+
+            due = []
+            for torrent_hash, torrent in candidates.items():
+                if self.category and torrent.get('category') != self.category:
+                    continue
+                if not (torrent['completed'] and torrent['state'] == 'seeding'):
+                    # Left seeding - paused by us or someone else, or re-checking
+                    self._pending.discard(torrent_hash)
+                    self._pausing.discard(torrent_hash)
+                    continue
+                if torrent_hash in self._pausing:
+                    continue
+                if self.enabled and self.policy_met(torrent):
+                    self._pending.discard(torrent_hash)
+                    self._pausing.add(torrent_hash)
+                    due.append(torrent)
+                else:
+                    self._pending.add(torrent_hash)
+
+        if due:
+            self._pause(due, started)
+
+    def _pause(self, torrents, started):
+        hashes = [torrent['hash'] for torrent in torrents]
+        try:
+            self.backend.pause_many(hashes)
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+                self.last_error = str(e)
+                # Retry with the pending torrents on the next re-check
+                self._pausing.difference_update(hashes)
+                self._pending.update(hashes)
+            logger.error(f"Failed to auto-pause {len(hashes)} torrents: {e}")
+            return
+
+        latency_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.handled += len(hashes)
+            self.batches += 1
+            self.last_error = None
+            self.last_latency_ms = round(latency_ms, 1)
+            self._latency_total_ms += latency_ms
+        self.state.refresh_soon()
+        for torrent in torrents:
+            logger.info(f"AUTO-STOP: Paused completed torrent: {torrent['name']}")
+
+    def stats(self):
+        """Get the policy, torrents handled and the latency from spotting a due torrent to it being paused"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'min_ratio': self.min_ratio,
+                'min_seeding_time': self.min_seeding_time,
+                'category': self.category,
+                'running': self._thread is not None,
+                'leader': self.leader,
+                'pending': len(self._pending),
+                'handled': self.handled,
+                'batches': self.batches,
+                'failures': self.failures,
+                'last_error': self.last_error,
+                'last_latency_ms': self.last_latency_ms,
+                'avg_latency_ms': round(self._latency_total_ms / self.batches, 1) if self.batches else None
+            }
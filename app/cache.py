@@ -0,0 +1,150 @@
+"""
+In-memory caches shared across request handlers
+"""
+import time
+import threading
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe mapping whose entries expire after a TTL, bounded by LRU eviction"""
+
+    def __init__(self, ttl, maxsize):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if it is missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or time.time() - entry[1] >= self.ttl:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entries past maxsize"""
+        with self._lock:
+            self._data[key] = (value, time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        """Remove key and return its value"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return entry[0] if entry else default
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self):
+        """
+        Get cache counters
+
+        Returns:
+            dict: Size, bounds and hit/miss/eviction counts
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None
+            }
+
+
+class RefreshingCache(TTLCache):
+    """
+    TTLCache that serves stale entries while refreshing them in the background
+
+    Entries younger than ttl are fresh. Entries older than that but younger
+    than ttl + stale_ttl are returned immediately and reloaded by a background
+    thread; anything older is loaded inline like a plain miss.
+    """
+
+    def __init__(self, ttl, maxsize, stale_ttl):
+        super().__init__(ttl, maxsize)
+        self.stale_ttl = stale_ttl
+        self._refreshing = set()
+        self.stale_hits = 0
+        self.refreshes = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for key if it is fresh, without refreshing"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or time.time() - entry[1] >= self.ttl:
+                return default
+            return entry[0]
+
+    def get_or_load(self, key, loader):
+        """
+        Return the value for key, calling loader() on a miss
+
+        Falsy results from loader are returned but not cached, so a failed
+        upstream fetch is retried on the next call.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            age = time.time() - entry[1] if entry else None
+            if entry is not None and age < self.ttl:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None and age < self.ttl + self.stale_ttl:
+                self._data.move_to_end(key)
+                self.stale_hits += 1
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    threading.Thread(target=self._refresh, args=(key, loader), daemon=True).start()
+                return entry[0]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+
+        value = loader()
+        if value:
+            self.set(key, value)
+        return value
+
+    def _refresh(self, key, loader):
+        try:
+            value = loader()
+            if value:
+                self.set(key, value)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+                self.refreshes += 1
+
+    def stats(self):
+        stats = super().stats()
+        with self._lock:
+            stats['stale_ttl'] = self.stale_ttl
+            stats['stale_hits'] = self.stale_hits
+            stats['refreshes'] = self.refreshes
+            served = self.hits + self.stale_hits
+            lookups = served + self.misses
+            stats['hit_rate'] = round(served / lookups, 3) if lookups else None
+        return stats
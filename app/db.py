@@ -0,0 +1,86 @@
+"""
+SQLite access for AudiobookBay
+Pooled connections with WAL journaling, shared by the auth and application databases
+"""
+import os
+import queue
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Seconds a statement waits for a lock held by another connection before failing
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", 5))
+
+# Page cache per connection in KiB, and idle connections kept per database
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", 8192))
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", 8))
+
+_pools = {}
+_pools_lock = threading.Lock()
+_stats = {'opened': 0, 'reused': 0, 'discarded': 0}
+
+
+def _open(path):
+    conn = sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False)
+    # WAL lets readers run alongside a writer; NORMAL sync is durable in WAL mode except on power loss
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT * 1000)}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def _count(name):
+    with _pools_lock:
+        _stats[name] += 1
+
+
+def _pool(path):
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = queue.LifoQueue(maxsize=SQLITE_POOL_SIZE)
+        return pool
+
+
+@contextmanager
+def connection(path):
+    """
+    Borrow a pooled connection to the database at path
+
+    Commits when the block exits normally and rolls back if it raises. The
+    connection goes back to the pool afterwards, so callers must not close it.
+    Each connection is used by one thread at a time.
+    """
+    pool = _pool(path)
+    try:
+        conn = pool.get_nowait()
+        _count('reused')
+    except queue.Empty:
+        conn = _open(path)
+        _count('opened')
+
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.row_factory = None
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+            _count('discarded')
+
+
+def pool_stats():
+    """Get pool counters and idle connections per database file"""
+    with _pools_lock:
+        idle = {os.path.basename(path): pool.qsize() for path, pool in _pools.items()}
+    return dict(_stats, idle=idle)
@@ -0,0 +1,636 @@
+"""
+Download client backends
+One interface over qBittorrent, Transmission and Deluge, each keeping a single
+authenticated session shared across request threads
+"""
+import re
+import sys
+import time
+import threading
+import logging
+from qbittorrentapi import Client, Forbidden403Error, Unauthorized401Error, HTTP4XXError
+from transmission_rpc import Client as transmissionrpc, TransmissionAuthError, TransmissionConnectError
+from deluge_web_client import DelugeWebClient as delugewebclient
+from deluge_web_client.exceptions import DelugeWebClientError, DelugeWebClientConnectionError, DelugeWebClientTimeoutError
+from requests import RequestException, HTTPError
+
+logger = logging.getLogger(__name__)
+
+# Errors from any backend that mean the client could not be reached, rather than that it refused the request
+CONNECTION_ERRORS = (
+    RequestException, ConnectionError, TimeoutError,
+    TransmissionConnectError, DelugeWebClientConnectionError, DelugeWebClientTimeoutError
+)
+
+
+def is_connection_error(error):
+    """Whether a backend error means the client could not be reached, so the call may succeed later"""
+    if isinstance(error, HTTP4XXError):
+        return False
+    if isinstance(error, HTTPError) and error.response is not None:
+        return error.response.status_code >= 500
+    return isinstance(error, CONNECTION_ERRORS)
+
+
+class ClientConnection:
+    """
+    One authenticated download-client session shared across threads
+
+    The client is created and logged in on first use and then reused. A call
+    that fails because the session expired reconnects once and is retried;
+    any other error is raised to the caller.
+    """
+
+    def __init__(self, name, connect, is_auth_error):
+        self.name = name
+        self._connect = connect
+        self._is_auth_error = is_auth_error
+        self._client = None
+        self._lock = threading.Lock()
+        self.logins = 0
+        self.calls = 0
+        self.reauths = 0
+
+    def client(self):
+        """Get the shared client, logging in if there is no session yet"""
+        with self._lock:
+            if self._client is None:
+                self._client = self._connect()
+                self.logins += 1
+                logger.info(f"Connected to {self.name}")
+            return self._client
+
+    def _reconnect(self, stale):
+        with self._lock:
+            # Another thread may have already replaced the expired session
+            if self._client is stale:
+                logger.info(f"{self.name} session expired, logging in again")
+                self._client = None
+                self._client = self._connect()
+                self.logins += 1
+                self.reauths += 1
+            return self._client
+
+    def call(self, fn):
+        """
+        Run fn(client) against the shared session
+
+        Args:
+            fn: Callable taking the backend client
+
+        Returns:
+            The return value of fn
+        """
+        client = self.client()
+        with self._lock:
+            self.calls += 1
+        try:
+            return fn(client)
+        except Exception as e:
+            if not self._is_auth_error(e):
+                raise
+            return fn(self._reconnect(client))
+
+    def reset(self):
+        """Drop the session so the next call logs in again"""
+        with self._lock:
+            self._client = None
+
+    def stats(self):
+        """Get login and call counters"""
+        with self._lock:
+            return {
+                'client': self.name,
+                'connected': self._client is not None,
+                'logins': self.logins,
+                'reauths': self.reauths,
+                'calls': self.calls
+            }
+
+
+# Normalised torrent states, shared by every backend
+DOWNLOADING = 'downloading'
+SEEDING = 'seeding'
+PAUSED = 'paused'
+COMPLETED = 'completed'
+QUEUED = 'queued'
+CHECKING = 'checking'
+ERROR = 'error'
+
+QBITTORRENT_STATES = {
+    'downloading': DOWNLOADING, 'forcedDL': DOWNLOADING, 'metaDL': DOWNLOADING,
+    'forcedMetaDL': DOWNLOADING, 'stalledDL': DOWNLOADING, 'allocating': DOWNLOADING,
+    'uploading': SEEDING, 'forcedUP': SEEDING, 'stalledUP': SEEDING,
+    'pausedDL': PAUSED, 'stoppedDL': PAUSED,
+    'pausedUP': COMPLETED, 'stoppedUP': COMPLETED,
+    'queuedDL': QUEUED, 'queuedUP': QUEUED,
+    'checkingDL': CHECKING, 'checkingUP': CHECKING, 'checkingResumeData': CHECKING, 'moving': CHECKING,
+    'error': ERROR, 'missingFiles': ERROR
+}
+
+TRANSMISSION_STATES = {
+    0: PAUSED, 1: CHECKING, 2: CHECKING, 3: QUEUED, 4: DOWNLOADING, 5: QUEUED, 6: SEEDING
+}
+
+DELUGE_STATES = {
+    'Downloading': DOWNLOADING, 'Seeding': SEEDING, 'Paused': PAUSED, 'Queued': QUEUED,
+    'Checking': CHECKING, 'Moving': CHECKING, 'Allocating': CHECKING, 'Error': ERROR
+}
+
+BTIH_PATTERN = re.compile(r'btih:([0-9a-zA-Z]+)')
+
+
+def magnet_hash(magnet_link):
+    """Info hash from a magnet link, lowercased, or None"""
+    match = BTIH_PATTERN.search(magnet_link or '')
+    return match.group(1).lower() if match else None
+
+
+def make_torrent(torrent_hash, name, progress, state, client_state, size=0, downloaded=0,
+                 upload_speed=0, download_speed=0, eta=-1, ratio=0.0, category='', seeding_time=0):
+    """
+    Build a normalised torrent record
+
+    progress is a percentage from 0 to 100 for every backend. A torrent that has
+    finished downloading and is paused reports the completed state.
+    """
+    if state == PAUSED and progress >= 100:
+        state = COMPLETED
+    return {
+        'hash': torrent_hash.lower(),
+        'name': name,
+        'progress': progress,
+        'state': state,
+        'client_state': client_state,
+        'completed': progress >= 100,
+        'size': size or 0,
+        'downloaded': downloaded or 0,
+        'upload_speed': upload_speed or 0,
+        'download_speed': download_speed or 0,
+        'eta': eta if eta is not None else -1,
+        'ratio': ratio or 0.0,
+        'category': category or '',
+        'seeding_time': seeding_time or 0
+    }
+
+
+def _as_list(hashes):
+    return [hashes] if isinstance(hashes, str) else list(hashes)
+
+
+class DownloadBackend:
+    """
+    Common interface for download clients
+
+    Every torrent is returned as a make_torrent record. Bulk methods take a
+    list of hashes and issue one client call; the single-hash methods are
+    shorthands for them.
+    """
+
+    name = None
+
+    def __init__(self, connection=None):
+        self.connection = connection
+
+    def add(self, magnet_link, save_path, category=None):
+        """Add a magnet link and return its info hash, or None if unknown"""
+        raise NotImplementedError
+
+    def list(self, category=None):
+        """List torrents, limited to category where the client supports one"""
+        raise NotImplementedError
+
+    def info(self, torrent_hash):
+        """Get one torrent, or None if the client does not have it"""
+        raise NotImplementedError
+
+    def sync(self, category=None):
+        """
+        Get torrent changes since the previous sync
+
+        Backends without an incremental API return a full listing every time.
+
+        Returns:
+            tuple: (changed records, removed hashes, full) where full means the
+                   changed records replace all previously synced state
+        """
+        return self.list(category=category), [], True
+
+    def pause_many(self, hashes):
+        raise NotImplementedError
+
+    def resume_many(self, hashes):
+        raise NotImplementedError
+
+    def delete_many(self, hashes, delete_files=False):
+        raise NotImplementedError
+
+    def pause(self, torrent_hash):
+        return self.pause_many([torrent_hash])
+
+    def resume(self, torrent_hash):
+        return self.resume_many([torrent_hash])
+
+    def delete(self, torrent_hash, delete_files=False):
+        return self.delete_many([torrent_hash], delete_files=delete_files)
+
+    def stats(self):
+        """Get connection counters"""
+        return self.connection.stats() if self.connection else {'client': self.name}
+
+
+class QBittorrentBackend(DownloadBackend):
+    """sync() follows the sync/maindata rid cursor and merges only changed fields"""
+
+    name = 'qbittorrent'
+
+    def __init__(self, connection=None):
+        super().__init__(connection)
+        self._sync_lock = threading.Lock()
+        self._rid = 0
+        self._table = {}
+
+    @staticmethod
+    def _torrent(torrent):
+        progress = round(torrent.get('progress', 0) * 100, 2)
+        return make_torrent(
+            torrent['hash'], torrent.get('name', ''), progress,
+            QBITTORRENT_STATES.get(torrent.get('state'), torrent.get('state', '')), torrent.get('state', ''),
+            size=torrent.get('total_size', torrent.get('size')), downloaded=torrent.get('downloaded'),
+            upload_speed=torrent.get('upspeed'), download_speed=torrent.get('dlspeed'),
+            eta=torrent.get('eta'), ratio=torrent.get('ratio'), category=torrent.get('category'),
+            seeding_time=torrent.get('seeding_time')
+        )
+
+    def add(self, magnet_link, save_path, category=None):
+        self.connection.call(lambda qb: qb.torrents_add(urls=magnet_link, save_path=save_path, category=category))
+        return magnet_hash(magnet_link)
+
+    def list(self, category=None):
+        torrents = self.connection.call(lambda qb: qb.torrents_info(category=category))
+        return [self._torrent(torrent) for torrent in torrents]
+
+    def info(self, torrent_hash):
+        torrents = self.connection.call(lambda qb: qb.torrents_info(torrent_hashes=torrent_hash))
+        return self._torrent(torrents[0]) if torrents else None
+
+    def sync(self, category=None):
+        with self._sync_lock:
+            try:
+                data = self.connection.call(lambda qb: qb.sync_maindata(rid=self._rid))
+            except Exception:
+                # Start again from a full update once the client is reachable
+                self._rid = 0
+                raise
+
+            full = bool(data.get('full_update'))
+            if full:
+                self._table = {}
+
+            changed, removed = [], []
+            for torrent_hash, fields in (data.get('torrents') or {}).items():
+                row = self._table.setdefault(torrent_hash, {'hash': torrent_hash})
+                row.update(fields)
+                if category and row.get('category') != category:
+                    removed.append(torrent_hash)
+                else:
+                    changed.append(self._torrent(row))
+            for torrent_hash in data.get('torrents_removed') or []:
+                self._table.pop(torrent_hash, None)
+                removed.append(torrent_hash)
+
+            self._rid = data.get('rid', 0)
+            return changed, removed, full
+
+    def pause_many(self, hashes):
+        self.connection.call(lambda qb: qb.torrents_pause(torrent_hashes=_as_list(hashes)))
+
+    def resume_many(self, hashes):
+        self.connection.call(lambda qb: qb.torrents_resume(torrent_hashes=_as_list(hashes)))
+
+    def delete_many(self, hashes, delete_files=False):
+        self.connection.call(lambda qb: qb.torrents_delete(torrent_hashes=_as_list(hashes), delete_files=delete_files))
+
+
+class TransmissionBackend(DownloadBackend):
+    """
+    Transmission has no categories, so list() always returns every torrent.
+    New torrents are labelled with the category instead (RPC 17 and later),
+    which is reported back as the torrent's category.
+
+    sync() asks only for recently-active torrents. Transmission counts a
+    torrent as recently active for about a minute, so a full listing is taken
+    whenever the previous sync is older than that.
+    """
+
+    name = 'transmission'
+
+    # Seconds Transmission reports a torrent as recently active
+    RECENTLY_ACTIVE_WINDOW = 50
+
+    def __init__(self, connection=None):
+        super().__init__(connection)
+        self._sync_lock = threading.Lock()
+        self._synced_at = 0
+        self._ids = {}
+
+    FIELDS = ['id', 'hashString', 'name', 'percentDone', 'status', 'totalSize', 'downloadedEver',
+              'rateUpload', 'rateDownload', 'eta', 'uploadRatio', 'secondsSeeding', 'labels']
+
+    @staticmethod
+    def _torrent(torrent):
+        fields = torrent.fields
+        status = fields.get('status')
+        return make_torrent(
+            fields['hashString'], fields.get('name', ''), round(fields.get('percentDone', 0) * 100, 2),
+            TRANSMISSION_STATES.get(status, str(status)), torrent.status.value if status is not None else '',
+            size=fields.get('totalSize'), downloaded=fields.get('downloadedEver'),
+            upload_speed=fields.get('rateUpload'), download_speed=fields.get('rateDownload'),
+            eta=fields.get('eta'), ratio=fields.get('uploadRatio'), seeding_time=fields.get('secondsSeeding'),
+            category=(fields.get('labels') or [''])[0]
+        )
+
+    def add(self, magnet_link, save_path, category=None):
+        def add(transmission):
+            labels = [category] if category and transmission.rpc_version >= 17 else None
+            return transmission.add_torrent(magnet_link, download_dir=save_path, labels=labels)
+
+        result = self.connection.call(add)
+        torrent_hash = getattr(result, 'hashString', None)
+        return torrent_hash.lower() if torrent_hash else magnet_hash(magnet_link)
+
+    def list(self, category=None):
+        torrents = self.connection.call(lambda transmission: transmission.get_torrents(arguments=self.FIELDS))
+        return [self._torrent(torrent) for torrent in torrents]
+
+    def info(self, torrent_hash):
+        torrents = self.connection.call(lambda transmission: transmission.get_torrents(ids=[torrent_hash], arguments=self.FIELDS))
+        return self._torrent(torrents[0]) if torrents else None
+
+    def sync(self, category=None):
+        with self._sync_lock:
+            started = time.time()
+            if started - self._synced_at > self.RECENTLY_ACTIVE_WINDOW:
+                torrents = self.connection.call(lambda transmission: transmission.get_torrents(arguments=self.FIELDS))
+                self._ids = {torrent.fields['id']: torrent.fields['hashString'].lower() for torrent in torrents}
+                self._synced_at = started
+                return [self._torrent(torrent) for torrent in torrents], [], True
+
+            torrents, removed_ids = self.connection.call(
+                lambda transmission: transmission.get_recently_active_torrents(arguments=self.FIELDS))
+            for torrent in torrents:
+                self._ids[torrent.fields['id']] = torrent.fields['hashString'].lower()
+            removed = [self._ids.pop(torrent_id) for torrent_id in removed_ids if torrent_id in self._ids]
+            self._synced_at = started
+            return [self._torrent(torrent) for torrent in torrents], removed, False
+
+    def pause_many(self, hashes):
+        self.connection.call(lambda transmission: transmission.stop_torrent(_as_list(hashes)))
+
+    def resume_many(self, hashes):
+        self.connection.call(lambda transmission: transmission.start_torrent(_as_list(hashes)))
+
+    def delete_many(self, hashes, delete_files=False):
+        self.connection.call(lambda transmission: transmission.remove_torrent(_as_list(hashes), delete_data=delete_files))
+
+
+class DelugeBackend(DownloadBackend):
+    """Deluge filters on the label plugin's label in place of a category"""
+
+    name = 'delugeweb'
+
+    KEYS = ['name', 'state', 'progress', 'total_size', 'total_done', 'upload_payload_rate',
+            'download_payload_rate', 'eta', 'ratio', 'label', 'seeding_time']
+
+    @staticmethod
+    def _torrent(torrent_hash, torrent):
+        return make_torrent(
+            torrent_hash, torrent.get('name', ''), round(torrent.get('progress', 0), 2),
+            DELUGE_STATES.get(torrent.get('state'), torrent.get('state', '')), torrent.get('state', ''),
+            size=torrent.get('total_size'), downloaded=torrent.get('total_done'),
+            upload_speed=torrent.get('upload_payload_rate'), download_speed=torrent.get('download_payload_rate'),
+            eta=torrent.get('eta'), ratio=torrent.get('ratio'), category=torrent.get('label'),
+            seeding_time=torrent.get('seeding_time')
+        )
+
+    def _call(self, method, *params):
+        payload = {"method": method, "params": list(params), "id": 1}
+        return self.connection.call(lambda delugeweb: delugeweb.execute_call(payload)).result
+
+    def add(self, magnet_link, save_path, category=None):
+        result = self.connection.call(
+            lambda delugeweb: delugeweb.add_torrent_magnet(magnet_link, save_directory=save_path, label=category))
+        torrent_hash = getattr(result, 'result', None)
+        return torrent_hash.lower() if isinstance(torrent_hash, str) else magnet_hash(magnet_link)
+
+    def list(self, category=None):
+        filter_dict = {"label": category} if category else {}
+        torrents = self._call("core.get_torrents_status", filter_dict, self.KEYS) or {}
+        return [self._torrent(torrent_hash, torrent) for torrent_hash, torrent in torrents.items()]
+
+    def info(self, torrent_hash):
+        torrent = self._call("core.get_torrent_status", torrent_hash, self.KEYS)
+        return self._torrent(torrent_hash, torrent) if torrent else None
+
+    def pause_many(self, hashes):
+        self._call("core.pause_torrents", _as_list(hashes))
+
+    def resume_many(self, hashes):
+        self._call("core.resume_torrents", _as_list(hashes))
+
+    def delete_many(self, hashes, delete_files=False):
+        self._call("core.remove_torrents", _as_list(hashes), delete_files)
+
+
+class FakeBackend(DownloadBackend):
+    """
+    In-process download client for benchmarks and development
+
+    Torrents live in a dict and every call sleeps for latency seconds to
+    stand in for the client round trip. advance() moves download progress on.
+    """
+
+    name = 'fake'
+
+    def __init__(self, latency=0.0):
+        super().__init__()
+        self.latency = latency
+        self._torrents = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _round_trip(self):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def add(self, magnet_link, save_path, category=None):
+        self._round_trip()
+        torrent_hash = magnet_hash(magnet_link)
+        with self._lock:
+            self._torrents.setdefault(torrent_hash, {
+                'name': save_path.rstrip('/').rsplit('/', 1)[-1], 'progress': 0.0,
+                'state': DOWNLOADING, 'size': 100 * 1024 * 1024, 'category': category or '', 'seeding_time': 0
+            })
+        return torrent_hash
+
+    def advance(self, torrent_hash, progress):
+        """Set download progress (0-100); reaching 100 starts seeding"""
+        with self._lock:
+            torrent = self._torrents[torrent_hash]
+            torrent['progress'] = min(progress, 100.0)
+            if torrent['progress'] >= 100 and torrent['state'] == DOWNLOADING:
+                torrent['state'] = SEEDING
+
+    def _torrent(self, torrent_hash, torrent):
+        return make_torrent(
+            torrent_hash, torrent['name'], torrent['progress'], torrent['state'], torrent['state'],
+            size=torrent['size'], downloaded=int(torrent['size'] * torrent['progress'] / 100),
+            category=torrent['category'], seeding_time=torrent['seeding_time']
+        )
+
+    def list(self, category=None):
+        self._round_trip()
+        with self._lock:
+            return [self._torrent(torrent_hash, torrent) for torrent_hash, torrent in self._torrents.items()
+                    if not category or torrent['category'] == category]
+
+    def info(self, torrent_hash):
+        self._round_trip()
+        with self._lock:
+            torrent = self._torrents.get(torrent_hash)
+            return self._torrent(torrent_hash, torrent) if torrent else None
+
+    def _set_state(self, hashes, state):
+        self._round_trip()
+        with self._lock:
+            for torrent_hash in _as_list(hashes):
+                torrent = self._torrents.get(torrent_hash)
+                if torrent:
+                    torrent['state'] = state
+
+    def pause_many(self, hashes):
+        self._set_state(hashes, PAUSED)
+
+    def resume_many(self, hashes):
+        self._round_trip()
+        with self._lock:
+            for torrent_hash in _as_list(hashes):
+                torrent = self._torrents.get(torrent_hash)
+                if torrent:
+                    torrent['state'] = SEEDING if torrent['progress'] >= 100 else DOWNLOADING
+
+    def delete_many(self, hashes, delete_files=False):
+        self._round_trip()
+        with self._lock:
+            for torrent_hash in _as_list(hashes):
+                self._torrents.pop(torrent_hash, None)
+
+    def stats(self):
+        with self._lock:
+            return {'client': self.name, 'torrents': len(self._torrents), 'calls': self.calls, 'latency': self.latency}
+
+
+def create_connection(client_type, host=None, port=None, scheme="http", username=None, password=None, url=None):
+    """
+    Create the shared connection for a DOWNLOAD_CLIENT setting
+
+    Returns:
+        ClientConnection: Connection manager, or None for an unsupported client
+    """
+    if client_type == 'qbittorrent':
+        def connect():
+            qb = Client(host=host, port=port, username=username, password=password)
+            qb.auth_log_in()
+            return qb
+        return ClientConnection('qbittorrent', connect,
+                                lambda e: isinstance(e, (Forbidden403Error, Unauthorized401Error)))
+
+    if client_type == 'transmission':
+        def connect():
+            return transmissionrpc(host=host, port=port, protocol=scheme, username=username, password=password)
+        return ClientConnection('transmission', connect,
+                                lambda e: isinstance(e, (TransmissionAuthError, TransmissionConnectError)))
+
+    if client_type == 'delugeweb':
+        def connect():
+            delugeweb = delugewebclient(url=url, password=password)
+            response = delugeweb.login()
+            if not response.result:
+                raise DelugeWebClientError(f"Failed to log in to Deluge: {response.error}")
+            return delugeweb
+        return ClientConnection('delugeweb', connect,
+                                lambda e: isinstance(e, DelugeWebClientError) and 'not authenticated' in str(e).lower())
+
+    return None
+
+
+BACKENDS = {
+    'qbittorrent': QBittorrentBackend,
+    'transmission': TransmissionBackend,
+    'delugeweb': DelugeBackend
+}
+
+
+def create_backend(client_type, **settings):
+    """
+    Create the download backend for a DOWNLOAD_CLIENT setting
+
+    'fake' gives an in-process FakeBackend. Other settings are passed on to
+    create_connection.
+
+    Returns:
+        DownloadBackend: Backend, or None for an unsupported client
+    """
+    if client_type == 'fake':
+        return FakeBackend()
+    if client_type not in BACKENDS:
+        return None
+    return BACKENDS[client_type](create_connection(client_type, **settings))
+
+
+def benchmark_backend(backend, torrents=500, requests=200, threads=8):
+    """
+    Measure list and pause throughput and latency against a backend
+
+    Returns:
+        dict: Per-operation request count, requests per second and mean/p95 latency in ms
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    for i in range(torrents):
+        backend.add(f"magnet:?xt=urn:btih:{i:040x}", f"/downloads/book-{i}", category='bench')
+
+    results = {}
+    for label, operation in [('list', lambda i: backend.list(category='bench')),
+                             ('pause', lambda i: backend.pause(f"{i % torrents:040x}"))]:
+        latencies = []
+
+        def timed(i):
+            start = time.perf_counter()
+            operation(i)
+            latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(timed, range(requests)))
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        results[label] = {
+            'requests': requests,
+            'per_second': round(requests / elapsed, 1),
+            'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+            'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 3)
+        }
+    return results
+
+
+if __name__ == '__main__':
+    # Usage: python -m app.download_client [latency_ms] [torrents]
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    latency_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    torrent_count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    for operation, result in benchmark_backend(FakeBackend(latency=latency_ms / 1000), torrents=torrent_count).items():
+        logger.info(f"{operation}: {result}")
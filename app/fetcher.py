@@ -0,0 +1,230 @@
+"""
+HTTP fetcher for AudiobookBay
+Shares one pooled keep-alive session across all upstream requests
+"""
+import os
+import time
+import threading
+import logging
+import requests
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36'
+
+# Number of per-host connection pools to keep, and connections kept per host
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", 4))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 10))
+
+# Timeout in seconds applied to every upstream request
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 10))
+
+# How long a learned mirror base URL is trusted before probing again
+MIRROR_BASE_TTL = int(os.getenv("MIRROR_BASE_TTL", 3600))
+
+
+class CountingAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that counts requests sent and connections opened
+
+    Connections are counted as urllib3 opens them rather than read back from
+    the pool manager, whose internals differ between urllib3 releases.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._count_lock = threading.Lock()
+        self.sent = 0
+        self.opened = 0
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: self._counting_pool(pool_cls)
+            for scheme, pool_cls in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+    def _counting_pool(self, pool_cls):
+        adapter = self
+
+        class CountingPool(pool_cls):
+            def _new_conn(self, *args, **kwargs):
+                with adapter._count_lock:
+                    adapter.opened += 1
+                return super()._new_conn(*args, **kwargs)
+
+        # Keep urllib3's pool name in connection error messages
+        CountingPool.__name__ = CountingPool.__qualname__ = pool_cls.__name__
+        return CountingPool
+
+    def send(self, request, *args, **kwargs):
+        with self._count_lock:
+            self.sent += 1
+        return super().send(request, *args, **kwargs)
+
+    def counts(self):
+        """Get the requests sent and connections opened so far"""
+        with self._count_lock:
+            return self.sent, self.opened
+
+
+class Fetcher:
+    """Pooled requests.Session with default headers, timeouts and reuse counters"""
+
+    def __init__(self, pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE, timeout=HTTP_TIMEOUT):
+        self.timeout = timeout
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+
+        # pool_block caps open connections per host at pool_maxsize
+        self.adapter = CountingAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=True)
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': USER_AGENT, 'Connection': 'keep-alive'})
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._errors = 0
+
+    def get(self, url, timeout=None, **kwargs):
+        """GET a URL through the shared session"""
+        with self._lock:
+            self._requests += 1
+        try:
+            return self.session.get(url, timeout=timeout or self.timeout, **kwargs)
+        except Exception:
+            with self._lock:
+                self._errors += 1
+            raise
+
+    def stats(self):
+        """
+        Get request and connection reuse counters
+
+        Returns:
+            dict: Request, error, opened and reused connection counts
+        """
+        sent, opened = self.adapter.counts()
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'errors': self._errors,
+                'connections_opened': opened,
+                'connections_reused': max(sent - opened, 0),
+                'pool_connections': self.pool_connections,
+                'pool_maxsize': self.pool_maxsize,
+                'timeout': self.timeout
+            }
+
+
+# Shared fetcher for all AudiobookBay requests
+fetcher = Fetcher()
+
+
+class MirrorResolver:
+    """
+    Remembers which base URL the AudiobookBay mirror answers on
+
+    The first fetch probes http:// and https:// (and any path variants) in
+    order and learns the base URL the mirror finally served the page from,
+    after redirects. Later fetches go straight to that base URL and only
+    probe again when it fails or the TTL runs out.
+    """
+
+    def __init__(self, hostname, http=None, ttl=MIRROR_BASE_TTL):
+        self.hostname = hostname
+        self.http = http or fetcher
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._base_url = None
+        self._learned_at = 0
+        self.probes = 0
+
+    def candidates(self):
+        """Base URLs to probe, in order of preference"""
+        return [f"http://{self.hostname}", f"https://{self.hostname}"]
+
+    @property
+    def base_url(self):
+        """Learned base URL, or None if it is unknown or expired"""
+        with self._lock:
+            if self._base_url and time.time() - self._learned_at < self.ttl:
+                return self._base_url
+            return None
+
+    def _learn(self, response):
+        parsed = urlparse(response.url)
+        with self._lock:
+            self._base_url = f"{parsed.scheme}://{parsed.netloc}"
+            self._learned_at = time.time()
+
+    def forget(self):
+        """Drop the learned base URL so the next fetch probes again"""
+        with self._lock:
+            self._base_url = None
+
+    def get(self, paths=("",)):
+        """
+        Fetch a page from the mirror
+
+        Args:
+            paths: Path variants to try, in order, e.g. ["/page/2/", "/page/2"]
+
+        Returns:
+            Response: The first 200 response, a 4xx from the learned base, otherwise the last response received
+
+        Raises:
+            Exception: The last connection error, if no URL returned a response at all
+        """
+        base_url = self.base_url
+        failed_url = None
+        response = None
+        error = None
+        if base_url:
+            # A 4xx means the mirror is up but the page is not there, so keep the base;
+            # only connection errors and 5xx send us back to probing
+            for path in paths:
+                url = f"{base_url}{path}"
+                try:
+                    response = self.http.get(url, allow_redirects=True)
+                except Exception as e:
+                    logger.info(f"Mirror base {base_url} failed, probing again: {e}")
+                    response, error = None, e
+                    break
+                if response.status_code == 200 or response.status_code >= 500:
+                    break
+            if response is not None and response.status_code < 500:
+                return response
+            if response is not None:
+                logger.info(f"Mirror base {base_url} returned {response.status_code}, probing again")
+            self.forget()
+            failed_url = url
+
+        with self._lock:
+            self.probes += 1
+        for path in paths:
+            for candidate in self.candidates():
+                url = f"{candidate}{path}"
+                if url == failed_url:
+                    continue
+                try:
+                    response = self.http.get(url, allow_redirects=True)
+                    if response.status_code == 200:
+                        logger.info(f"Successfully connected to {url}")
+                        self._learn(response)
+                        return response
+                except Exception as e:
+                    logger.info(f"Failed to connect to {url}: {e}")
+                    error = e
+                    continue
+        # Keep the last real response, such as a 5xx from the learned base, over a later connection error
+        if response is None and error is not None:
+            raise error
+        return response
+
+    def stats(self):
+        """Get the learned base URL and how many times the mirror was probed"""
+        return {'base_url': self.base_url, 'probes': self.probes}
@@ -0,0 +1,122 @@
+"""
+Homepage snapshot for AudiobookBay
+Keeps the first homepage pages in memory, refreshed by a background worker
+"""
+import os
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Number of homepage pages kept in the snapshot, and seconds between refreshes
+HOMEPAGE_SNAPSHOT_PAGES = int(os.getenv("HOMEPAGE_SNAPSHOT_PAGES", 3))
+HOMEPAGE_REFRESH_INTERVAL = int(os.getenv("HOMEPAGE_REFRESH_INTERVAL", 300))
+
+
+class HomepageSnapshot:
+    """
+    In-memory copy of the first homepage pages
+
+    A background worker reloads pages 1..pages every interval seconds and keeps
+    the previous copy of a page when a reload comes back empty. Requests are
+    served from memory; a cold page is loaded once, with concurrent requests
+    for it waiting on that single load instead of fetching it themselves.
+    Pages past the snapshot are loaded live.
+    """
+
+    def __init__(self, loader, pages=HOMEPAGE_SNAPSHOT_PAGES, interval=HOMEPAGE_REFRESH_INTERVAL):
+        self.loader = loader
+        self.pages = pages
+        self.interval = interval
+        self._pages = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.refreshes = 0
+        self.failures = 0
+        self.coalesced = 0
+
+    def start(self):
+        """Start the refresh worker if it is not already running"""
+        with self._lock:
+            if self._thread:
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        logger.info(f"Homepage snapshot service started ({self.pages} pages every {self.interval}s)")
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            for page_num in range(1, self.pages + 1):
+                self._load(page_num)
+            self._stop.wait(self.interval)
+
+    def _load(self, page_num):
+        """Load a page into the snapshot, joining a load already in progress"""
+        with self._lock:
+            event = self._loading.get(page_num)
+            leader = event is None
+            if leader:
+                event = self._loading[page_num] = threading.Event()
+            else:
+                self.coalesced += 1
+
+        if leader:
+            books = []
+            try:
+                books = self.loader(page_num)
+            except Exception as e:
+                logger.error(f"Failed to refresh homepage page {page_num}: {e}")
+            finally:
+                with self._lock:
+                    if books:
+                        self._pages[page_num] = (books, time.time())
+                        self.refreshes += 1
+                    else:
+                        self.failures += 1
+                    del self._loading[page_num]
+                event.set()
+        else:
+            event.wait()
+
+        with self._lock:
+            entry = self._pages.get(page_num)
+        return entry[0] if entry else []
+
+    def get(self, page_num=1):
+        """
+        Get the books on a homepage page
+
+        Args:
+            page_num: Homepage page number, starting at 1
+
+        Returns:
+            list: Book records, empty if the page could not be loaded
+        """
+        if page_num > self.pages:
+            return self.loader(page_num)
+
+        self.start()
+        with self._lock:
+            entry = self._pages.get(page_num)
+        if entry:
+            return entry[0]
+        return self._load(page_num)
+
+    def stats(self):
+        """Get snapshot page ages and refresh counters"""
+        now = time.time()
+        with self._lock:
+            return {
+                'pages': self.pages,
+                'interval': self.interval,
+                'page_ages': {page_num: round(now - entry[1]) for page_num, entry in sorted(self._pages.items())},
+                'refreshes': self.refreshes,
+                'failures': self.failures,
+                'coalesced': self.coalesced
+            }
@@ -0,0 +1,873 @@
+"""
+Metadata extraction helpers for AudiobookBay
+Pulls author, format, bitrate and other fields out of post text and markup
+"""
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+def clean_title(title):
+    """Extract just the title part from 'Title - Author' format"""
+    if " - " in title:
+        parts = title.split(" - ", 1)
+        if len(parts) == 2 and not re.search(r'\d', parts[1]) and len(parts[1]) < 50:
+            return parts[0].strip()  # Return the first part (title)
+    return title
+
+# Enhanced metadata extraction helper functions
+def extract_author(meta_text, title):
+    """Extract author with multiple patterns"""
+    # Check title first (Title - Author format)
+    if " - " in title:
+        parts = title.split(" - ", 1)
+        if len(parts) == 2 and not re.search(r'\d', parts[1]) and len(parts[1]) < 50:
+            return parts[1].strip()  # Return the second part (author)
+    
+    # Extract from content using various patterns
+    patterns = [
+        r'Author[:\s]+([^\n\r]+)',
+        r'by\s+([^\n\r,]+)',
+        r'Written by[:\s]+([^\n\r]+)',
+        r'Book by[:\s]+([^\n\r]+)',
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, meta_text, re.IGNORECASE)
+        if match:
+            author = match.group(1).strip()
+            # Clean up common suffixes
+            author = re.sub(r'\s*(,.*|\..*|\(.*)', '', author)
+            if len(author) > 2 and len(author) < 100:
+                return author
+    
+    return ""
+
+def extract_category(post, meta_text):
+    """Extract category from post or content"""
+    # Look for category links or tags in the post HTML
+    category_selectors = ['a[href*="/category/"]', '.category', '.tag', '.genre']
+    for selector in category_selectors:
+        category_elements = post.select(selector)
+        if category_elements:
+            return category_elements[0].get_text().strip()
+    
+    # Extract from meta text
+    category_patterns = [
+        r'Category[:\s]+([^\n\r]+)',
+        r'Genre[:\s]+([^\n\r]+)',
+        r'Section[:\s]+([^\n\r]+)'
+    ]
+    for pattern in category_patterns:
+        match = re.search(pattern, meta_text, re.IGNORECASE)
+        if match:
+            return match.group(1).strip()
+    return ""
+
+def extract_keywords(meta_text):
+    """Extract keywords/tags"""
+    keyword_patterns = [
+        r'Tags[:\s]+([^\n\r]+)',
+        r'Keywords[:\s]+([^\n\r]+)',
+        r'Genres?[:\s]+([^\n\r,]+)',
+        r'Subject[:\s]+([^\n\r]+)'
+    ]
+    for pattern in keyword_patterns:
+        match = re.search(pattern, meta_text, re.IGNORECASE)
+        if match:
+            keywords = match.group(1).strip()
+            # Clean up and limit length
+            keywords = re.sub(r'[,;]+', ', ', keywords)
+            return keywords[:200] if len(keywords) > 200 else keywords
+    return ""
+
+def extract_language(meta_text):
+    """Extract language information"""
+    languages = {
+        'english': 'English', 'spanish': 'Spanish', 'french': 'French', 
+        'german': 'German', 'italian': 'Italian', 'portuguese': 'Portuguese',
+        'russian': 'Russian', 'chinese': 'Chinese', 'japanese': 'Japanese',
+        'dutch': 'Dutch', 'swedish': 'Swedish', 'norwegian': 'Norwegian'
+    }
+    
+    # Look for explicit language mentions
+    language_pattern = r'Language[:\s]+([^\n\r]+)'
+    match = re.search(language_pattern, meta_text, re.IGNORECASE)
+    if match:
+        lang_text = match.group(1).strip().lower()
+        for key, value in languages.items():
+            if key in lang_text:
+                return value
+    
+    # Check for language keywords in text
+    for key, value in languages.items():
+        if key in meta_text.lower():
+            return value
+    
+    return "English"  # Default
+
+def extract_format(meta_text):
+    """Extract file format"""
+    format_patterns = [
+        r'Format[:\s]+([^\n\r\s,]+)',
+        r'File Format[:\s]+([^\n\r\s,]+)',
+        r'Audio Format[:\s]+([^\n\r\s,]+)',
+        r'\b(M4B|MP3|M4A|AAC|FLAC|WAV|OGG)\b'
+    ]
+    
+    for pattern in format_patterns:
+        match = re.search(pattern, meta_text, re.IGNORECASE)
+        if match:
+            format_str = match.group(1).upper().strip()
+            # Clean up common format variations
+            if format_str in ['M4B', 'MP3', 'M4A', 'AAC', 'FLAC', 'WAV', 'OGG']:
+                return format_str
+    
+    return "M4B"  # Default for audiobooks
+
+def extract_bitrate(meta_text):
+    """Extract bitrate information"""
+    bitrate_patterns = [
+        r'Bitrate[:\s]+(\d+)\s*kbps',
+        r'(\d+)\s*kbps',
+        r'(\d+)\s*Kbps',
+        r'Quality[:\s]+(\d+)\s*k'
+    ]
+    
+    for pattern in bitrate_patterns:
+        match = re.search(pattern, meta_text, re.IGNORECASE)
+        if match:
+            bitrate = match.group(1)
+            return f"{bitrate} kbps"
+    return ""
+
+def extract_upload_date(post):
+    """Extract upload date from post"""
+    date_selectors = [
+        '.date', '.posted', '.upload-date', 'time', '.post-date',
+        '.entry-date', '.published', '.created'
+    ]
+    
+    for selector in date_selectors:
+        date_element = post.select_one(selector)
+        if date_element:
+            date_text = date_element.get_text().strip()
+            if date_text and len(date_text) < 50:
+                return date_text
+    
+    # Try to extract from post attributes
+    time_element = post.select_one('[datetime]')
+    if time_element:
+        return time_element.get('datetime', '')[:10]  # Get date part only
+    
+    return ""
+
+def extract_uploader(post):
+    """Extract uploader username"""
+    # Look for actual uploader information, not book author
+    uploader_selectors = [
+        '.uploader', '.posted-by', '.user', '.username', '.sharer',
+        '.entry-uploader', '.post-uploader'
+    ]
+    
+    for selector in uploader_selectors:
+        uploader_element = post.select_one(selector)
+        if uploader_element:
+            uploader = uploader_element.get_text().strip()
+            # Clean up common prefixes
+            uploader = re.sub(r'^(by|posted by|uploaded by|shared by)[:\s]*', '', uploader, flags=re.IGNORECASE)
+            if uploader and len(uploader) < 50:
+                return uploader
+    
+    # Look for "Shared by" or "Posted by" patterns in text
+    full_text = post.get_text()
+    uploader_patterns = [
+        r'Shared by[:\s]*([^\n\r]+)',
+        r'Posted by[:\s]*([^\n\r]+)',
+        r'Uploaded by[:\s]*([^\n\r]+)'
+    ]
+    
+    for pattern in uploader_patterns:
+        match = re.search(pattern, full_text, re.IGNORECASE)
+        if match:
+            uploader = match.group(1).strip()
+            if uploader and len(uploader) < 50 and not re.search(r'\d{4}', uploader):  # Avoid dates
+                return uploader
+    
+    return ""
+
+def extract_duration(meta_text):
+    """Extract duration/length information"""
+    # Only look for explicit duration labels first
+    duration_patterns = [
+        r'Duration[:\s]+([^\n\r]+?)(?:\s|$)',
+        r'Length[:\s]+([^\n\r]+?)(?:\s|$)',  
+        r'Runtime[:\s]+([^\n\r]+?)(?:\s|$)',
+        r'Playing time[:\s]+([^\n\r]+?)(?:\s|$)'
+    ]
+    
+    for pattern in duration_patterns:
+        match = re.search(pattern, meta_text, re.IGNORECASE)
+        if match:
+            duration = match.group(1).strip()
+            # Clean up any trailing punctuation or text
+            duration = re.sub(r'[^\d:hm\s]+.*$', '', duration)
+            if len(duration) > 2 and len(duration) < 20:
+                return duration
+    
+    # Only look for time formats if explicitly labeled
+    time_patterns = [
+        r'(?:Duration|Length|Runtime)[:\s]+(\d+:\d+:\d+)',  # Must be labeled
+        r'(?:Duration|Length|Runtime)[:\s]+(\d+)h?\s*(\d+)?m?'  # Must be labeled
+    ]
+    
+    for pattern in time_patterns:
+        match = re.search(pattern, meta_text, re.IGNORECASE)
+        if match:
+            if match.group(1) and ':' in match.group(1):
+                return match.group(1)
+            elif match.group(1) and match.group(2):
+                return f"{match.group(1)}h {match.group(2)}m"
+            elif match.group(1):
+                return f"{match.group(1)}h"
+    
+    return ""
+
+def extract_publisher(meta_text):
+    """Extract publisher information"""
+    publisher_patterns = [
+        r'Publisher[:\s]+([^\n\r]+)',
+        r'Published by[:\s]+([^\n\r]+)',
+        r'Imprint[:\s]+([^\n\r]+)',
+        r'Label[:\s]+([^\n\r]+)'
+    ]
+    
+    for pattern in publisher_patterns:
+        match = re.search(pattern, meta_text, re.IGNORECASE)
+        if match:
+            publisher = match.group(1).strip()
+            # Clean up common suffixes
+            publisher = re.sub(r'\s*(,.*|\(.*)', '', publisher)
+            if len(publisher) < 100:
+                return publisher
+    
+    return ""
+
+def extract_isbn(meta_text):
+    """Extract ISBN information"""
+    isbn_patterns = [
+        r'ISBN[:\s]+([0-9\-X]{10,17})',
+        r'ISBN-?1[03][:\s]+([0-9\-]{10,17})',
+        r'\b(97[89][0-9\-]{10,13})\b'
+    ]
+    
+    for pattern in isbn_patterns:
+        match = re.search(pattern, meta_text, re.IGNORECASE)
+        if match:
+            isbn = match.group(1).replace('-', '').replace(' ', '')
+            if len(isbn) in [10, 13]:
+                return isbn
+    
+    return ""
+
+def extract_asin(meta_text):
+    """Extract ASIN information"""
+    asin_patterns = [
+        r'ASIN[:\s]+([A-Z0-9]{10})',
+        r'Amazon ASIN[:\s]+([A-Z0-9]{10})',
+        r'Amazon[:\s]+([A-Z0-9]{10})'
+    ]
+    
+    for pattern in asin_patterns:
+        match = re.search(pattern, meta_text, re.IGNORECASE)
+        if match:
+            asin = match.group(1)
+            if len(asin) == 10 and asin.isalnum() and not asin.isalpha():
+                return asin
+    
+    return ""
+
+def check_explicit_content(meta_text):
+    """Check for explicit content warnings"""
+    explicit_keywords = [
+        'explicit', 'adult content', 'mature', '18+', 'adult only',
+        'strong language', 'sexual content', 'graphic content'
+    ]
+    
+    text_lower = meta_text.lower()
+    for keyword in explicit_keywords:
+        if keyword in text_lower:
+            return True
+    
+    return False
+
+def check_abridged(meta_text):
+    """Check if content is abridged"""
+    abridged_keywords = ['abridged', 'condensed', 'shortened', 'edited']
+    unabridged_keywords = ['unabridged', 'complete', 'full version', 'uncut']
+    
+    text_lower = meta_text.lower()
+    
+    # Check for unabridged first (more definitive)
+    for keyword in unabridged_keywords:
+        if keyword in text_lower:
+            return False
+    
+    # Check for abridged
+    for keyword in abridged_keywords:
+        if keyword in text_lower:
+            return True
+    
+    return False  # Default to not abridged
+
+def extract_narrator(meta_text):
+    """Extract narrator information"""
+    narrator_patterns = [
+        r'(?:narrated by|narrator|read by|voice)[:\s]+([^\n\r,]+)',
+        r'(?:reader|performer)[:\s]+([^\n\r,]+)',
+        r'(?:voiced by)[:\s]+([^\n\r,]+)'
+    ]
+    
+    for pattern in narrator_patterns:
+        match = re.search(pattern, meta_text, re.IGNORECASE)
+        if match:
+            narrator = match.group(1).strip()
+            # Clean up common artifacts
+            narrator = re.sub(r'\s+', ' ', narrator)
+            narrator = narrator.replace('|', '').strip()
+            if len(narrator) > 3 and len(narrator) < 100:  # Reasonable length
+                return narrator
+    
+    return ""
+
+def extract_file_size(meta_text):
+    """Extract file size with multiple patterns"""
+    size_patterns = [
+        r'size[:\s]*(\d+(?:\.\d+)?)\s*(MB|GB|KB)',
+        r'(\d+(?:\.\d+)?)\s*(MB|GB|KB)(?:\s|$)',
+        r'filesize[:\s]*(\d+(?:\.\d+)?)\s*(MB|GB|KB)'
+    ]
+    
+    for pattern in size_patterns:
+        match = re.search(pattern, meta_text, re.IGNORECASE)
+        if match:
+            size_value = match.group(1)
+            size_unit = match.group(2).upper()
+            return f"{size_value} {size_unit}"
+    
+    return ""
+
+def extract_comments(soup):
+    """Extract comments from AudiobookBay page"""
+    comments = []
+    try:
+        # Common selectors for comments on AudiobookBay
+        comment_selectors = [
+            '#comments .comment',
+            '.comments .comment',
+            '.comment-item',
+            '#respond .comment',
+            '.comment-list .comment',
+            'ol.commentlist li',
+            '.wp-block-comments .wp-block-comment',
+            'article.comment'
+        ]
+        
+        comment_elements = []
+        for selector in comment_selectors:
+            found_comments = soup.select(selector)
+            if found_comments:
+                comment_elements = found_comments
+                break
+        
+        for comment in comment_elements:
+            try:
+                # Extract comment author
+                author_selectors = [
+                    '.comment-author .fn',
+                    '.comment-author cite',
+                    '.comment-author',
+                    '.comment-meta .author',
+                    'cite.fn',
+                    'b.fn',
+                    '.author'
+                ]
+                
+                author = ""
+                for author_selector in author_selectors:
+                    author_elem = comment.select_one(author_selector)
+                    if author_elem:
+                        author = author_elem.get_text().strip()
+                        break
+                
+                # Extract comment date
+                date_selectors = [
+                    '.comment-date',
+                    '.comment-meta .date',
+                    '.comment-time',
+                    'time',
+                    '.published',
+                    '.comment-meta time'
+                ]
+                
+                date = ""
+                for date_selector in date_selectors:
+                    date_elem = comment.select_one(date_selector)
+                    if date_elem:
+                        date = date_elem.get_text().strip()
+                        break
+                
+                # Extract comment text
+                text_selectors = [
+                    '.comment-content p',
+                    '.comment-text p',
+                    '.comment-body p',
+                    '.comment p',
+                    '.comment-content',
+                    '.comment-text',
+                    '.comment-body'
+                ]
+                
+                text_content = ""
+                for text_selector in text_selectors:
+                    text_elem = comment.select_one(text_selector)
+                    if text_elem:
+                        text_content = text_elem.get_text().strip()
+                        break
+                
+                # Only add comment if we have both author and content
+                if author and text_content and len(text_content) > 10:
+                    comments.append({
+                        'author': author[:50],  # Limit author name length
+                        'date': date[:20] if date else "",  # Limit date length
+                        'content': text_content[:500]  # Limit comment length
+                    })
+                    
+            except Exception as e:
+                logger.debug(f"Error extracting individual comment: {e}")
+                continue
+        
+        # Limit to maximum 20 comments
+        comments = comments[:20]
+        logger.debug(f"Extracted {len(comments)} comments")
+        return comments
+        
+    except Exception as e:
+        logger.debug(f"Error extracting comments: {e}")
+        return []
+
+def extract_torrent_files(soup, content_text):
+    """Extract list of files in the torrent"""
+    files = []
+    
+    # Look for file listings
+    file_patterns = [
+        r'Files?[:\s]*\n((?:.*\.(?:mp3|m4b|m4a|aac|flac|wav|ogg)[^\n]*\n?)+)',
+        r'Contents?[:\s]*\n((?:.*\.(?:mp3|m4b|m4a|aac|flac|wav|ogg)[^\n]*\n?)+)',
+        r'Track(?:s|list)?[:\s]*\n((?:.*\.(?:mp3|m4b|m4a|aac|flac|wav|ogg)[^\n]*\n?)+)'
+    ]
+    
+    for pattern in file_patterns:
+        match = re.search(pattern, content_text, re.IGNORECASE | re.MULTILINE)
+        if match:
+            file_list = match.group(1).strip()
+            # Split into individual files
+            potential_files = file_list.split('\n')
+            for file_line in potential_files:
+                file_line = file_line.strip()
+                if file_line and any(ext in file_line.lower() for ext in ['.mp3', '.m4b', '.m4a', '.aac', '.flac', '.wav', '.ogg']):
+                    files.append(file_line)
+            break
+    
+    # Also look for file tables in HTML
+    file_tables = soup.select('table')
+    for table in file_tables:
+        rows = table.select('tr')
+        for row in rows:
+            cells = row.select('td')
+            for cell in cells:
+                cell_text = cell.get_text().strip()
+                if any(ext in cell_text.lower() for ext in ['.mp3', '.m4b', '.m4a', '.aac', '.flac', '.wav', '.ogg']):
+                    files.append(cell_text)
+    
+    return files[:20]  # Limit to first 20 files
+
+def extract_creation_date(soup, content_text):
+    """Extract creation/publication date"""
+    date_patterns = [
+        r'Published[:\s]+([^\n\r]+)',
+        r'Created[:\s]+([^\n\r]+)',
+        r'Release[:\s]+([^\n\r]+)',
+        r'Date[:\s]+([^\n\r]+)',
+        r'(\d{4}(?:\-\d{2}\-\d{2})?)',  # Year or full date
+        r'©\s*(\d{4})',  # Copyright year
+        r'\((\d{4})\)'   # Year in parentheses
+    ]
+    
+    for pattern in date_patterns:
+        match = re.search(pattern, content_text, re.IGNORECASE)
+        if match:
+            date_str = match.group(1).strip()
+            # Clean up common suffixes
+            date_str = re.sub(r'\s+(by|from|in).*$', '', date_str, flags=re.IGNORECASE)
+            if len(date_str) >= 4 and len(date_str) <= 20:
+                return date_str
+    
+    return ""
+
+
+# Single-pass metadata extraction for listing posts
+#
+# The extract_* helpers above each run several uncompiled searches over the
+# text. For listing pages we scan the text once for every known label and
+# resolve each field from the recorded offsets with precompiled patterns,
+# trying patterns in the same order as the helpers above.
+METADATA_LABELS = [
+    ('author', 'Author'),
+    ('written_by', 'Written by'),
+    ('book_by', 'Book by'),
+    ('category', 'Category'),
+    ('genres', 'Genres'),
+    ('genre', 'Genre'),
+    ('section', 'Section'),
+    ('tags', 'Tags'),
+    ('keywords', 'Keywords'),
+    ('subject', 'Subject'),
+    ('language', 'Language'),
+    ('file_format', 'File Format'),
+    ('audio_format', 'Audio Format'),
+    ('format', 'Format'),
+    ('bitrate', 'Bitrate'),
+    ('quality', 'Quality'),
+    ('duration', 'Duration'),
+    ('length', 'Length'),
+    ('runtime', 'Runtime'),
+    ('playing_time', 'Playing time'),
+    ('publisher', 'Publisher'),
+    ('published_by', 'Published by'),
+    ('imprint', 'Imprint'),
+    ('label', 'Label'),
+    ('isbn_1x', 'ISBN-10'),
+    ('isbn_1x', 'ISBN-13'),
+    ('isbn_1x', 'ISBN10'),
+    ('isbn_1x', 'ISBN13'),
+    ('isbn', 'ISBN'),
+    ('amazon_asin', 'Amazon ASIN'),
+    ('amazon', 'Amazon'),
+    ('asin', 'ASIN'),
+]
+LABEL_NAMES = {label.lower(): name for name, label in METADATA_LABELS}
+
+# Labels that end with another label; the inner label ends at the same offset
+EMBEDDED_LABELS = {'file_format': 'format', 'audio_format': 'format', 'amazon_asin': 'asin'}
+
+# One alternation without named groups or IGNORECASE keeps the regex engine's
+# literal prefix scan, so labels are matched against lower-cased text
+LABEL_PATTERN = re.compile(
+    '(' + '|'.join(re.escape(label.lower()) for _, label in METADATA_LABELS) + r')[:\s]+'
+)
+# Used when lower() would not line up with IGNORECASE matching on the original text
+LABEL_PATTERN_IGNORECASE = re.compile(
+    '(?:' + '|'.join(f'(?P<l{index}>{re.escape(label)})' for index, (_, label) in enumerate(METADATA_LABELS)) + r')[:\s]+',
+    re.IGNORECASE
+)
+# Characters IGNORECASE matches to ASCII letters that lower() leaves alone
+CASE_FOLD_CHARACTERS = ('\u017f', '\u0131')
+
+# Value patterns are matched from the end of the label, separator included,
+# so backtracking behaves exactly as in the extract_* helpers
+LINE_VALUE = re.compile(r'[:\s]+([^\n\r]+)')
+LINE_VALUE_NO_COMMA = re.compile(r'[:\s]+([^\n\r,]+)')
+WORD_VALUE = re.compile(r'[:\s]+([^\n\r\s,]+)')
+KBPS_VALUE = re.compile(r'[:\s]+(\d+)\s*kbps', re.IGNORECASE)
+QUALITY_VALUE = re.compile(r'[:\s]+(\d+)\s*k', re.IGNORECASE)
+DURATION_VALUE = re.compile(r'[:\s]+([^\n\r]+?)(?:\s|$)')
+CLOCK_VALUE = re.compile(r'[:\s]+(\d+:\d+:\d+)')
+HOURS_VALUE = re.compile(r'[:\s]+(\d+)h?\s*(\d+)?m?', re.IGNORECASE)
+ISBN_VALUE = re.compile(r'[:\s]+([0-9\-X]{10,17})', re.IGNORECASE)
+ISBN_1X_VALUE = re.compile(r'[:\s]+([0-9\-]{10,17})')
+ASIN_VALUE = re.compile(r'[:\s]+([A-Z0-9]{10})', re.IGNORECASE)
+
+BY_PATTERN = re.compile(r'by\s+([^\n\r,]+)', re.IGNORECASE)
+KBPS_PATTERN = re.compile(r'(\d+)\s*kbps', re.IGNORECASE)
+FORMAT_PATTERN = re.compile(r'\b(M4B|MP3|M4A|AAC|FLAC|WAV|OGG)\b', re.IGNORECASE)
+ISBN_PATTERN = re.compile(r'\b(97[89][0-9\-]{10,13})\b', re.IGNORECASE)
+SIZE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(MB|GB)', re.IGNORECASE)
+DIGIT_PATTERN = re.compile(r'\d')
+AUTHOR_SUFFIX_PATTERN = re.compile(r'\s*(,.*|\..*|\(.*)')
+PUBLISHER_SUFFIX_PATTERN = re.compile(r'\s*(,.*|\(.*)')
+KEYWORD_SEPARATOR_PATTERN = re.compile(r'[,;]+')
+DURATION_TRAILER_PATTERN = re.compile(r'[^\d:hm\s]+.*$')
+
+LANGUAGES = {
+    'english': 'English', 'spanish': 'Spanish', 'french': 'French',
+    'german': 'German', 'italian': 'Italian', 'portuguese': 'Portuguese',
+    'russian': 'Russian', 'chinese': 'Chinese', 'japanese': 'Japanese',
+    'dutch': 'Dutch', 'swedish': 'Swedish', 'norwegian': 'Norwegian'
+}
+KNOWN_FORMATS = ['M4B', 'MP3', 'M4A', 'AAC', 'FLAC', 'WAV', 'OGG']
+EXPLICIT_KEYWORDS = [
+    'explicit', 'adult content', 'mature', '18+', 'adult only',
+    'strong language', 'sexual content', 'graphic content'
+]
+ABRIDGED_KEYWORDS = ['abridged', 'condensed', 'shortened', 'edited']
+UNABRIDGED_KEYWORDS = ['unabridged', 'complete', 'full version', 'uncut']
+# Class names checked after a[href*="/category/"], in priority order
+CATEGORY_CLASSES = ['category', 'tag', 'genre']
+
+
+def scan_labels(text, text_lower=None):
+    """
+    Scan text once and record where each label ends
+
+    Args:
+        text: Text to scan
+        text_lower: text.lower(), if the caller already has it
+
+    Returns:
+        dict: Label name -> list of label end offsets, in document order
+    """
+    if text_lower is None:
+        text_lower = text.lower()
+
+    labels = {}
+    if len(text_lower) == len(text) and not any(char in text for char in CASE_FOLD_CHARACTERS):
+        found = ((LABEL_NAMES[match.group(1)], match.end(1)) for match in LABEL_PATTERN.finditer(text_lower))
+    else:
+        found = ((METADATA_LABELS[int(match.lastgroup[1:])][0], match.end(match.lastgroup))
+                 for match in LABEL_PATTERN_IGNORECASE.finditer(text))
+
+    for name, offset in found:
+        labels.setdefault(name, []).append(offset)
+        if name in EMBEDDED_LABELS:
+            labels.setdefault(EMBEDDED_LABELS[name], []).append(offset)
+    return labels
+
+
+def _labeled_value(text, labels, names, value_pattern):
+    """Return the first value match after any of the given labels, like re.search would"""
+    if isinstance(names, str):
+        offsets = labels.get(names, ())
+    else:
+        offsets = sorted(offset for name in names for offset in labels.get(name, ()))
+    for offset in offsets:
+        match = value_pattern.match(text, offset)
+        if match:
+            return match
+    return None
+
+
+def _author(text, labels, title):
+    if " - " in title:
+        parts = title.split(" - ", 1)
+        if len(parts) == 2 and not DIGIT_PATTERN.search(parts[1]) and len(parts[1]) < 50:
+            return parts[1].strip()
+
+    matches = [
+        lambda: _labeled_value(text, labels, 'author', LINE_VALUE),
+        lambda: BY_PATTERN.search(text),
+        lambda: _labeled_value(text, labels, 'written_by', LINE_VALUE),
+        lambda: _labeled_value(text, labels, 'book_by', LINE_VALUE),
+    ]
+    for find in matches:
+        match = find()
+        if match:
+            author = AUTHOR_SUFFIX_PATTERN.sub('', match.group(1).strip())
+            if len(author) > 2 and len(author) < 100:
+                return author
+    return ""
+
+
+def _category_element(post):
+    """
+    Find the element extract_category would pick, in one walk over the post
+
+    Equivalent to trying a[href*="/category/"], .category, .tag and .genre
+    in turn and taking the first match of the first selector that matches.
+    """
+    by_class = {}
+    for element in post.find_all(True):
+        if element.name == 'a' and '/category/' in element.get('href', ''):
+            return element
+        classes = element.get('class') or ()
+        if isinstance(classes, str):
+            classes = classes.split()
+        for class_name in CATEGORY_CLASSES:
+            if class_name in classes and class_name not in by_class:
+                by_class[class_name] = element
+    for class_name in CATEGORY_CLASSES:
+        if class_name in by_class:
+            return by_class[class_name]
+    return None
+
+
+def _category(text, labels, post):
+    if post is not None:
+        element = _category_element(post)
+        if element is not None:
+            return element.get_text().strip()
+
+    for name in ('category', 'genre', 'section'):
+        match = _labeled_value(text, labels, name, LINE_VALUE)
+        if match:
+            return match.group(1).strip()
+    return ""
+
+
+def _keywords(text, labels):
+    candidates = [
+        ('tags', LINE_VALUE),
+        ('keywords', LINE_VALUE),
+        (('genre', 'genres'), LINE_VALUE_NO_COMMA),
+        ('subject', LINE_VALUE),
+    ]
+    for names, value_pattern in candidates:
+        match = _labeled_value(text, labels, names, value_pattern)
+        if match:
+            keywords = KEYWORD_SEPARATOR_PATTERN.sub(', ', match.group(1).strip())
+            return keywords[:200]
+    return ""
+
+
+def _language(text, labels, text_lower):
+    match = _labeled_value(text, labels, 'language', LINE_VALUE)
+    if match:
+        lang_text = match.group(1).strip().lower()
+        for key, value in LANGUAGES.items():
+            if key in lang_text:
+                return value
+
+    for key, value in LANGUAGES.items():
+        if key in text_lower:
+            return value
+    return "English"
+
+
+def _file_format(text, labels):
+    matches = [
+        lambda: _labeled_value(text, labels, 'format', WORD_VALUE),
+        lambda: _labeled_value(text, labels, 'file_format', WORD_VALUE),
+        lambda: _labeled_value(text, labels, 'audio_format', WORD_VALUE),
+        lambda: FORMAT_PATTERN.search(text),
+    ]
+    for find in matches:
+        match = find()
+        if match:
+            format_str = match.group(1).upper().strip()
+            if format_str in KNOWN_FORMATS:
+                return format_str
+    return "M4B"
+
+
+def _bitrate(text, labels):
+    match = (_labeled_value(text, labels, 'bitrate', KBPS_VALUE)
+             or KBPS_PATTERN.search(text)
+             or _labeled_value(text, labels, 'quality', QUALITY_VALUE))
+    if match:
+        return f"{match.group(1)} kbps"
+    return ""
+
+
+def _duration(text, labels):
+    for name in ('duration', 'length', 'runtime', 'playing_time'):
+        match = _labeled_value(text, labels, name, DURATION_VALUE)
+        if match:
+            duration = DURATION_TRAILER_PATTERN.sub('', match.group(1).strip())
+            if len(duration) > 2 and len(duration) < 20:
+                return duration
+
+    timed = ('duration', 'length', 'runtime')
+    match = _labeled_value(text, labels, timed, CLOCK_VALUE)
+    if match:
+        return match.group(1)
+    match = _labeled_value(text, labels, timed, HOURS_VALUE)
+    if match:
+        if match.group(1) and ':' in match.group(1):
+            return match.group(1)
+        elif match.group(1) and match.group(2):
+            return f"{match.group(1)}h {match.group(2)}m"
+        elif match.group(1):
+            return f"{match.group(1)}h"
+    return ""
+
+
+def _publisher(text, labels):
+    for name in ('publisher', 'published_by', 'imprint', 'label'):
+        match = _labeled_value(text, labels, name, LINE_VALUE)
+        if match:
+            publisher = PUBLISHER_SUFFIX_PATTERN.sub('', match.group(1).strip())
+            if len(publisher) < 100:
+                return publisher
+    return ""
+
+
+def _isbn(text, labels):
+    matches = [
+        lambda: _labeled_value(text, labels, 'isbn', ISBN_VALUE),
+        lambda: _labeled_value(text, labels, 'isbn_1x', ISBN_1X_VALUE),
+        lambda: ISBN_PATTERN.search(text),
+    ]
+    for find in matches:
+        match = find()
+        if match:
+            isbn = match.group(1).replace('-', '').replace(' ', '')
+            if len(isbn) in [10, 13]:
+                return isbn
+    return ""
+
+
+def _asin(text, labels):
+    for name in ('asin', 'amazon_asin', 'amazon'):
+        match = _labeled_value(text, labels, name, ASIN_VALUE)
+        if match:
+            asin = match.group(1)
+            if len(asin) == 10 and asin.isalnum() and not asin.isalpha():
+                return asin
+    return ""
+
+
+def _abridged(text_lower):
+    if any(keyword in text_lower for keyword in UNABRIDGED_KEYWORDS):
+        return False
+    return any(keyword in text_lower for keyword in ABRIDGED_KEYWORDS)
+
+
+def extract_post_metadata(meta_text, title, post=None):
+    """
+    Extract every listing field from a post's text in a single pass
+
+    Produces the same values as calling extract_author, extract_category,
+    extract_keywords, extract_language, extract_format, extract_bitrate,
+    extract_duration, extract_publisher, extract_isbn, extract_asin,
+    check_explicit_content and check_abridged one after another.
+
+    Args:
+        meta_text: Text content of the post
+        title: Raw post title, used for 'Title - Author' splitting
+        post: Optional post element, checked for category links first
+
+    Returns:
+        dict: Metadata fields keyed like the book records
+    """
+    text_lower = meta_text.lower()
+    labels = scan_labels(meta_text, text_lower)
+
+    file_size = ""
+    size_match = SIZE_PATTERN.search(meta_text)
+    if size_match:
+        file_size = f"{size_match.group(1)} {size_match.group(2).upper()}"
+
+    return {
+        'author': _author(meta_text, labels, title),
+        'category': _category(meta_text, labels, post),
+        'keywords': _keywords(meta_text, labels),
+        'language': _language(meta_text, labels, text_lower),
+        'file_format': _file_format(meta_text, labels),
+        'bitrate': _bitrate(meta_text, labels),
+        'file_size': file_size,
+        'duration': _duration(meta_text, labels),
+        'publisher': _publisher(meta_text, labels),
+        'isbn': _isbn(meta_text, labels),
+        'asin': _asin(meta_text, labels),
+        'explicit': any(keyword in text_lower for keyword in EXPLICIT_KEYWORDS),
+        'abridged': _abridged(text_lower)
+    }
@@ -0,0 +1,407 @@
+"""
+Listing page parser for AudiobookBay
+Turns fetched search, homepage and category HTML into book records
+"""
+import os
+import re
+import sys
+import time
+import logging
+from urllib.parse import urlsplit, unquote
+from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
+
+try:
+    # Try importing as a package (when running from parent directory)
+    from app.metadata import (
+        clean_title, extract_post_metadata, extract_upload_date, extract_author, extract_category,
+        extract_keywords, extract_language, extract_format, extract_bitrate, extract_duration,
+        extract_publisher, extract_isbn, extract_asin, check_explicit_content, check_abridged
+    )
+except ModuleNotFoundError:
+    # Import as local module (when running from app directory)
+    from metadata import (
+        clean_title, extract_post_metadata, extract_upload_date, extract_author, extract_category,
+        extract_keywords, extract_language, extract_format, extract_bitrate, extract_duration,
+        extract_publisher, extract_isbn, extract_asin, check_explicit_content, check_abridged
+    )
+
+logger = logging.getLogger(__name__)
+
+# HTML parser backend: html.parser by default; 'lxml' or 'auto' (fastest installed) are opt-in
+HTML_PARSER = os.getenv("HTML_PARSER", "html.parser")
+
+# Tree builders in order of preference for 'auto'; html.parser is always available
+PARSER_BACKENDS = ['lxml', 'html.parser']
+
+DEFAULT_COVER = "/static/images/default_cover.jpg"
+
+# Maximum number of posts returned per listing page
+POSTS_PER_PAGE = 18
+
+# Selector cascades, in order of preference
+POST_SELECTORS = ['.post', 'article.post', '.entry', '.postContent']
+TITLE_SELECTORS = [
+    '.postTitle > h2 > a',
+    '.postTitle a',
+    'h2 a',
+    'h3 a',
+    '.entry-title a',
+    'a[rel="bookmark"]'
+]
+COVER_SELECTORS = [
+    'img[src*="cover"]',
+    'img[alt*="cover"]',
+    '.postContent img',
+    'img'
+]
+META_SELECTOR = '.postContent, .entry-content, .post-content'
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def resolve_parser(name):
+    """
+    Resolve an HTML_PARSER setting to an installed BeautifulSoup tree builder
+
+    Falls back to html.parser when the requested backend is not installed.
+    """
+    candidates = PARSER_BACKENDS if name == 'auto' else [name]
+    for candidate in candidates:
+        if builder_registry.lookup(candidate):
+            return candidate
+    logger.warning(f"HTML parser '{name}' is not available, falling back to html.parser")
+    return 'html.parser'
+
+
+PARSER = resolve_parser(HTML_PARSER)
+logger.info(f"HTML_PARSER: {PARSER}")
+
+
+def make_soup(html, parser=None):
+    """Parse HTML with the configured backend"""
+    return BeautifulSoup(html, parser or PARSER)
+
+
+def resolve_link(href, hostname):
+    """Turn a post link into an absolute URL"""
+    if href.startswith('http'):
+        return href
+    elif href.startswith('/'):
+        return f"http://{hostname}{href}"
+    return f"http://{hostname}/{href}"
+
+
+def canonical_book_url(url):
+    """
+    Normalise a book URL into a cache key
+
+    Scheme, host case, percent-encoding and a trailing slash do not change
+    which book a URL points at, so they are folded away.
+    """
+    parts = urlsplit(unquote(url.strip()))
+    key = f"{parts.netloc.lower()}{parts.path.rstrip('/')}"
+    if parts.query:
+        key = f"{key}?{parts.query}"
+    return key
+
+
+def resolve_cover(src, hostname):
+    """Turn a cover image source into an absolute URL"""
+    if src.startswith('//'):
+        return 'http:' + src
+    elif src.startswith('/'):
+        return f"http://{hostname}{src}"
+    elif src.startswith('http'):
+        return src
+    return f"http://{hostname}/{src}"
+
+
+def is_hidden(element):
+    """Check whether an element or any of its ancestors has an inline display:none style"""
+    while element is not None:
+        style = element.get('style')
+        if style and 'display:none' in WHITESPACE_PATTERN.sub('', style).lower():
+            return True
+        element = element.parent
+    return False
+
+
+def select_posts(soup):
+    """
+    Find the visible post elements on a listing page
+
+    Hidden posts are dropped before the page limit is applied, so pages with
+    hidden posts still return up to POSTS_PER_PAGE results.
+
+    Returns:
+        tuple: (selector, all_posts, visible_posts) or (None, [], []) if nothing matched
+    """
+    for selector in POST_SELECTORS:
+        all_posts = soup.select(selector)
+        if all_posts:
+            posts = [p for p in all_posts if not is_hidden(p)][:POSTS_PER_PAGE]
+            return selector, all_posts, posts
+    return None, [], []
+
+
+def resolve_selector(posts, selectors, attr=None):
+    """
+    Pick the first selector in a cascade that matches on this page
+
+    Listing pages are generated from one template, so the selector that
+    matches the first post that has a match is used for every post on the page.
+    """
+    for post in posts:
+        for selector in selectors:
+            element = post.select_one(selector)
+            if element and (attr is None or element.get(attr)):
+                return selector
+    return None
+
+
+def _select_with_fallback(post, selector, selectors, attr=None):
+    """Select with the page-level selector, falling back to the full cascade"""
+    if selector:
+        element = post.select_one(selector)
+        if element and (attr is None or element.get(attr)):
+            return element
+    for candidate in selectors:
+        if candidate == selector:
+            continue
+        element = post.select_one(candidate)
+        if element and (attr is None or element.get(attr)):
+            return element
+    return None
+
+
+def parse_post(post, hostname, title_selector=None, cover_selector=None):
+    """
+    Parse a single listing post into a book record
+
+    Returns:
+        dict: Book data, or None if the post has no title link
+    """
+    title_element = _select_with_fallback(post, title_selector, TITLE_SELECTORS)
+    if not title_element:
+        return None
+
+    title = title_element.text.strip()
+    link = resolve_link(title_element.get('href', ''), hostname)
+
+    cover = DEFAULT_COVER
+    cover_element = _select_with_fallback(post, cover_selector, COVER_SELECTORS, attr='src')
+    if cover_element:
+        cover = resolve_cover(cover_element['src'], hostname)
+
+    meta_info = post.select_one(META_SELECTOR)
+    meta_text = meta_info.get_text() if meta_info else ""
+    metadata = extract_post_metadata(meta_text, title, post)
+    upload_date = extract_upload_date(post)
+
+    return {
+        'title': clean_title(title),
+        'link': link,
+        'cover': cover,
+        'author': metadata['author'],
+        'category': metadata['category'],
+        'keywords': metadata['keywords'],
+        'language': metadata['language'],
+        'file_format': metadata['file_format'],
+        'bitrate': metadata['bitrate'],
+        'file_size': metadata['file_size'],
+        'upload_date': upload_date,
+        'duration': metadata['duration'],
+        'publisher': metadata['publisher'],
+        'isbn': metadata['isbn'],
+        'asin': metadata['asin'],
+        'explicit': metadata['explicit'],
+        'abridged': metadata['abridged'],
+        'posted_date': upload_date
+    }
+
+
+def parse_book_list(html, hostname, context="", parser=None):
+    """
+    Parse a search, homepage or category listing page into book records
+
+    Args:
+        html: Page HTML
+        hostname: AudiobookBay hostname used to resolve relative links
+        context: Optional description of the page for log messages
+        parser: Tree builder to use instead of the configured HTML_PARSER
+
+    Returns:
+        list: Book data dictionaries
+    """
+    soup = make_soup(html, parser)
+    suffix = f" {context}" if context else ""
+
+    selector, all_posts, posts = select_posts(soup)
+    if not posts:
+        logger.warning(f"No posts found with any selector{suffix}")
+        return []
+    logger.info(f"Found {len(all_posts)} posts, {len(posts)} visible using selector '{selector}'{suffix}")
+
+    title_selector = resolve_selector(posts, TITLE_SELECTORS)
+    cover_selector = resolve_selector(posts, COVER_SELECTORS, attr='src')
+
+    results = []
+    for post in posts:
+        try:
+            book_data = parse_post(post, hostname, title_selector, cover_selector)
+            if book_data:
+                results.append(book_data)
+        except Exception as e:
+            logger.error(f"Skipping post due to error{suffix}: {e}")
+            continue
+
+    return results
+
+
+def benchmark_parser(paths, hostname="audiobookbay.lu", iterations=5, parser=None):
+    """
+    Measure listing parser throughput on saved HTML pages
+
+    Args:
+        paths: Paths to saved listing pages
+        hostname: Hostname used to resolve relative links
+        iterations: Number of passes over the whole set of pages
+        parser: Tree builder to benchmark instead of the configured HTML_PARSER
+
+    Returns:
+        dict: Pages, posts, elapsed seconds and posts per second
+    """
+    pages = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append(f.read())
+
+    posts = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for html in pages:
+            posts += len(parse_book_list(html, hostname, parser=parser))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'pages': len(pages) * iterations,
+        'posts': posts,
+        'seconds': round(elapsed, 4),
+        'posts_per_second': round(posts / elapsed, 1) if elapsed > 0 else 0.0
+    }
+
+
+def compare_parsers(paths, hostname="audiobookbay.lu", iterations=5):
+    """
+    Check every installed parser backend against html.parser and time it
+
+    Returns:
+        dict: Backend name -> {'identical': bool, 'posts_per_second': float}
+    """
+    pages = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append(f.read())
+    reference = [parse_book_list(html, hostname, parser='html.parser') for html in pages]
+
+    report = {}
+    for backend in PARSER_BACKENDS:
+        if not builder_registry.lookup(backend):
+            continue
+        identical = [parse_book_list(html, hostname, parser=backend) for html in pages] == reference
+        stats = benchmark_parser(paths, hostname, iterations, parser=backend)
+        report[backend] = {'identical': identical, 'posts_per_second': stats['posts_per_second']}
+    return report
+
+
+def _sequential_metadata(meta_text, title, post):
+    """Metadata extraction as done before extract_post_metadata, for benchmarking"""
+    size_match = re.search(r'(\d+(?:\.\d+)?)\s*(MB|GB)', meta_text, re.IGNORECASE)
+    return {
+        'author': extract_author(meta_text, title),
+        'category': extract_category(post, meta_text),
+        'keywords': extract_keywords(meta_text),
+        'language': extract_language(meta_text),
+        'file_format': extract_format(meta_text),
+        'bitrate': extract_bitrate(meta_text),
+        'file_size': f"{size_match.group(1)} {size_match.group(2).upper()}" if size_match else "",
+        'duration': extract_duration(meta_text),
+        'publisher': extract_publisher(meta_text),
+        'isbn': extract_isbn(meta_text),
+        'asin': extract_asin(meta_text),
+        'explicit': check_explicit_content(meta_text),
+        'abridged': check_abridged(meta_text)
+    }
+
+
+def benchmark_metadata(paths, iterations=20):
+    """
+    Compare per-post metadata extraction time on saved listing pages
+
+    Times the sequential extract_* calls against extract_post_metadata on the
+    same posts and checks that both produce the same fields.
+
+    Returns:
+        dict: Post count, microseconds per post for each extractor and whether they agree
+    """
+    samples = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            soup = make_soup(f.read())
+        _, _, posts = select_posts(soup)
+        title_selector = resolve_selector(posts, TITLE_SELECTORS)
+        for post in posts:
+            title_element = _select_with_fallback(post, title_selector, TITLE_SELECTORS)
+            if not title_element:
+                continue
+            meta_info = post.select_one(META_SELECTOR)
+            samples.append((meta_info.get_text() if meta_info else "", title_element.text.strip(), post))
+
+    timings = {}
+    for name, extractor in (('sequential', _sequential_metadata), ('single_pass', extract_post_metadata)):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for meta_text, title, post in samples:
+                extractor(meta_text, title, post)
+        elapsed = time.perf_counter() - start
+        runs = len(samples) * iterations
+        timings[name] = round(elapsed / runs * 1e6, 1) if runs else 0.0
+
+    return {
+        'posts': len(samples),
+        'sequential_us_per_post': timings['sequential'],
+        'single_pass_us_per_post': timings['single_pass'],
+        'identical': all(_sequential_metadata(*sample) == extract_post_metadata(*sample) for sample in samples)
+    }
+
+
+if __name__ == '__main__':
+    # Benchmark mode, run from the repository root:
+    #   python -m app.scraper page1.html page2.html ...
+    #   python -m app.scraper --metadata page1.html page2.html ...
+    #   python -m app.scraper --parsers page1.html page2.html ...
+    args = sys.argv[1:]
+    modes = {arg for arg in args if arg.startswith('--')}
+    paths = [arg for arg in args if not arg.startswith('--')]
+    if not paths:
+        print("Usage: python -m app.scraper [--metadata | --parsers] <saved listing page> [...]")
+        sys.exit(1)
+    logging.basicConfig(level=logging.WARNING)
+    if '--parsers' in modes:
+        report = compare_parsers(paths)
+        for backend, result in report.items():
+            print(f"{backend}: {result['posts_per_second']} posts/second, "
+                  f"identical to html.parser: {result['identical']}")
+        if not all(result['identical'] for result in report.values()):
+            sys.exit(1)
+    elif '--metadata' in modes:
+        stats = benchmark_metadata(paths)
+        print(f"Extracted metadata for {stats['posts']} posts: "
+              f"sequential {stats['sequential_us_per_post']}us/post, "
+              f"single pass {stats['single_pass_us_per_post']}us/post, "
+              f"identical output: {stats['identical']}")
+    else:
+        stats = benchmark_parser(paths)
+        print(f"Parsed {stats['posts']} posts from {stats['pages']} pages in {stats['seconds']}s "
+              f"({stats['posts_per_second']} posts/second)")
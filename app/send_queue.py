@@ -0,0 +1,187 @@
+"""
+Send queue for AudiobookBay
+Runs download requests on a fixed pool of worker threads so /send can return straight away
+"""
+import os
+import time
+import uuid
+import queue
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Worker threads, attempts per job, and the base delay in seconds before a retry (doubled each time)
+SEND_WORKERS = int(os.getenv("SEND_WORKERS", 4))
+SEND_RETRIES = int(os.getenv("SEND_RETRIES", 3))
+SEND_RETRY_BACKOFF = float(os.getenv("SEND_RETRY_BACKOFF", 2))
+
+# Finished jobs kept for status lookups
+SEND_JOB_HISTORY = 1000
+
+QUEUED = 'queued'
+RUNNING = 'running'
+RETRYING = 'retrying'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class RetryableError(Exception):
+    """A failure that may go away on a later attempt, such as a page that could not be loaded"""
+
+
+class SendQueue:
+    """
+    Job queue for download requests
+
+    submit() records a job and returns it at once; a worker calls
+    handler(payload) and stores the message it returns. When the handler
+    raises an error that is_retryable(error) accepts - by default a
+    RetryableError - the job is retried with exponential backoff; any other
+    error fails it straight away. A job submitted with the same key as
+    one still in flight returns that job instead of queueing a duplicate.
+    Retries wait on a timer rather than holding a worker.
+    """
+
+    def __init__(self, handler, workers=SEND_WORKERS, retries=SEND_RETRIES, backoff=SEND_RETRY_BACKOFF,
+                 is_retryable=None):
+        self.handler = handler
+        self.is_retryable = is_retryable or (lambda error: isinstance(error, RetryableError))
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self._queue = queue.Queue()
+        self._jobs = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._finished = threading.Condition(self._lock)
+        self._threads = []
+        self.submitted = 0
+        self.deduped = 0
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.running = 0
+
+    def start(self):
+        """Start the worker pool if it is not already running"""
+        with self._lock:
+            if self._threads:
+                return
+            for _ in range(self.workers):
+                thread = threading.Thread(target=self._run, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        logger.info(f"Send queue started with {self.workers} workers")
+
+    def submit(self, key, payload, owner=None):
+        """
+        Queue a job, or join the in-flight job with the same key
+
+        Returns:
+            dict: A copy of the job record
+        """
+        self.start()
+        with self._lock:
+            job_id = self._inflight.get(key)
+            if job_id:
+                self.deduped += 1
+                return dict(self._jobs[job_id])
+
+            job = {
+                'id': uuid.uuid4().hex,
+                'owner': owner,
+                'status': QUEUED,
+                'message': 'Download queued',
+                'attempts': 0,
+                'created_at': time.time(),
+                'finished_at': None
+            }
+            self._jobs[job['id']] = job
+            self._inflight[key] = job['id']
+            self.submitted += 1
+            self._trim()
+        self._queue.put((job['id'], key, payload))
+        return dict(job)
+
+    def _trim(self):
+        # Drop the oldest finished jobs past the history limit
+        excess = len(self._jobs) - SEND_JOB_HISTORY
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id]['status'] in (DONE, FAILED):
+                del self._jobs[job_id]
+                excess -= 1
+
+    def _run(self):
+        while True:
+            job_id, key, payload = self._queue.get()
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if not job:
+                    continue
+                job['status'] = RUNNING
+                job['attempts'] += 1
+                self.running += 1
+
+            try:
+                message = self.handler(payload)
+                error = None
+            except Exception as e:
+                message, error = None, e
+
+            with self._lock:
+                self.running -= 1
+                if error is None:
+                    self._finish(job, key, DONE, message)
+                    self.completed += 1
+                elif self.is_retryable(error) and job['attempts'] < self.retries:
+                    delay = self.backoff * 2 ** (job['attempts'] - 1)
+                    job['status'] = RETRYING
+                    job['message'] = f'Retrying in {delay:g}s: {error}'
+                    self.retried += 1
+                    logger.warning(f"Send job {job_id} attempt {job['attempts']} failed, retrying in {delay:g}s: {error}")
+                    timer = threading.Timer(delay, self._queue.put, args=((job_id, key, payload),))
+                    timer.daemon = True
+                    timer.start()
+                else:
+                    self._finish(job, key, FAILED, str(error))
+                    self.failed += 1
+                    logger.error(f"Send job {job_id} failed after {job['attempts']} attempts: {error}")
+
+    def _finish(self, job, key, status, message):
+        job['status'] = status
+        job['message'] = message
+        job['finished_at'] = time.time()
+        self._inflight.pop(key, None)
+        self._finished.notify_all()
+
+    def get(self, job_id, wait=0):
+        """
+        Get a copy of a job, optionally waiting up to wait seconds for it to finish
+
+        Returns:
+            dict: The job record, or None if it is unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job and wait:
+                self._finished.wait_for(lambda: job['status'] in (DONE, FAILED), wait)
+            return dict(job) if job else None
+
+    def stats(self):
+        """Get queue depth and job counters"""
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'depth': self._queue.qsize(),
+                'running': self.running,
+                'in_flight': len(self._inflight),
+                'submitted': self.submitted,
+                'deduped': self.deduped,
+                'completed': self.completed,
+                'failed': self.failed,
+                'retried': self.retried
+            }
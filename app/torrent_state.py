@@ -0,0 +1,187 @@
+"""
+Shared torrent state for AudiobookBay
+One background poller keeps the download client's torrent list in memory for every reader
+"""
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Seconds between torrent list refreshes
+TORRENT_POLL_INTERVAL = float(os.getenv("TORRENT_POLL_INTERVAL", 5))
+
+# Removed hashes remembered for readers catching up on changes
+REMOVED_HISTORY = 1024
+
+
+class TorrentState:
+    """
+    Latest torrent list from a download backend
+
+    A single daemon thread lists torrents every interval seconds, so the load
+    on the download client does not grow with the number of open status pages.
+    Readers get the last successful listing; refresh_soon() wakes the poller
+    early after an action changes a torrent.
+
+    Every poll that changes something bumps a version number, and each torrent
+    remembers the version it last changed in, so streaming readers can ask for
+    just what changed since the version they last saw.
+    """
+
+    def __init__(self, backend, category=None, interval=TORRENT_POLL_INTERVAL):
+        self.backend = backend
+        self.category = category
+        self.interval = interval
+        self._torrents = {}
+        self._updated_at = 0
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._version = 0
+        self._changed_in = {}
+        self._removed_in = OrderedDict()
+        self._poll_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.polls = 0
+        self.full_syncs = 0
+        self.last_changes = None
+        self.errors = 0
+        self.last_error = None
+        self.last_poll_ms = None
+
+    def start(self):
+        """Start the poller if it is not already running"""
+        with self._lock:
+            if self._thread:
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        logger.info(f"Torrent state poller started (every {self.interval}s)")
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Torrent state poll failed: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def refresh(self):
+        """Sync torrent changes from the backend into the cached state"""
+        with self._poll_lock:
+            start = time.perf_counter()
+            try:
+                changed, removed, full = self.backend.sync(category=self.category)
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                    self.last_error = str(e)
+                raise
+            with self._lock:
+                # Apply only the delta; readers copy under the same lock
+                version = self._version + 1
+                removed = [torrent_hash.lower() for torrent_hash in removed]
+                if full:
+                    listed = {torrent['hash'] for torrent in changed}
+                    removed += [torrent_hash for torrent_hash in self._torrents if torrent_hash not in listed]
+
+                updated = False
+                for torrent_hash in removed:
+                    if self._torrents.pop(torrent_hash, None) is not None:
+                        self._changed_in.pop(torrent_hash, None)
+                        self._removed_in[torrent_hash] = version
+                        self._removed_in.move_to_end(torrent_hash)
+                        updated = True
+                for torrent in changed:
+                    if self._torrents.get(torrent['hash']) != torrent:
+                        self._torrents[torrent['hash']] = torrent
+                        self._changed_in[torrent['hash']] = version
+                        self._removed_in.pop(torrent['hash'], None)
+                        updated = True
+                while len(self._removed_in) > REMOVED_HISTORY:
+                    self._removed_in.popitem(last=False)
+
+                if updated:
+                    self._version = version
+                    self._changed.notify_all()
+                self._updated_at = time.time()
+                self.polls += 1
+                self.full_syncs += full
+                self.last_changes = len(changed) + len(removed)
+                self.last_error = None
+                self.last_poll_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    def refresh_soon(self):
+        """Wake the poller so a change made by an action shows up without waiting a full interval"""
+        self._wake.set()
+
+    def _ensure_loaded(self):
+        self.start()
+        if not self._updated_at:
+            # Cold cache - concurrent first readers share a single listing
+            with self._poll_lock:
+                pass
+            if not self._updated_at:
+                self.refresh()
+
+    def torrents(self):
+        """
+        Get the cached torrents
+
+        Returns:
+            list: Normalised torrent records from the last successful poll
+        """
+        self._ensure_loaded()
+        with self._lock:
+            return list(self._torrents.values())
+
+    def snapshot(self):
+        """Get the current state version and every cached torrent"""
+        self._ensure_loaded()
+        with self._lock:
+            return self._version, list(self._torrents.values())
+
+    def wait_for_changes(self, since, timeout=None):
+        """
+        Wait until the state moves past a version
+
+        Args:
+            since: Version the caller has already seen
+            timeout: Seconds to wait before returning with no changes
+
+        Returns:
+            tuple: (version, changed torrents, removed hashes) since that version
+        """
+        self._ensure_loaded()
+        with self._lock:
+            self._changed.wait_for(lambda: self._version > since, timeout)
+            changed = [self._torrents[torrent_hash] for torrent_hash, version in self._changed_in.items()
+                       if version > since]
+            removed = [torrent_hash for torrent_hash, version in self._removed_in.items() if version > since]
+            return self._version, changed, removed
+
+    def get(self, torrent_hash):
+        """Get one cached torrent by hash, or None"""
+        self._ensure_loaded()
+        with self._lock:
+            return self._torrents.get(torrent_hash.lower())
+
+    def stats(self):
+        """Get poll counters and the age of the cached state"""
+        with self._lock:
+            return {
+                'torrents': len(self._torrents),
+                'version': self._version,
+                'interval': self.interval,
+                'age': round(time.time() - self._updated_at, 1) if self._updated_at else None,
+                'polls': self.polls,
+                'full_syncs': self.full_syncs,
+                'last_changes': self.last_changes,
+                'errors': self.errors,
+                'last_error': self.last_error,
+                'last_poll_ms': self.last_poll_ms
+            }
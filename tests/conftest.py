@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def abb(tmp_path_factory):
+    """The Flask app module, with the fake download client and throwaway databases"""
+    data_dir = tmp_path_factory.mktemp("abb")
+    os.environ.setdefault("DOWNLOAD_CLIENT", "fake")
+    os.environ.setdefault("SAVE_PATH_BASE", "/downloads")
+
+    # The app logs to audiobookbay.log in the working directory
+    cwd = os.getcwd()
+    os.chdir(data_dir)
+    try:
+        import app.app as abb
+        import app.auth_db as auth_db
+    finally:
+        os.chdir(cwd)
+
+    auth_db.AUTH_DB_PATH = str(data_dir / "users.db")
+    abb.app_db_path = str(data_dir / "app_data.sqlite")
+    abb.app_db_ready = False
+    abb.init_auth_db()
+    abb.create_user("root", "password1", "root")
+    abb.create_user("bob", "password1")
+    return abb
+
+
+@pytest.fixture
+def login(abb):
+    def login(username):
+        client = abb.app.test_client()
+        client.post("/login", data={"username": username, "password": "password1"})
+        return client
+    return login
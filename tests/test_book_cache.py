@@ -0,0 +1,14 @@
+def record(info_hash):
+    return {'details': {}, 'related_books': [], 'comments': [], 'torrent_files': [],
+            'info_hash': info_hash, 'trackers': []}
+
+
+def test_record_without_info_hash_is_not_cached(abb, monkeypatch):
+    pages = [record(None), record("A" * 40)]
+    monkeypatch.setattr(abb, "get_book_page", lambda url: pages.pop(0))
+    url = "https://audiobookbay.lu/abss/no-hash-yet/"
+
+    assert abb.get_book_record(url)['info_hash'] is None
+    assert abb.get_book_record(url)['info_hash'] == "A" * 40
+    assert abb.get_book_record(url)['info_hash'] == "A" * 40
+    assert pages == []
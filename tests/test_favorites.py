@@ -0,0 +1,18 @@
+def test_check_batch_returns_favorited_links(abb, login):
+    client = login("bob")
+    abb.add_user_favorite("bob", "Book A", "https://audiobookbay.lu/abss/a/")
+
+    response = client.post("/api/favorites/check-batch", json={
+        "links": ["https://audiobookbay.lu/abss/a/", "https://audiobookbay.lu/abss/b/", "https://audiobookbay.lu/abss/a/"]
+    })
+
+    assert response.status_code == 200
+    assert response.get_json() == {"favorites": ["https://audiobookbay.lu/abss/a/"]}
+
+
+def test_check_batch_rejects_non_string_links(login):
+    client = login("bob")
+
+    for links in ([{"a": 1}], ["https://audiobookbay.lu/abss/a/", ["nested"]], [1, None], "https://audiobookbay.lu/abss/a/"):
+        response = client.post("/api/favorites/check-batch", json={"links": links})
+        assert response.status_code == 400, links
@@ -0,0 +1,109 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.fetcher import Fetcher, MirrorResolver
+
+
+class FakeResponse:
+    def __init__(self, url, status_code):
+        self.url = url
+        self.status_code = status_code
+
+
+class FakeHTTP:
+    """Answers 200 unless the URL is given a status code, or an exception to raise"""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.calls = []
+
+    def get(self, url, allow_redirects=True):
+        self.calls.append(url)
+        answer = self.answers.get(url, 200)
+        if isinstance(answer, Exception):
+            raise answer
+        return FakeResponse(url, answer)
+
+
+def resolver(answers, base="https://abb.test"):
+    http = FakeHTTP(answers)
+    mirror = MirrorResolver("abb.test", http=http)
+    mirror._learn(FakeResponse(base, 200))
+    return mirror, http
+
+
+def test_4xx_from_learned_base_keeps_the_base():
+    mirror, http = resolver({"https://abb.test/x/": 404, "https://abb.test/x": 404})
+
+    response = mirror.get(["/x/", "/x"])
+
+    assert response.status_code == 404
+    assert mirror.stats() == {'base_url': "https://abb.test", 'probes': 0}
+    assert http.calls == ["https://abb.test/x/", "https://abb.test/x"]
+
+
+def test_5xx_from_learned_base_probes_again():
+    mirror, http = resolver({"https://abb.test/x": 503})
+
+    response = mirror.get(["/x"])
+
+    assert response.status_code == 200
+    assert mirror.stats() == {'base_url': "http://abb.test", 'probes': 1}
+
+
+def test_5xx_from_learned_base_is_returned_when_probes_fail():
+    mirror, http = resolver({
+        "https://abb.test/x": 503,
+        "http://abb.test/x": ConnectionError("refused"),
+    })
+
+    response = mirror.get(["/x"])
+
+    assert response.status_code == 503
+    assert http.calls == ["https://abb.test/x", "http://abb.test/x"]
+
+
+def test_raises_when_no_url_answers():
+    mirror, http = resolver({
+        "https://abb.test/x": ConnectionError("refused"),
+        "http://abb.test/x": ConnectionError("refused"),
+    })
+
+    with pytest.raises(ConnectionError):
+        mirror.get(["/x"])
+
+
+@pytest.fixture
+def keep_alive_server():
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            body = b"ok"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetcher_counts_reused_connections(keep_alive_server):
+    http = Fetcher(timeout=5)
+
+    assert http.get(f"{keep_alive_server}/a").status_code == 200
+    assert http.get(f"{keep_alive_server}/b").status_code == 200
+
+    stats = http.stats()
+    assert stats['requests'] == 2
+    assert stats['connections_opened'] == 1
+    assert stats['connections_reused'] == 1
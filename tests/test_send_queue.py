@@ -0,0 +1,55 @@
+import requests
+from qbittorrentapi import Conflict409Error
+
+from app.send_queue import SendQueue, RetryableError, DONE, FAILED
+
+
+def run(queue, payload=None):
+    job = queue.submit("key", payload or {})
+    return queue.get(job['id'], wait=5)
+
+
+def test_non_retryable_error_fails_after_one_attempt():
+    def handler(payload):
+        raise ValueError("Info Hash not found on the page")
+
+    job = run(SendQueue(handler, workers=1, retries=3, backoff=0))
+
+    assert job['status'] == FAILED
+    assert job['attempts'] == 1
+    assert job['message'] == "Info Hash not found on the page"
+
+
+def test_retryable_error_is_retried():
+    calls = []
+
+    def handler(payload):
+        calls.append(payload)
+        if len(calls) < 2:
+            raise RetryableError("Failed to fetch details page")
+        return "added"
+
+    job = run(SendQueue(handler, workers=1, retries=3, backoff=0.01))
+
+    assert job['status'] == DONE
+    assert job['attempts'] == 2
+    assert job['message'] == "added"
+
+
+def test_app_retries_only_unreachable_page_or_client(abb):
+    assert abb.is_retryable_send_error(RetryableError("Failed to fetch details page"))
+    assert abb.is_retryable_send_error(requests.ConnectionError("refused"))
+    assert not abb.is_retryable_send_error(ValueError("Info Hash not found on the page"))
+    assert not abb.is_retryable_send_error(KeyError("link"))
+    assert not abb.is_retryable_send_error(Conflict409Error("bad torrent"))
+
+
+def test_send_without_info_hash_fails_at_once(abb, monkeypatch):
+    monkeypatch.setattr(abb, "get_book_record", lambda url: {'info_hash': None, 'trackers': []})
+    queue = SendQueue(abb.process_send, workers=1, retries=3, backoff=0.01,
+                      is_retryable=abb.is_retryable_send_error)
+
+    job = run(queue, {'username': 'bob', 'link': 'https://audiobookbay.lu/abss/a/', 'title': 'Book A'})
+
+    assert job['status'] == FAILED
+    assert job['attempts'] == 1